@@ -5,7 +5,8 @@ from fastapi import APIRouter, Depends, BackgroundTasks, status
 from typing import Optional, List
 from app.services.analysis_service import AnalysisService
 from app.services.notification_service import NotificationService
-from app.tasks.celery_tasks import analyze_cv_task, batch_analyze_task
+from app.core.blocking import run_blocking
+from app.tasks.celery_tasks import analyze_cv_task, batch_analyze_task, create_analysis_batch
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/analysis", tags=["Analysis"])
@@ -110,14 +111,17 @@ async def batch_analyze(
     - **async_mode**: If True, run in background (recommended for large batches)
     """
     if request.async_mode:
-        # Run in background using Celery
-        task = batch_analyze_task.delay(
+        # Run in background using Celery; tasks get the stored batch's id, not the ID list
+        batch_id = await run_blocking(
+            create_analysis_batch,
             request.job_description,
             request.candidate_ids
         )
+        task = batch_analyze_task.delay(batch_id)
         return {
             "status": "started",
             "task_id": task.id,
+            "batch_id": batch_id,
             "message": "Batch analysis started in background"
         }
     else:
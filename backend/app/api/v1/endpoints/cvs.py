@@ -1,10 +1,16 @@
 """
 CV API endpoints - Version 1
 """
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 from app.models.cv import CVCreate, CVUpdate, CVResponse, CVStatus
 from app.services.cv_service import CVService
+from app.services.bulk_ingest_service import BulkIngestService, BulkIngestTooLarge
+from app.services.zip_ingest_service import ZipIngestService
+from app.core.config import settings
+from app.core.exceptions import BadRequestException
+from app.utils.uploads import spool_stream
 from app.core.security import get_current_active_user
 
 router = APIRouter(prefix="/cvs", tags=["CVs"])
@@ -43,6 +49,61 @@ async def create_cv(
     return await service.create_cv(cv_data)
 
 
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+    summary="Stream-import CVs from NDJSON"
+)
+async def bulk_import_cvs(
+    request: Request,
+    include_ok: bool = Query(True, description="Include successful records in results")
+):
+    """
+    Import CVs from a newline-delimited JSON body, one `CVCreate` object per line.
+    
+    The body may be gzip-compressed. Records are validated and written in batches
+    while the body is still streaming, so imports of tens of thousands of CVs fit
+    in one request. Returns a result per line (created with its candidateId, or
+    the validation/write error) plus throughput stats. A gzip body inflating past
+    the limit is a 413 that still reports the lines imported before it.
+    """
+    try:
+        return await BulkIngestService(include_ok=include_ok).ingest(request.stream())
+    except BulkIngestTooLarge as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.message, **e.report})
+
+
+@router.post(
+    "/bulk/zip",
+    status_code=status.HTTP_200_OK,
+    summary="Import CV files from a ZIP archive"
+)
+async def bulk_import_zip(
+    request: Request,
+    filename: str = Query("upload.zip", description="Archive name, for logs"),
+    include_ok: bool = Query(True, description="Include successful members in results")
+):
+    """
+    Import every PDF/DOCX/TXT CV in a ZIP archive sent as the raw request body
+    (`Content-Type: application/zip`).
+    
+    The body is spooled to a temp file (up to ZIP_MAX_ARCHIVE_MB) and its members
+    are read one at a time, extracted, parsed and written in batches. Returns a
+    result per member (created with its candidateId, skipped, or the error) plus
+    throughput stats.
+    """
+    async with await spool_stream(
+        request.stream(),
+        filename,
+        "application/zip",
+        max_bytes=settings.ZIP_MAX_ARCHIVE_MB * 1024 * 1024,
+        spool_max_bytes=0
+    ) as archive:
+        if archive.path is None:
+            raise BadRequestException("Request body is empty")
+        return await ZipIngestService(include_ok=include_ok).ingest(archive.path)
+
+
 @router.get(
     "/",
     response_model=List[CVResponse],
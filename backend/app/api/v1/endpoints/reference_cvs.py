@@ -3,7 +3,9 @@ Reference CV Management API endpoints
 """
 from fastapi import APIRouter, Depends, UploadFile, File, Form, status
 from typing import List, Optional
+from async_firebase_service import AsyncFirebaseService
 from firebase_service import FirebaseService
+from app.core.blocking import run_blocking
 from datetime import datetime
 
 router = APIRouter(prefix="/reference-cvs", tags=["Reference CVs"])
@@ -13,9 +15,9 @@ router = APIRouter(prefix="/reference-cvs", tags=["Reference CVs"])
 async def get_reference_cvs():
     """Get all reference CVs (active and inactive)"""
     try:
-        refs = FirebaseService.db.collection('reference_cvs').order_by('uploadedAt', direction='DESCENDING').stream()
+        refs = AsyncFirebaseService.db.collection('reference_cvs').order_by('uploadedAt', direction='DESCENDING').stream()
         reference_cvs = []
-        for ref in refs:
+        async for ref in refs:
             ref_data = ref.to_dict()
             ref_data['id'] = ref.id
             reference_cvs.append(ref_data)
@@ -28,7 +30,7 @@ async def get_reference_cvs():
 async def delete_reference_cv(ref_id: str):
     """Delete a reference CV"""
     try:
-        FirebaseService.db.collection('reference_cvs').document(ref_id).delete()
+        await AsyncFirebaseService.db.collection('reference_cvs').document(ref_id).delete()
         return {"message": "Reference CV deleted successfully"}
     except Exception as e:
         return {"error": str(e)}
@@ -38,7 +40,7 @@ async def delete_reference_cv(ref_id: str):
 async def toggle_reference_cv(ref_id: str):
     """Activate or deactivate a reference CV (supports multiple active CVs)"""
     try:
-        ref_doc = FirebaseService.db.collection('reference_cvs').document(ref_id).get()
+        ref_doc = await AsyncFirebaseService.db.collection('reference_cvs').document(ref_id).get()
         if not ref_doc.exists:
             return {"error": "Reference CV not found"}
         
@@ -47,7 +49,7 @@ async def toggle_reference_cv(ref_id: str):
         
         # Allow multiple active reference CVs - no auto-deactivation
         
-        FirebaseService.db.collection('reference_cvs').document(ref_id).update({'status': new_status})
+        await AsyncFirebaseService.update_document('reference_cvs', ref_id, {'status': new_status})
         return {"message": f"Reference CV {new_status}", "status": new_status}
     except Exception as e:
         return {"error": str(e)}
@@ -63,7 +65,7 @@ async def add_reference_cv_from_url(
         import requests
         
         # Download content from URL
-        response = requests.get(url, timeout=10)
+        response = await run_blocking(requests.get, url, timeout=10)
         if response.status_code != 200:
             return {"error": "Failed to download from URL"}
         
@@ -81,7 +83,8 @@ async def add_reference_cv_from_url(
             "status": "active"
         }
         
-        FirebaseService.db.collection('reference_cvs').document(ref_id).set(ref_data)
+        ref_data = await run_blocking(FirebaseService.texts.offload, ref_data)
+        await AsyncFirebaseService.set_document('reference_cvs', ref_id, ref_data)
         
         return {
             "message": "Reference CV added from URL successfully",
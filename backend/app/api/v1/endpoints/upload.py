@@ -3,10 +3,11 @@ CV Upload API endpoints
 """
 from fastapi import APIRouter, UploadFile, File, Form, Depends, status
 from typing import Optional
+from app.core.exceptions import NotFoundException
 from app.services.file_service import FileUploadService
-from app.services.cv_service import CVService
-from app.services.notification_service import NotificationService
-from app.models.cv import CVCreate
+from app.services.upload_pipeline import upload_pipeline
+from app.models.cv import CVCreate, CVStatus
+from app.utils.uploads import spool_upload
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
@@ -15,17 +16,9 @@ def get_file_service() -> FileUploadService:
     return FileUploadService()
 
 
-def get_cv_service() -> CVService:
-    return CVService()
-
-
-def get_notification_service() -> NotificationService:
-    return NotificationService()
-
-
 @router.post(
     "/cv",
-    status_code=status.HTTP_201_CREATED,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Upload a CV file"
 )
 async def upload_cv_file(
@@ -41,26 +34,18 @@ async def upload_cv_file(
     location: str = Form(..., description="Location"),
     current_role: str = Form(..., description="Current role"),
     expected_salary: str = Form(..., description="Expected salary"),
-    file_service: FileUploadService = Depends(get_file_service),
-    cv_service: CVService = Depends(get_cv_service),
-    notification_service: NotificationService = Depends(get_notification_service)
+    file_service: FileUploadService = Depends(get_file_service)
 ):
     """
     Upload a CV file and create a candidate profile
     
-    Supports PDF, DOCX, and TXT files. The file will be parsed to extract
-    text and skills automatically.
+    Supports PDF, DOCX, and TXT files. Returns as soon as the file is stored;
+    text and skill extraction, the CV record and the candidate notification
+    follow in the upload pipeline. Poll `GET /upload/jobs/{jobId}` for progress.
     """
-    # Upload and parse file
-    file_data = await file_service.upload_cv(file)
-    
-    # Parse CV data from text
-    parsed_data = await file_service.parse_cv_data(file_data['extracted_text'])
-    
-    # Extract skills from parsed data or use empty list
-    skills = parsed_data.get('skills', [])
+    file_service.validate_file(file)
     
-    # Create CV record
+    # Validate the candidate fields before accepting the file
     cv_data = CVCreate(
         name=name,
         email=email,
@@ -68,30 +53,41 @@ async def upload_cv_file(
         age=age,
         gender=gender,
         experience=experience,
-        skills=skills if skills else ["To be updated"],
+        skills=["To be updated"],
         education=education,
         location=location,
         currentRole=current_role,
         expectedSalary=expected_salary
     )
+    form = cv_data.model_dump(exclude={"skills"})
+    form.update({"status": CVStatus.PENDING.value, "analyzed": False, "jobId": job_id})
     
-    cv = await cv_service.create_cv(cv_data)
-    
-    # Send notification
-    await notification_service.notify_cv_uploaded(name, email)
+    async with await spool_upload(file, max_bytes=file_service.MAX_FILE_SIZE) as upload:
+        job = await upload_pipeline.submit(upload, form, notify=True)
     
     return {
-        "cv": cv,
-        "file_info": {
-            "filename": file_data['filename'],
-            "extracted_skills": skills,
-            "file_size": file_data['file_size']
-        },
+        **job,
+        "statusUrl": f"/api/v1/upload/jobs/{job['jobId']}",
         "job_id": job_id,
-        "message": "CV uploaded successfully"
+        "message": "CV accepted for processing"
     }
 
 
+@router.get(
+    "/jobs/{upload_job_id}",
+    summary="Get the status of an upload"
+)
+async def get_upload_job(upload_job_id: str):
+    """
+    Processing state of an accepted upload: the stage it is in, per-stage
+    timings, the candidate ID it is saved under and any error
+    """
+    job = await upload_pipeline.get_job(upload_job_id)
+    if job is None:
+        raise NotFoundException(f"Upload job not found: {upload_job_id}")
+    return job
+
+
 @router.post(
     "/sample-cv",
     summary="Upload a sample/ideal CV"
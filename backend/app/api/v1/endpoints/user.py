@@ -85,7 +85,7 @@ async def submit_application(
     })
     
     # Save to Firebase with specific document ID
-    from firebase_service import FirebaseService
-    FirebaseService.db.collection('cvs').document(candidate_id).set(cv_dict)
+    from async_firebase_service import AsyncFirebaseService
+    await AsyncFirebaseService.set_cv(candidate_id, cv_dict)
     
     return CVResponse(**cv_dict)
@@ -0,0 +1,54 @@
+"""
+Bounded thread pool for blocking calls made from async code
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core.config import settings
+
+
+class BlockingExecutor:
+    """Run synchronous SDK calls off the event loop on a bounded thread pool"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="blocking-io"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run ``func(*args, **kwargs)`` in the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._pending += 1
+        try:
+            return await loop.run_in_executor(
+                self._executor,
+                functools.partial(func, *args, **kwargs)
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "pending": self._pending,
+            "completed": self._completed
+        }
+
+
+blocking_executor = BlockingExecutor(settings.BLOCKING_IO_WORKERS)
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Shortcut for ``blocking_executor.run``"""
+    return await blocking_executor.run(func, *args, **kwargs)
@@ -24,6 +24,7 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    ANALYSIS_CHUNK_SIZE: int = 50  # Candidates per parallel Celery analysis task
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -36,12 +37,84 @@ class Settings(BaseSettings):
     # Firebase
     FIREBASE_SERVICE_ACCOUNT: str = "service-account-key.json"
     FIREBASE_PROJECT_ID: Optional[str] = None
+    FIREBASE_STORAGE_BUCKET: Optional[str] = None
     GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = None
     
+    # Storage backend: "firestore", "memory" or "sqlite"
+    STORAGE_BACKEND: str = "firestore"
+    SQLITE_PATH: str = "data/fairhire.sqlite3"
+    LOCAL_BUCKET_DIR: str = "data/bucket"  # Blob storage for the memory/sqlite backends
+    
+    # Uploads
+    MAX_UPLOAD_SIZE_MB: int = 10
+    UPLOAD_SPOOL_MAX_BYTES: int = 1024 * 1024  # Uploads larger than this spill to a temp file
+    UPLOAD_TMP_DIR: Optional[str] = None  # Defaults to the system temp dir
+    UPLOAD_PIPELINE_DIR: str = "data/upload_pipeline"  # Accepted files wait here until processed
+    UPLOAD_PIPELINE_QUEUE_SIZE: int = 100  # Jobs queued per stage before upstream waits
+    UPLOAD_PIPELINE_BACKLOG: int = 1000  # Accepted jobs waiting for the extract stage before uploads get 503
+    INSTANCE_ID: Optional[str] = None  # Owner recorded on upload jobs; defaults to the host name
+    UPLOAD_EXTRACT_CONCURRENCY: int = 4
+    UPLOAD_PARSE_CONCURRENCY: int = 2
+    UPLOAD_EMBED_CONCURRENCY: int = 1
+    UPLOAD_PERSIST_CONCURRENCY: int = 8
+    UPLOAD_NOTIFY_CONCURRENCY: int = 4
+    BLOB_UPLOAD_DIR: str = "data/blob_uploads"  # Files wait here until stored in the bucket
+    BLOB_UPLOAD_WORKERS: int = 4  # Concurrent Storage uploads
+    BLOB_UPLOAD_QUEUE_SIZE: int = 200  # Queued uploads before request handlers wait
+    BLOB_UPLOAD_MAX_ATTEMPTS: int = 5
+    BLOB_UPLOAD_BACKOFF_SECONDS: float = 1.0  # First retry delay; doubles on each attempt
+    BLOB_UPLOAD_CHUNK_MB: int = 8  # Larger files are uploaded in resumable chunks of this size
+    BULK_MAX_INFLATED_MB: int = 2048  # Decompressed size cap of a gzip NDJSON bulk import
+    ZIP_MAX_ARCHIVE_MB: int = 1024  # Bulk ZIP imports; members are still capped at MAX_UPLOAD_SIZE_MB
+    ZIP_MAX_MEMBERS: int = 50000
+    ZIP_INGEST_WORKERS: int = 4  # Members extracted concurrently during a ZIP import
+    
+    # OCR for image-based PDFs
+    OCR_DPI: int = 200  # Rasterization resolution; 200 is enough for printed text
+    OCR_MAX_PAGES: int = 10  # Pages considered per document
+    OCR_WORKERS: int = 4  # Pages rasterized/OCR'd concurrently (tesseract runs out of process)
+    OCR_TARGET_CHARS: int = 4000  # Stop OCR once this much text has been recovered
+    
+    # spaCy NER over CV batches
+    SPACY_BATCH_SIZE: int = 64
+    SPACY_N_PROCESS: int = 1  # >1 forks worker processes for nlp.pipe on large batches
+    
+    # Text and parsed fields of CV folder files, keyed by content hash + extractor version
+    EXTRACTION_CACHE_PATH: Optional[str] = "data/extraction_cache.sqlite3"  # Unset: in-memory only
+    
+    # CV drop folder watcher
+    CV_WATCH_ENABLED: bool = False
+    CV_WATCH_FOLDER: Optional[str] = None  # Defaults to sample_cvs
+    CV_WATCH_DEBOUNCE_SECONDS: float = 2.0  # Quiet period before a changed file is processed
+    CV_WATCH_WORKERS: int = 4
+    CV_WATCH_MAX_BACKLOG: int = 1000  # Files queued for processing before new ones are dropped
+    CV_WATCH_POLL_INTERVAL: float = 5.0  # Seconds between scans when watchdog is not installed
+    
     # AI/ML
+    SENTENCE_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    WARMUP_MODE: str = "background"  # "background": serve /health at once; "eager": load models before serving
+    ANALYSIS_ENCODE_BATCH_SIZE: int = 64  # CV texts per sentence-transformer forward pass in batch analysis
+    JOB_PROFILE_CACHE_SIZE: int = 64  # Compiled job descriptions (keywords + embedding) kept in memory
     GEMINI_API_KEY: Optional[str] = None
     OPENROUTER_API_KEY: Optional[str] = None
     
+    # Concurrency
+    BLOCKING_IO_WORKERS: int = 16  # Threads for sync SDK calls made from async code
+    EVENT_LOOP_LAG_INTERVAL: float = 0.5  # Seconds between event loop lag probes
+    EVENT_LOOP_LAG_WARN_MS: float = 100.0
+    EXTRACTION_WORKERS: int = 2  # Worker processes for PDF/DOCX/TXT text extraction
+    EXTRACTION_TIMEOUT: float = 30.0  # Seconds before a document's extraction is abandoned
+    EXTRACTION_MEMORY_LIMIT_MB: int = 512  # Address-space cap per extraction worker
+    
+    # Real-time notifications
+    WS_PROGRESS_INTERVAL: float = 0.5  # Minimum seconds between progress broadcasts of an analysis run
+    WS_DIGEST_MAX_ITEMS: int = 25  # Rescued candidates / bias alerts per digest message
+    
+    # Dashboard
+    HOME_READ_TIMEOUT: float = 3.0  # Per-read timeout for the home page fan-out
+    HOME_CACHE_TTL: float = 2.0  # Seconds a home page response is shared between pollers
+    ALERT_TTL_DAYS: int = 30  # Days a superseded alert is kept before compaction
+    
     # Monitoring
     SENTRY_DSN: Optional[str] = None
     LOG_LEVEL: str = "INFO"
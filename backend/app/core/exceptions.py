@@ -27,6 +27,18 @@ class BadRequestException(AppException):
         super().__init__(message, status_code=400)
 
 
+class PayloadTooLargeException(AppException):
+    """Request body or upload too large exception"""
+    def __init__(self, message: str = "Payload too large"):
+        super().__init__(message, status_code=413)
+
+
+class ServiceUnavailableException(AppException):
+    """Temporarily overloaded or unavailable exception"""
+    def __init__(self, message: str = "Service unavailable"):
+        super().__init__(message, status_code=503)
+
+
 class UnauthorizedException(AppException):
     """Unauthorized exception"""
     def __init__(self, message: str = "Unauthorized"):
@@ -0,0 +1,62 @@
+"""
+Event loop lag monitoring
+
+A probe task sleeps for a fixed interval and records how late it wakes up.
+Any blocking call on the event loop shows up directly as lag.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+class EventLoopLagMonitor:
+    """Measure how long the event loop is blocked between scheduled wake-ups"""
+
+    def __init__(self, interval: float, warn_ms: float, window: int = 240):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self._samples = deque(maxlen=window)
+        self._max_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the probe task on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._probe())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _probe(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+            self._samples.append(lag_ms)
+            self._max_ms = max(self._max_ms, lag_ms)
+            if lag_ms > self.warn_ms:
+                logger.warning(f"Event loop blocked for {lag_ms:.0f}ms")
+
+    def stats(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0, "last_ms": 0.0, "mean_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "samples": len(samples),
+            "last_ms": round(self._samples[-1], 2),
+            "mean_ms": round(sum(samples) / len(samples), 2),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+            "max_ms": round(self._max_ms, 2)
+        }
+
+
+loop_monitor = EventLoopLagMonitor(
+    interval=settings.EVENT_LOOP_LAG_INTERVAL,
+    warn_ms=settings.EVENT_LOOP_LAG_WARN_MS
+)
@@ -0,0 +1,106 @@
+"""
+Model Registry - Lazily loaded ML models shared across the process
+
+Heavy libraries (sentence-transformers/torch, scikit-learn, spaCy) are imported
+inside the loaders registered here rather than at module import, so the API
+process starts serving liveness checks immediately. Each model is loaded once,
+on first use or by the startup warmup task, and the same instance is shared by
+every caller.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from app.core.blocking import run_blocking
+from app.core.config import settings
+from app.core.logging import logger
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelRegistry:
+    """Named, thread-safe, load-once model loaders with per-model status"""
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._required: Dict[str, bool] = {}
+        self._models: Dict[str, Any] = {}
+        self._status: Dict[str, dict] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, loader: Callable[[], Any], required: bool = True):
+        """
+        Register a loader
+
+        Args:
+            name: Model name
+            loader: Zero-argument callable that imports and builds the model
+            required: Whether the service is not ready until this model has loaded
+        """
+        self._loaders[name] = loader
+        self._required[name] = required
+        self._locks[name] = threading.Lock()
+        self._status[name] = {"state": PENDING, "seconds": None, "error": None}
+
+    def get(self, name: str) -> Optional[Any]:
+        """The model, loading it on first use; None if its loader failed"""
+        if name in self._models:
+            return self._models[name]
+        with self._locks[name]:
+            if name in self._models:
+                return self._models[name]
+            if self._status[name]["state"] == FAILED:
+                return None
+            self._status[name]["state"] = LOADING
+            started = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                self._status[name].update(
+                    state=FAILED, seconds=round(time.perf_counter() - started, 2), error=str(e)
+                )
+                logger.error(f"Failed to load model {name}: {str(e)}")
+                return None
+            self._models[name] = model
+            self._status[name].update(state=READY, seconds=round(time.perf_counter() - started, 2))
+            logger.info(f"Loaded model {name} in {self._status[name]['seconds']}s")
+            return model
+
+    def loaded(self, name: str) -> bool:
+        return name in self._models
+
+    async def warmup(self, names: Optional[Iterable[str]] = None):
+        """Load models one after another on the blocking pool, without holding up the event loop"""
+        for name in names or list(self._loaders):
+            await run_blocking(self.get, name)
+
+    def ready(self) -> bool:
+        """True once every required model has finished loading (successfully or not)"""
+        return all(
+            self._status[name]["state"] in (READY, FAILED)
+            for name, required in self._required.items() if required
+        )
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            name: {**status, "required": self._required[name]}
+            for name, status in self._status.items()
+        }
+
+
+def _load_sentence_transformer():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(settings.SENTENCE_MODEL_NAME)
+
+
+def _load_spacy():
+    from cv_file_processor import get_nlp
+    return get_nlp()
+
+
+models = ModelRegistry()
+models.register("sentence_transformer", _load_sentence_transformer)
+models.register("spacy", _load_spacy, required=False)
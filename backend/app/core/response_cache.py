@@ -0,0 +1,54 @@
+"""
+Short-TTL in-process response cache with single-flight loading
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlightCache:
+    """Share one in-flight load and its result between concurrent callers of the same key"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for ``key`` or run ``loader`` once for all waiters
+
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            # The load runs in its own task, so a caller that is cancelled (e.g. the
+            # client disconnected) stops waiting without cancelling it for the others
+            task = asyncio.ensure_future(self._load(key, loader))
+            # Mark the error retrieved in case every caller has gone away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self._entries[key] = (time.monotonic(), value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, key: str = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -0,0 +1,144 @@
+"""
+Alert Store - Idempotent, keyed storage for bias and rescue alerts
+
+Alerts are written under deterministic document ids (alert type plus the
+candidate they concern, or the type alone for run-level alerts), so re-running
+an analysis updates alerts in place instead of appending duplicates. Alerts a
+run no longer produces are deactivated and stamped with ``expiresAt``; expired
+alerts are deleted by ``compact`` (a Firestore TTL policy on ``expiresAt`` can
+do the same server-side). Reads only ever touch ``active == True`` documents.
+"""
+import hashlib
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from app.core.logging import logger
+from app.storage.base import FieldFilter
+
+
+class AlertStore:
+    """Upsert, supersede and compact alerts in the ``alerts`` collection"""
+
+    COLLECTION = "alerts"
+    # Firestore allows 500 writes per batch
+    BATCH_SIZE = 400
+
+    def __init__(self, db, ttl_days: int = 30):
+        self.db = db
+        self.ttl = timedelta(days=ttl_days)
+
+    @staticmethod
+    def key(alert_type: str, subject: Optional[str] = None) -> str:
+        """Deterministic document id for an alert type and optional subject (candidate id)"""
+        raw = f"{alert_type}__{subject}" if subject else str(alert_type)
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", raw)[:120]
+        if safe != raw:
+            # Keep sanitized keys unique
+            safe = f"{safe}_{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:8]}"
+        return safe
+
+    def _collection(self):
+        return self.db.collection(self.COLLECTION)
+
+    def _commit_in_chunks(self, writes: List[tuple]):
+        for start in range(0, len(writes), self.BATCH_SIZE):
+            batch = self.db.batch()
+            for op, ref, data in writes[start:start + self.BATCH_SIZE]:
+                if op == "set":
+                    batch.set(ref, data)
+                elif op == "update":
+                    batch.update(ref, data)
+                else:
+                    batch.delete(ref)
+            batch.commit()
+
+    def get_active(self, types: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Active alerts, optionally restricted to some types
+
+        Args:
+            types: Alert types to return (default: all)
+
+        Returns:
+            Alert dicts with their document id under ``id``
+        """
+        query = self._collection().where(filter=FieldFilter("active", "==", True))
+        types = list(types or [])
+        if len(types) == 1:
+            query = query.where(filter=FieldFilter("type", "==", types[0]))
+        alerts = []
+        for doc in query.stream():
+            alert = doc.to_dict() or {}
+            if types and alert.get("type") not in types:
+                continue
+            alert.setdefault("id", doc.id)
+            alerts.append(alert)
+        return alerts
+
+    def upsert_many(self, alerts: List[Dict], run_id: str, supersede: Iterable[str] = ()) -> List[Dict]:
+        """
+        Write a run's alerts in batches and deactivate the ones it superseded
+
+        Args:
+            alerts: Alert dicts; each needs ``type`` and may carry ``key`` or ``candidate_id``
+            run_id: Identifier of the analysis run producing the alerts
+            supersede: Alert types this run owns; active alerts of these types that the
+                run did not produce are deactivated
+
+        Returns:
+            The stored alerts, each with its deterministic ``id``
+        """
+        supersede = set(supersede)
+        now = datetime.now()
+        existing = {alert["id"]: alert for alert in self.get_active(supersede)} if supersede else {}
+
+        writes = []
+        stored = []
+        for alert in alerts:
+            alert_id = alert.get("key") or self.key(alert["type"], alert.get("candidate_id"))
+            previous = existing.pop(alert_id, None)
+            record = {
+                **alert,
+                "id": alert_id,
+                "key": alert_id,
+                "runId": run_id,
+                "active": True,
+                "created_at": (previous or {}).get("created_at") or alert.get("created_at") or now,
+                "updated_at": now,
+                "expiresAt": None
+            }
+            writes.append(("set", self._collection().document(alert_id), record))
+            stored.append(record)
+
+        # Whatever is still in ``existing`` was not reproduced by this run
+        for alert_id in existing:
+            writes.append(("update", self._collection().document(alert_id), {
+                "active": False,
+                "supersededBy": run_id,
+                "deactivatedAt": now,
+                "expiresAt": now + self.ttl
+            }))
+
+        self._commit_in_chunks(writes)
+        if existing:
+            logger.info(f"Deactivated {len(existing)} superseded alerts (run {run_id})")
+        self.compact()
+        return stored
+
+    def compact(self) -> int:
+        """Delete deactivated alerts whose TTL has passed"""
+        try:
+            expired = list(
+                self._collection()
+                .where(filter=FieldFilter("expiresAt", "<", datetime.now()))
+                .limit(self.BATCH_SIZE)
+                .stream()
+            )
+        except Exception as e:
+            logger.warning(f"Alert compaction skipped: {str(e)}")
+            return 0
+        self._commit_in_chunks([("delete", doc.reference, None) for doc in expired])
+        if expired:
+            logger.info(f"Compacted {len(expired)} expired alerts")
+        return len(expired)
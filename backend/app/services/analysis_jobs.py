@@ -0,0 +1,211 @@
+"""
+Analysis Jobs - Single-flight registry of batch analysis runs
+
+At most one batch analysis runs at a time: starting one while another is in
+flight returns the running job instead of launching an overlapping run that
+would race on the same CV documents. Each job reports its phase,
+processed/total count and an ETA from memory (the run updates them from its
+worker thread), can be cancelled cooperatively (the run checks for it between
+candidates and phases), and is recorded in ``analysis_runs`` with its total and
+per-phase durations when it ends.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.blocking import run_blocking
+from app.core.logging import logger
+from app.utils.ids import new_id
+
+
+class AnalysisCancelled(Exception):
+    """Raised inside a run once cancellation has been requested"""
+
+
+class AnalysisJob:
+    """Progress of one analysis run"""
+
+    def __init__(self, kind: str):
+        self.job_id = new_id("ANL")
+        self.kind = kind
+        self.state = "queued"
+        self.phase: Optional[str] = None
+        self.processed = 0
+        self.total: Optional[int] = None
+        self.error: Optional[str] = None
+        self.result: Dict = {}
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.phase_seconds: Dict[str, float] = {}
+        self.cancellable = True
+        self._cancel = threading.Event()
+        self._started: Optional[float] = None
+        self._phase_started: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("completed", "failed", "cancelled")
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def set_phase(self, phase: str, total: Optional[int] = None, cancellable: bool = True):
+        """
+        Enter the next phase of the run
+
+        Args:
+            phase: Phase name shown in the status
+            total: Units of work in the phase, when known (enables progress and ETA)
+            cancellable: Whether the run may still stop during this phase; once
+                results are being written a run finishes the phase instead
+        """
+        self._close_phase()
+        self.check_cancelled()
+        self.phase = phase
+        self.total = total
+        self.processed = 0
+        self.cancellable = cancellable
+        self._phase_started = time.monotonic()
+
+    def _close_phase(self):
+        if self.phase is not None and self._phase_started is not None:
+            self.phase_seconds[self.phase] = round(time.monotonic() - self._phase_started, 3)
+
+    def advance(self, count: int = 1):
+        """Count finished units of the current phase (and stop here if cancelled)"""
+        self.processed += count
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self.cancellable and self._cancel.is_set():
+            raise AnalysisCancelled()
+
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining time of the current phase at its average rate so far"""
+        if not self.total or not self.processed or self._phase_started is None or self.done:
+            return None
+        elapsed = time.monotonic() - self._phase_started
+        return round(elapsed / self.processed * (self.total - self.processed), 1)
+
+    def duration_seconds(self) -> Optional[float]:
+        if self._started is None:
+            return None
+        end = self.finished_at.timestamp() if self.finished_at else time.time()
+        return round(end - self._started, 3)
+
+    def to_dict(self) -> Dict:
+        return {
+            "jobId": self.job_id,
+            "kind": self.kind,
+            "state": self.state,
+            "phase": self.phase,
+            "processed": self.processed,
+            "total": self.total,
+            "etaSeconds": self.eta_seconds(),
+            "cancelRequested": self.cancel_requested,
+            "error": self.error,
+            "result": self.result,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "durationSeconds": self.duration_seconds(),
+            "phaseSeconds": dict(self.phase_seconds)
+        }
+
+
+class AnalysisJobManager:
+    """Run batch analyses one at a time, coalescing duplicate start requests"""
+
+    COLLECTION = "analysis_runs"
+    # Finished jobs kept in memory for status requests
+    RETAINED = 50
+
+    def __init__(self, db=None):
+        self.db = db
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._current: Optional[AnalysisJob] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def current(self) -> Optional[AnalysisJob]:
+        """The running job, or None"""
+        if self._current is not None and not self._current.done:
+            return self._current
+        return None
+
+    def start(self, runner: Callable[[AnalysisJob], Awaitable[Optional[Dict]]],
+              kind: str = "batch") -> Tuple[AnalysisJob, bool]:
+        """
+        Start a run unless one is already in flight
+
+        Args:
+            runner: Coroutine function performing the run; it reports progress on
+                the job it is given and may return a summary stored as ``result``
+            kind: Label recorded with the run
+
+        Returns:
+            (job, created): the new job, or the running one with created=False
+        """
+        running = self.current
+        if running is not None:
+            return running, False
+        job = AnalysisJob(kind)
+        self._current = job
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.RETAINED:
+            self._jobs.popitem(last=False)
+        self._task = asyncio.create_task(self._run(job, runner))
+        return job, True
+
+    async def _run(self, job: AnalysisJob, runner: Callable[[AnalysisJob], Awaitable[Optional[Dict]]]):
+        job.state = "running"
+        job.started_at = datetime.now()
+        job._started = time.time()
+        try:
+            job.result = await runner(job) or {}
+            job.state = "completed"
+        except AnalysisCancelled:
+            job.state = "cancelled"
+        except Exception as e:
+            logger.error(f"Analysis job {job.job_id} failed: {str(e)}")
+            job.state = "failed"
+            job.error = str(e)
+        finally:
+            job._close_phase()
+            job.finished_at = datetime.now()
+            logger.info(f"Analysis job {job.job_id} {job.state} in {job.duration_seconds():.1f}s")
+            await self._record(job)
+
+    async def _record(self, job: AnalysisJob):
+        if self.db is None:
+            return
+        record = job.to_dict()
+        record.pop("etaSeconds")
+        try:
+            await run_blocking(self.db.collection(self.COLLECTION).document(job.job_id).set, record)
+        except Exception as e:
+            logger.warning(f"Could not record analysis job {job.job_id}: {str(e)}")
+
+    def get(self, job_id: Optional[str] = None) -> Optional[AnalysisJob]:
+        """A job by id; without an id the running job, else the most recent one"""
+        if job_id is not None:
+            return self._jobs.get(job_id)
+        if self.current is not None:
+            return self.current
+        return next(reversed(self._jobs.values()), None)
+
+    def cancel(self, job_id: str) -> Optional[AnalysisJob]:
+        """Ask a running job to stop at its next checkpoint; None if the job is unknown"""
+        job = self._jobs.get(job_id)
+        if job is not None and not job.done:
+            job._cancel.set()
+        return job
+
+    def history(self) -> List[Dict]:
+        """Finished jobs, most recent first"""
+        return [job.to_dict() for job in reversed(self._jobs.values()) if job.done]
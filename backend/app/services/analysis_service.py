@@ -3,31 +3,31 @@ Analysis Service - ML-powered CV analysis and bias detection
 """
 from typing import List, Dict, Optional
 from datetime import datetime
+from app.core.blocking import run_blocking
+from app.core.config import settings
 from app.core.logging import logger
 from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.models import models
 from app.services.cv_service import CVService
+from app.services.job_profile import JobProfile, job_profiles
 from firebase_service import FirebaseService
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 
 
 class AnalysisService:
     """Service for CV analysis and bias detection"""
     
+    # CVs per bulk result write (each costs up to three writes of the 500 a batch allows)
+    WRITE_BATCH_SIZE = 150
+    
     def __init__(self):
         self.cv_service = CVService()
         self.firebase = FirebaseService
-        self.model = None
-        self._load_model()
     
-    def _load_model(self):
-        """Load the sentence transformer model"""
-        try:
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("Loaded sentence transformer model")
-        except Exception as e:
-            logger.error(f"Failed to load model: {str(e)}")
+    @property
+    def model(self):
+        """Shared sentence transformer, loaded on first use (None if it failed to load)"""
+        return models.get("sentence_transformer")
     
     async def analyze_cv(self, candidate_id: str, job_description: str) -> Dict:
         """
@@ -47,9 +47,10 @@ class AnalysisService:
             # Extract text from CV
             cv_text = self._extract_cv_text(cv)
             
-            # Calculate scores
-            ats_score = self._calculate_ats_score(cv_text, job_description)
-            semantic_score = self._calculate_semantic_score(cv_text, job_description)
+            # Calculate scores against the compiled job profile (built once per description)
+            profile = await run_blocking(job_profiles.get, job_description)
+            ats_score = self._calculate_ats_score(cv_text, profile)
+            semantic_score = await run_blocking(self._calculate_semantic_score, cv_text, profile)
             bias_score = self._detect_bias(cv.model_dump())
             
             # Determine recommendation
@@ -67,7 +68,7 @@ class AnalysisService:
                 "analyzedAt": datetime.now().isoformat()
             }
             
-            await self.cv_service.update_cv(candidate_id, analysis_data)
+            await run_blocking(self.firebase.update_cv, candidate_id, analysis_data)
             
             logger.info(f"Analyzed CV: {candidate_id}")
             
@@ -94,6 +95,11 @@ class AnalysisService:
         """
         Analyze multiple CVs in batch
         
+        Each CV is read once, the job description is encoded once and the CV
+        texts in batches, and the results are written in bulk. A CV that cannot
+        be found, scored or saved is listed under ``failed``; the rest of the
+        batch still completes.
+        
         Args:
             job_description: Job description to match against
             candidate_ids: Optional list of specific candidate IDs
@@ -103,32 +109,85 @@ class AnalysisService:
         """
         try:
             # Get CVs to analyze
+            failed = []
             if candidate_ids:
-                cvs = [await self.cv_service.get_cv(cid) for cid in candidate_ids]
+                found = await run_blocking(self.firebase.get_cvs_by_ids, candidate_ids)
+                cvs = []
+                for cid in dict.fromkeys(candidate_ids):
+                    if cid in found:
+                        cvs.append(found[cid])
+                    else:
+                        failed.append({"candidateId": cid, "error": f"CV not found: {cid}"})
             else:
-                cvs = await self.cv_service.get_all_cvs(limit=1000)
+                cvs = (await run_blocking(self.firebase.get_all_cvs))[:1000]
             
-            results = []
-            rescued = []
+            texts = [self._extract_cv_text(cv) for cv in cvs]
+            profile = await run_blocking(job_profiles.get, job_description)
+            ats_scores = [self._calculate_ats_score(text, profile) for text in texts]
+            semantic_scores = await run_blocking(self._calculate_semantic_scores, texts, profile)
             
-            for cv in cvs:
+            analyzed_at = datetime.now().isoformat()
+            scored = []
+            for cv, ats_score, semantic_score in zip(cvs, ats_scores, semantic_scores):
+                candidate_id = cv.get('candidateId') or cv['id']
                 try:
-                    result = await self.analyze_cv(cv.candidateId, job_description)
-                    results.append(result)
-                    
-                    # Check if candidate should be rescued
-                    if self._should_rescue(result):
-                        rescued.append(result)
-                        
+                    bias_score = self._detect_bias(cv)
+                    recommendation = self._generate_recommendation(ats_score, semantic_score, bias_score)
                 except Exception as e:
-                    logger.error(f"Failed to analyze {cv.candidateId}: {str(e)}")
+                    failed.append({"candidateId": candidate_id, "error": str(e)})
                     continue
+                scored.append((cv, {
+                    "candidateId": candidate_id,
+                    "atsScore": ats_score,
+                    "semanticScore": semantic_score,
+                    "biasScore": bias_score,
+                    "recommendation": recommendation,
+                    "status": "completed"
+                }))
+            
+            # Update CVs with analysis results, one write batch per chunk
+            results = []
+            for start in range(0, len(scored), self.WRITE_BATCH_SIZE):
+                chunk = scored[start:start + self.WRITE_BATCH_SIZE]
+                updates = {
+                    cv['id']: {
+                        "analyzed": True,
+                        "atsScore": result["atsScore"],
+                        "semanticScore": result["semanticScore"],
+                        "biasScore": result["biasScore"],
+                        "recommendation": result["recommendation"],
+                        "analyzedAt": analyzed_at
+                    }
+                    for cv, result in chunk
+                }
+                try:
+                    missing = await run_blocking(
+                        self.firebase.update_cvs_batch, updates, {cv['id']: cv for cv, _ in chunk}
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to save {len(chunk)} analysis results: {str(e)}")
+                    failed.extend({"candidateId": result["candidateId"], "error": f"Save failed: {str(e)}"}
+                                  for _, result in chunk)
+                    continue
+                missing = set(missing or ())
+                for cv, result in chunk:
+                    if cv['id'] in missing:
+                        failed.append({"candidateId": result["candidateId"], "error": "CV was deleted"})
+                    else:
+                        results.append(result)
+            
+            rescued = [result for result in results if self._should_rescue(result)]
+            for item in failed:
+                logger.error(f"Failed to analyze {item['candidateId']}: {item['error']}")
+            logger.info(f"Batch analyzed {len(results)} CVs ({len(failed)} failed)")
             
             return {
                 "total_analyzed": len(results),
                 "rescued_count": len(rescued),
                 "rescued_candidates": rescued,
                 "results": results,
+                "failed_count": len(failed),
+                "failed": failed,
                 "status": "completed"
             }
             
@@ -137,50 +196,55 @@ class AnalysisService:
             raise BadRequestException(f"Batch analysis failed: {str(e)}")
     
     def _extract_cv_text(self, cv) -> str:
-        """Extract text from CV for analysis"""
+        """Extract text from CV for analysis (a CVResponse or a stored CV dict)"""
+        if not isinstance(cv, dict):
+            cv = cv.model_dump()
+        skills = cv.get('skills') or []
         parts = [
-            cv.name,
-            cv.currentRole,
-            cv.education,
-            " ".join(cv.skills),
-            cv.location
+            cv.get('name'),
+            cv.get('currentRole'),
+            cv.get('education'),
+            " ".join(str(skill) for skill in skills) if isinstance(skills, list) else str(skills),
+            cv.get('location')
         ]
         return " ".join(filter(None, parts))
     
-    def _calculate_ats_score(self, cv_text: str, job_description: str) -> float:
+    def _calculate_ats_score(self, cv_text: str, profile: JobProfile) -> float:
         """Calculate ATS keyword matching score"""
-        # Extract keywords from job description
-        jd_keywords = set(job_description.lower().split())
-        cv_keywords = set(cv_text.lower().split())
-        
-        # Calculate overlap
-        matched = jd_keywords.intersection(cv_keywords)
-        
-        if not jd_keywords:
-            return 0.0
-        
-        score = (len(matched) / len(jd_keywords)) * 100
-        return round(min(score, 100), 2)
+        return profile.ats_score(cv_text)
     
-    def _calculate_semantic_score(self, cv_text: str, job_description: str) -> float:
+    def _calculate_semantic_score(self, cv_text: str, profile: JobProfile) -> float:
         """Calculate semantic similarity using sentence transformers"""
-        if not self.model:
+        if not self.model or profile.embedding is None:
             return 0.0
         
         try:
-            # Generate embeddings
-            cv_embedding = self.model.encode([cv_text])
-            jd_embedding = self.model.encode([job_description])
-            
-            # Calculate cosine similarity
-            similarity = cosine_similarity(cv_embedding, jd_embedding)[0][0]
-            
-            return round(float(similarity), 4)
+            cv_embedding = self.model.encode([cv_text], normalize_embeddings=True, show_progress_bar=False)[0]
+            return profile.semantic_score(cv_embedding)
             
         except Exception as e:
             logger.error(f"Semantic analysis failed: {str(e)}")
             return 0.0
     
+    def _calculate_semantic_scores(self, cv_texts: List[str], profile: JobProfile) -> List[float]:
+        """Cosine similarity of many CVs to one job profile, encoded in batches"""
+        if not self.model or profile.embedding is None or not cv_texts:
+            return [0.0] * len(cv_texts)
+        
+        try:
+            cv_embeddings = self.model.encode(
+                cv_texts,
+                batch_size=settings.ANALYSIS_ENCODE_BATCH_SIZE,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            similarities = np.asarray(cv_embeddings) @ np.asarray(profile.embedding)
+            return [round(float(similarity), 4) for similarity in similarities]
+            
+        except Exception as e:
+            logger.error(f"Semantic analysis failed: {str(e)}")
+            return [0.0] * len(cv_texts)
+    
     def _detect_bias(self, cv_data: Dict) -> float:
         """
         Detect potential bias in CV evaluation
@@ -0,0 +1,257 @@
+"""
+Blob Uploader - Background, retrying transfer of uploaded files to Storage
+
+Request handlers hand a file over and return without waiting for the bucket:
+the file is copied to BLOB_UPLOAD_DIR next to a small JSON manifest (blob
+path, documents to update), queued on a bounded asyncio queue and uploaded by
+a fixed number of workers. Large files go up as chunked, resumable uploads.
+Failed transfers are retried with exponential backoff; once a file is stored
+its URL is written as ``fileUrl`` to every document that referenced it.
+Transfers still staged when the process stops are picked up again on the next
+start. The local storage backends' directory bucket stands in for Cloud
+Storage in development and tests.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.blocking import run_blocking
+from app.core.logging import logger
+from app.utils.ids import new_id
+
+# Cloud Storage requires resumable upload chunks to be a multiple of 256 KiB
+CHUNK_ALIGNMENT = 256 * 1024
+
+
+class BlobUploader:
+    """Stage files locally and upload them to Storage on a pool of background workers"""
+
+    def __init__(self, db, bucket, directory: str, workers: int = 4, queue_size: int = 200,
+                 max_attempts: int = 5, backoff_seconds: float = 1.0,
+                 chunk_size: int = 8 * 1024 * 1024):
+        self.db = db
+        self.bucket = bucket
+        self.directory = directory
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.chunk_size = max(CHUNK_ALIGNMENT, chunk_size // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT)
+        self.queue: Optional[asyncio.Queue] = None
+        # blob path -> task still waiting or uploading, so identical files share one transfer
+        self._pending: Dict[str, dict] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._busy = 0
+        self._uploaded = 0
+        self._failed = 0
+        self._retries = 0
+        self._bytes = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Start the upload workers and re-queue transfers staged by a previous run"""
+        if self.running or self.bucket is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._resume()))
+        logger.info("Blob uploader started")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Staged files and manifests stay on disk and are re-queued on the next start
+        self._pending.clear()
+
+    def _manifest_path(self, task: dict) -> str:
+        return os.path.join(self.directory, f"{task['taskId']}.json")
+
+    def _save_manifest(self, task: dict):
+        path = self._manifest_path(task)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(task, f)
+        os.replace(tmp_path, path)
+
+    def _discard(self, task: dict):
+        for path in (task["path"], self._manifest_path(task)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    async def enqueue(self, upload, blob_path: str,
+                      targets: Iterable[Tuple[str, str]] = ()) -> bool:
+        """
+        Queue a file for upload
+
+        The file is staged before this returns; the caller may close ``upload``
+        afterwards. Waits while the queue is full.
+
+        Args:
+            upload: SpooledUpload or StoredUpload (provides ``copy_to``, ``filename``,
+                ``content_type`` and ``size``)
+            blob_path: Destination path in the bucket
+            targets: (collection, document id) pairs to receive ``fileUrl`` once stored
+
+        Returns:
+            False when no bucket is configured (nothing is queued)
+        """
+        if self.bucket is None:
+            return False
+        if not self.running:
+            await self.start()
+        targets = [list(target) for target in targets]
+
+        pending = self._pending.get(blob_path)
+        if pending is not None:
+            pending["targets"].extend(t for t in targets if t not in pending["targets"])
+            await run_blocking(self._save_manifest, pending)
+            return True
+
+        task_id = new_id("BLOB")
+        task = {
+            "taskId": task_id,
+            "blobPath": blob_path,
+            "path": os.path.join(self.directory, f"{task_id}{os.path.splitext(blob_path)[1]}"),
+            "fileName": upload.filename,
+            "contentType": upload.content_type,
+            "size": upload.size,
+            "targets": targets,
+            "attempts": 0,
+            "createdAt": datetime.now().isoformat()
+        }
+        self._pending[blob_path] = task
+        try:
+            await run_blocking(upload.copy_to, task["path"])
+            await run_blocking(self._save_manifest, task)
+        except Exception:
+            self._pending.pop(blob_path, None)
+            await run_blocking(self._discard, task)
+            raise
+        # Back-pressure: waits while the workers are behind
+        await self.queue.put(task)
+        return True
+
+    async def _resume(self):
+        try:
+            names = await run_blocking(os.listdir, self.directory)
+        except OSError as e:
+            logger.error(f"Could not list staged blob uploads: {str(e)}")
+            return
+        for name in sorted(names):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    task = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable blob upload manifest {name}: {str(e)}")
+                continue
+            if task["blobPath"] in self._pending:
+                continue
+            if not os.path.exists(task["path"]):
+                await run_blocking(self._discard, task)
+                continue
+            logger.info(f"Resuming upload of {task['fileName']} to {task['blobPath']}")
+            self._pending[task["blobPath"]] = task
+            await self.queue.put(task)
+
+    def _upload(self, task: dict) -> str:
+        # Files above one chunk go up as a resumable upload, one chunk per request,
+        # so a dropped connection only costs the current chunk
+        chunk_size = self.chunk_size if task["size"] > self.chunk_size else None
+        blob = self.bucket.blob(task["blobPath"], chunk_size=chunk_size)
+        blob.upload_from_filename(task["path"], content_type=task["contentType"])
+        return blob.public_url
+
+    def _record(self, targets: List[List[str]], data: Dict):
+        for collection, doc_id in targets:
+            try:
+                self.db.collection(collection).document(doc_id).update(data)
+            except Exception as e:
+                # The document may have been deleted while the file was uploading
+                logger.warning(f"Could not update {collection}/{doc_id} after upload: {str(e)}")
+
+    def _delay(self, attempt: int) -> float:
+        return self.backoff_seconds * (2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+    async def _process(self, task: dict):
+        while True:
+            task["attempts"] += 1
+            try:
+                file_url = await run_blocking(self._upload, task)
+                break
+            except Exception as e:
+                if task["attempts"] >= self.max_attempts:
+                    logger.error(
+                        f"Giving up on uploading {task['fileName']} after {task['attempts']} attempts: {str(e)}"
+                    )
+                    self._failed += 1
+                    self._pending.pop(task["blobPath"], None)
+                    await run_blocking(self._record, task["targets"], {"fileUploadError": str(e)})
+                    await run_blocking(self._discard, task)
+                    return
+                delay = self._delay(task["attempts"])
+                logger.warning(
+                    f"Upload of {task['fileName']} failed (attempt {task['attempts']}), "
+                    f"retrying in {delay:.1f}s: {str(e)}"
+                )
+                self._retries += 1
+                await run_blocking(self._save_manifest, task)
+                await asyncio.sleep(delay)
+
+        self._uploaded += 1
+        self._bytes += task["size"] or 0
+        # Later enqueues of the same blob start a new task once this one stops taking targets
+        self._pending.pop(task["blobPath"], None)
+        await run_blocking(self._record, task["targets"], {"fileUrl": file_url})
+        await run_blocking(self._discard, task)
+
+    async def _worker(self):
+        while True:
+            task = await self.queue.get()
+            self._busy += 1
+            started = time.monotonic()
+            try:
+                await self._process(task)
+                logger.debug(f"Stored {task['blobPath']} in {time.monotonic() - started:.2f}s")
+            except Exception as e:
+                # Unexpected (staging or bookkeeping) errors leave the task staged for the next start
+                logger.error(f"Blob upload of {task['blobPath']} failed: {str(e)}")
+                self._pending.pop(task["blobPath"], None)
+            finally:
+                self._busy -= 1
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until every queued transfer has finished (mainly for scripts and tests)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(0.05)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "queue_capacity": self.queue_size,
+            "pending": len(self._pending),
+            "busy": self._busy,
+            "uploaded": self._uploaded,
+            "failed": self._failed,
+            "retries": self._retries,
+            "bytes_uploaded": self._bytes,
+            "chunk_size": self.chunk_size
+        }
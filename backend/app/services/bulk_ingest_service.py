@@ -0,0 +1,238 @@
+"""
+Bulk Ingest Service - Streaming NDJSON CV import
+
+Reads an NDJSON body (optionally gzip-compressed) chunk by chunk, validates
+each line against ``CVCreate`` and persists valid records through batched
+writes. Memory stays bounded by the batch size and the number of in-flight
+commits, not by the size of the import. Gzip bodies are inflated a bounded
+piece at a time and rejected once they inflate past BULK_MAX_INFLATED_MB.
+"""
+import asyncio
+import json
+import time
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.core.blocking import run_blocking
+from app.core.config import settings
+from app.core.exceptions import PayloadTooLargeException
+from app.core.logging import logger
+from app.models.cv import CVCreate, CVStatus
+from app.utils.ids import new_id
+from firebase_service import FirebaseService
+
+
+class BulkIngestTooLarge(PayloadTooLargeException):
+    """The body passed the inflate cap; ``report`` covers the lines imported before it"""
+    def __init__(self, message: str, report: Dict):
+        super().__init__(message)
+        self.report = report
+
+
+class BulkIngestService:
+    """Stream, validate and batch-persist NDJSON CV records"""
+
+    # Each CV costs one document write plus its lookup entries; stay under 500 writes per batch
+    BATCH_SIZE = 80
+    MAX_INFLIGHT_BATCHES = 4
+    MAX_LINE_BYTES = 1024 * 1024
+    GZIP_MAGIC = b"\x1f\x8b"
+    # Output size of one decompress step of a gzip body
+    INFLATE_CHUNK_BYTES = 256 * 1024
+
+    def __init__(self, include_ok: bool = True, max_inflated_bytes: Optional[int] = None):
+        self.include_ok = include_ok
+        self.max_inflated_bytes = max_inflated_bytes or settings.BULK_MAX_INFLATED_MB * 1024 * 1024
+        self._inflated_bytes = 0
+        self.results: List[Dict] = []
+        self.stats = {"records": 0, "created": 0, "failed": 0, "bytes": 0, "batches": 0}
+        self._batch: Dict[str, dict] = {}
+        self._batch_lines: Dict[str, int] = {}
+        self._inflight: set = set()
+        self._slots = asyncio.Semaphore(self.MAX_INFLIGHT_BATCHES)
+
+    @staticmethod
+    def _validation_message(error: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(str(p) for p in err.get('loc', ())) or 'record'}: {err.get('msg')}"
+            for err in error.errors()
+        )
+
+    def _record(self, result: Dict):
+        if result["status"] == "error":
+            self.stats["failed"] += 1
+            self.results.append(result)
+        else:
+            self.stats["created"] += 1
+            if self.include_ok:
+                self.results.append(result)
+
+    def _inflated(self, data: bytes) -> bytes:
+        self._inflated_bytes += len(data)
+        if self._inflated_bytes > self.max_inflated_bytes:
+            raise PayloadTooLargeException(
+                f"Decompressed body exceeds {self.max_inflated_bytes // (1024 * 1024)}MB"
+            )
+        return data
+
+    async def _decompressed(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        decompressor = None
+        first = True
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            self.stats["bytes"] += len(chunk)
+            if first:
+                first = False
+                if chunk[:2] == self.GZIP_MAGIC:
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if decompressor is None:
+                yield chunk
+                continue
+            # A small compressed chunk can inflate enormously; inflate it piecewise
+            while chunk:
+                data = decompressor.decompress(chunk, self.INFLATE_CHUNK_BYTES)
+                chunk = decompressor.unconsumed_tail
+                if data:
+                    yield self._inflated(data)
+        if decompressor is not None:
+            tail = decompressor.flush()
+            if tail:
+                yield self._inflated(tail)
+
+    async def _lines(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple]:
+        """Yield ``(line_no, bytes)``; an oversized line is yielded once as ``None`` and skipped"""
+        buffer = b""
+        line_no = 0
+        skipping = False
+        async for data in self._decompressed(chunks):
+            if skipping:
+                newline = data.find(b"\n")
+                if newline < 0:
+                    continue
+                data = data[newline + 1:]
+                skipping = False
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_no += 1
+                yield line_no, line if len(line) <= self.MAX_LINE_BYTES else None
+            if len(buffer) > self.MAX_LINE_BYTES:
+                line_no += 1
+                yield line_no, None
+                buffer = b""
+                skipping = True
+        if buffer.strip() and not skipping:
+            yield line_no + 1, buffer
+
+    def _parse(self, line_no: int, line: Optional[bytes]) -> Optional[dict]:
+        if line is None:
+            self.stats["records"] += 1
+            self._record({"line": line_no, "status": "error", "error": f"Line exceeds {self.MAX_LINE_BYTES} bytes"})
+            return None
+        line = line.strip()
+        if not line:
+            return None
+        self.stats["records"] += 1
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("record must be a JSON object")
+            cv = CVCreate.model_validate(record)
+        except ValidationError as e:
+            self._record({"line": line_no, "status": "error", "error": self._validation_message(e)})
+            return None
+        except ValueError as e:
+            self._record({"line": line_no, "status": "error", "error": f"Invalid JSON: {str(e)}"})
+            return None
+
+        candidate_id = new_id("CV")
+        cv_dict = cv.model_dump()
+        cv_dict.update({
+            "candidateId": candidate_id,
+            "status": CVStatus.PENDING.value,
+            "uploadedAt": datetime.now(),
+            "analyzed": False,
+            "source": "bulk_import"
+        })
+        self._batch[candidate_id] = cv_dict
+        self._batch_lines[candidate_id] = line_no
+        return cv_dict
+
+    async def _commit(self, batch: Dict[str, dict], lines: Dict[str, int]):
+        try:
+            await run_blocking(FirebaseService.add_cvs_batch, batch)
+            for candidate_id in batch:
+                self._record({"line": lines[candidate_id], "status": "created", "candidateId": candidate_id})
+        except Exception as e:
+            logger.error(f"Bulk ingest batch failed: {str(e)}")
+            for candidate_id in batch:
+                self._record({"line": lines[candidate_id], "status": "error", "error": f"Write failed: {str(e)}"})
+        finally:
+            self._slots.release()
+
+    async def _flush(self):
+        if not self._batch:
+            return
+        batch, lines = self._batch, self._batch_lines
+        self._batch, self._batch_lines = {}, {}
+        self.stats["batches"] += 1
+        # Back-pressure: wait for a commit slot before reading further
+        await self._slots.acquire()
+        task = asyncio.create_task(self._commit(batch, lines))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def ingest(self, chunks: AsyncIterator[bytes]) -> Dict:
+        """
+        Import every record of an NDJSON (or gzip NDJSON) byte stream
+
+        Args:
+            chunks: Async iterator over the raw request body
+
+        Returns:
+            Per-record results (sorted by line) and throughput stats
+
+        Raises:
+            BulkIngestTooLarge: A gzip body inflates past ``max_inflated_bytes``; the
+                lines before the cap are still written and reported on the exception
+        """
+        started = time.perf_counter()
+        too_large = None
+        try:
+            async for line_no, line in self._lines(chunks):
+                self._parse(line_no, line)
+                if len(self._batch) >= self.BATCH_SIZE:
+                    await self._flush()
+        except PayloadTooLargeException as e:
+            too_large = e
+        finally:
+            # Commits already started finish even if reading the body failed
+            try:
+                await self._flush()
+            finally:
+                if self._inflight:
+                    await asyncio.gather(*self._inflight)
+        await run_blocking(FirebaseService.metrics.refresh_if_stale)
+
+        elapsed = time.perf_counter() - started
+        self.results.sort(key=lambda r: r["line"])
+        logger.info(
+            f"Bulk ingest: {self.stats['created']} created, {self.stats['failed']} failed "
+            f"in {elapsed:.1f}s"
+        )
+        report = {
+            "results": self.results,
+            "stats": {
+                **self.stats,
+                "elapsed_seconds": round(elapsed, 3),
+                "records_per_second": round(self.stats["records"] / elapsed, 1) if elapsed else 0.0,
+                "mb_per_second": round(self.stats["bytes"] / elapsed / 1e6, 3) if elapsed else 0.0
+            }
+        }
+        if too_large is not None:
+            raise BulkIngestTooLarge(too_large.message, report) from too_large
+        return report
@@ -0,0 +1,250 @@
+"""
+Candidate Index - Identifier to CV document lookup table
+
+Every CV write keeps a small ``cv_lookup`` collection in sync, mapping each
+identifier a client may send (candidateId, userId + fileName, email, name) to
+the canonical ``cvs`` document id. Resolving a candidate is then two batched
+reads (lookup entries, then the CVs they point at) instead of a chain of
+collection queries. An entry that is missing, or that points at a CV which no
+longer carries the identifier, falls back to the field query and is repaired.
+The table is backfilled from the existing CVs by ``ensure_built`` at startup,
+never inside a request.
+"""
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.logging import logger
+from app.storage.base import FieldFilter
+
+
+class CandidateIndex:
+    """Maintain and query the identifier -> CV document id lookup collection"""
+
+    COLLECTION = "cv_lookup"
+    # Written once the lookup table has been backfilled from the existing CVs
+    META_DOC = "_meta"
+
+    # Identifiers that belong to exactly one CV; other keys may be shared and
+    # then point at the most recently created CV that carries them.
+    UNIQUE_KINDS = ("candidateId", "userFile")
+    # Resolution order when a request carries several identifiers
+    KIND_PRIORITY = ("candidateId", "userFile", "email", "name")
+    # CV fields matched by the fallback query for each kind
+    KIND_FIELDS = {
+        "candidateId": ("candidateId",),
+        "userFile": ("userId", "fileName"),
+        "email": ("email",),
+        "name": ("name",),
+    }
+    # Fallback matches compared to pick the most recently uploaded one
+    FALLBACK_LIMIT = 5
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def _normalize(value) -> str:
+        return str(value or "").strip()
+
+    @classmethod
+    def identifiers(
+        cls,
+        candidate_id: str = "",
+        user_id: str = "",
+        file_name: str = "",
+        email: str = "",
+        name: str = ""
+    ) -> List[Tuple[str, str]]:
+        """Lookup keys for the given identifiers, in resolution order"""
+        candidate_id = cls._normalize(candidate_id)
+        user_id = cls._normalize(user_id)
+        file_name = cls._normalize(file_name)
+        email = cls._normalize(email).lower()
+        name = cls._normalize(name).lower()
+
+        keys = []
+        if candidate_id:
+            keys.append(("candidateId", f"candidateId:{candidate_id}"))
+        if user_id and file_name:
+            keys.append(("userFile", f"userFile:{user_id}\x1f{file_name}"))
+        if email:
+            keys.append(("email", f"email:{email}"))
+        if name:
+            keys.append(("name", f"name:{name}"))
+        return keys
+
+    @classmethod
+    def keys_for(cls, cv: Optional[dict]) -> Dict[str, str]:
+        """Map of lookup key -> kind for a CV document"""
+        if not cv:
+            return {}
+        return {
+            key: kind
+            for kind, key in cls.identifiers(
+                candidate_id=cv.get("candidateId"),
+                user_id=cv.get("userId"),
+                file_name=cv.get("fileName"),
+                email=cv.get("email"),
+                name=cv.get("name")
+            )
+        }
+
+    def _ref(self, key: str):
+        # Identifiers may contain characters Firestore does not allow in ids
+        return self.db.collection(self.COLLECTION).document(hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def stage(self, writer, before: Optional[dict], after: Optional[dict], doc_id: str):
+        """
+        Add the lookup updates for one CV write to a transaction or batch
+
+        Args:
+            writer: Firestore transaction or write batch
+            before: Document data before the write (None when created)
+            after: Document data after the write (None when deleted)
+            doc_id: Id of the CV document
+        """
+        old_keys = self.keys_for(before)
+        new_keys = self.keys_for(after)
+
+        for key, kind in new_keys.items():
+            # Shared keys are only claimed when they first appear on this CV, so
+            # re-saving an old CV does not steal them from a newer upload.
+            if key in old_keys and kind not in self.UNIQUE_KINDS:
+                continue
+            writer.set(self._ref(key), {
+                "key": key,
+                "kind": kind,
+                "docId": doc_id,
+                "updatedAt": datetime.now()
+            })
+
+        leaving = [key for key in old_keys if key not in new_keys]
+        for key in leaving:
+            if old_keys[key] in self.UNIQUE_KINDS:
+                writer.delete(self._ref(key))
+        # A shared key may have moved on to a newer CV; only this CV's entry is
+        # removed. Read outside the transaction: a stale answer is repaired by
+        # the fallback query in ``resolve``.
+        shared = [self._ref(key) for key in leaving if old_keys[key] not in self.UNIQUE_KINDS]
+        for snap in self.db.get_all(shared) if shared else []:
+            if snap.exists and (snap.to_dict() or {}).get("docId") == doc_id:
+                writer.delete(snap.reference)
+
+    def resolve(self, doc_ids: Iterable[str] = (), **identifiers) -> Optional[str]:
+        """
+        Resolve the canonical CV document id
+
+        Two batched reads when the lookup entries are current; a missing or
+        stale entry costs one field query and is rewritten.
+
+        Args:
+            doc_ids: Candidate Firestore document ids to check directly
+            **identifiers: candidate_id, user_id, file_name, email, name
+
+        Returns:
+            The CV document id, or None when nothing matches
+        """
+        cvs = self.db.collection("cvs")
+        direct_refs = [cvs.document(doc_id) for doc_id in dict.fromkeys(doc_ids) if doc_id]
+        lookup_refs = [self._ref(key) for _, key in self.identifiers(**identifiers)]
+
+        snapshots = {snap.reference.path: snap for snap in self.db.get_all(direct_refs + lookup_refs)}
+
+        for ref in direct_refs:
+            snap = snapshots.get(ref.path)
+            if snap is not None and snap.exists:
+                return ref.id
+
+        entries = {}
+        for ref in lookup_refs:
+            snap = snapshots.get(ref.path)
+            if snap is not None and snap.exists:
+                entries[ref.id] = (snap.to_dict() or {}).get("docId")
+        targets = list(dict.fromkeys(doc_id for doc_id in entries.values() if doc_id))
+        cvs_by_id = {
+            snap.id: snap.to_dict() or {}
+            for snap in (self.db.get_all([cvs.document(doc_id) for doc_id in targets]) if targets else [])
+            if snap.exists
+        }
+
+        # Entries in priority order; one is trusted only while its CV still carries the key
+        for kind, key in self.identifiers(**identifiers):
+            doc_id = entries.get(self._ref(key).id)
+            if doc_id in cvs_by_id and key in self.keys_for(cvs_by_id[doc_id]):
+                return doc_id
+            doc_id = self._query(kind, identifiers)
+            if doc_id:
+                self._repair(key, kind, doc_id)
+                return doc_id
+        return None
+
+    def _query(self, kind: str, identifiers: Dict[str, str]) -> Optional[str]:
+        """Most recently uploaded CV whose fields match one identifier kind"""
+        values = {
+            "candidateId": self._normalize(identifiers.get("candidate_id")),
+            "userId": self._normalize(identifiers.get("user_id")),
+            "fileName": self._normalize(identifiers.get("file_name")),
+            "email": self._normalize(identifiers.get("email")),
+            "name": self._normalize(identifiers.get("name")),
+        }
+        query = self.db.collection("cvs")
+        for field in self.KIND_FIELDS[kind]:
+            query = query.where(filter=FieldFilter(field, "==", values[field]))
+        try:
+            matches = list(query.limit(self.FALLBACK_LIMIT).stream())
+        except Exception as e:
+            logger.warning(f"Candidate {kind} fallback lookup failed: {str(e)}")
+            return None
+        if not matches:
+            return None
+        newest = max(matches, key=lambda d: str((d.to_dict() or {}).get("uploadedAt") or ""))
+        return newest.id
+
+    def _repair(self, key: str, kind: str, doc_id: str):
+        try:
+            self._ref(key).set({"key": key, "kind": kind, "docId": doc_id, "updatedAt": datetime.now()})
+        except Exception as e:
+            logger.warning(f"Could not repair candidate lookup entry: {str(e)}")
+
+    def ensure_built(self) -> bool:
+        """
+        Backfill the lookup table once, if it predates the stored CVs
+
+        Blocking (a full scan on first run); called at startup.
+
+        Returns:
+            True when the table was rebuilt
+        """
+        meta = self.db.collection(self.COLLECTION).document(self.META_DOC).get()
+        if meta.exists:
+            return False
+        self.rebuild()
+        return True
+
+    def rebuild(self):
+        """Backfill the lookup collection from a full scan of the cvs collection"""
+        batch = self.db.batch()
+        pending = 0
+        count = 0
+        # Oldest first so shared keys end up pointing at the newest CV
+        docs = sorted(
+            self.db.collection("cvs").stream(),
+            key=lambda d: str((d.to_dict() or {}).get("uploadedAt") or "")
+        )
+        for doc in docs:
+            if doc.id.startswith("_"):
+                continue
+            self.stage(batch, None, doc.to_dict(), doc.id)
+            pending += len(self.keys_for(doc.to_dict()))
+            count += 1
+            if pending >= 400:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+        batch.set(
+            self.db.collection(self.COLLECTION).document(self.META_DOC),
+            {"rebuiltAt": datetime.now(), "cvs": count}
+        )
+        batch.commit()
+        logger.info(f"Rebuilt candidate lookup index from {count} CVs")
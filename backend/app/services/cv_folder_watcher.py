@@ -0,0 +1,335 @@
+"""
+CV Folder Watcher - Continuous ingestion of CVs dropped into a folder
+
+Watches the CV drop folder (inotify/FSEvents through ``watchdog`` when it is
+installed, periodic directory polling otherwise), debounces bursts of events
+per file until the file has stopped changing, and pushes each settled file
+through text extraction, field parsing and persistence on a bounded worker
+pool. When the pool's backlog is full, settled files stay pending and are
+dispatched once it drains, and a path is never processed twice at once.
+PDF/DOCX/TXT text comes from the sandboxed extraction workers; OCR of images
+and scanned PDFs runs tesseract out of process. Files are keyed by their
+path, so re-saving a CV updates the same candidate, and unchanged content
+(same SHA-256) is skipped.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.extraction_executor import extraction_executor
+from app.utils.text_extraction import SUPPORTED_EXTENSIONS
+from cv_file_processor import MIN_PAGE_TEXT_CHARS, CVFileProcessor, ExtractionFailed
+from firebase_service import FirebaseService
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+    WATCHDOG_AVAILABLE = False
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "CVFolderWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.dest_path)
+
+
+def create_watcher(folder: Optional[str] = None) -> "CVFolderWatcher":
+    """Build a watcher from settings"""
+    return CVFolderWatcher(
+        CVFileProcessor(folder or settings.CV_WATCH_FOLDER),
+        debounce_seconds=settings.CV_WATCH_DEBOUNCE_SECONDS,
+        workers=settings.CV_WATCH_WORKERS,
+        max_backlog=settings.CV_WATCH_MAX_BACKLOG,
+        poll_interval=settings.CV_WATCH_POLL_INTERVAL
+    )
+
+
+class CVFolderWatcher:
+    """Debounced, bounded-concurrency ingestion of new or modified CV files"""
+
+    def __init__(self, processor, debounce_seconds: float = 2.0, workers: int = 4,
+                 max_backlog: int = 1000, poll_interval: float = 5.0, window: int = 500):
+        self.processor = processor
+        self.folder = processor.cv_folder_path
+        self.debounce_seconds = debounce_seconds
+        self.workers = workers
+        self.max_backlog = max_backlog
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, dict] = {}  # path -> {"first": t, "last": t, "size": n}
+        self._queued = 0
+        # Paths dispatched and not yet finished; new events for them wait in _pending
+        self._inflight: Set[str] = set()
+        self._seen_hashes: Dict[str, str] = {}
+        self._poll_state: Dict[str, tuple] = {}
+        self._slots = threading.BoundedSemaphore(max_backlog)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._observer = None
+        self._threads = []
+        self._stop = threading.Event()
+        # Loop running the extraction executor's coroutines for the worker threads
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._owns_loop = False
+        self._extractions: Set[Future] = set()
+        self._lag_ms = deque(maxlen=window)
+        self._counts = {"events": 0, "processed": 0, "unchanged": 0, "failed": 0, "deferred": 0}
+        self.mode = None
+
+    def _is_candidate_file(self, path: str) -> bool:
+        name = os.path.basename(path)
+        if name.startswith('.') or name == 'README.md':
+            return False
+        return Path(name).suffix.lower() in self.processor.supported_formats
+
+    def notify(self, path: str):
+        """Record a create/modify event; the file is processed once it has been quiet for the debounce period"""
+        if not self._is_candidate_file(path):
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._counts["events"] += 1
+            entry = self._pending.get(path)
+            if entry is None:
+                self._pending[path] = {"first": now, "last": now, "size": None}
+            else:
+                entry["last"] = now
+
+    def _dispatch_ready(self):
+        now = time.monotonic()
+        ready = []
+        deferred = 0
+        with self._lock:
+            for path, entry in list(self._pending.items()):
+                if now - entry["last"] < self.debounce_seconds or path in self._inflight:
+                    continue
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    # Deleted or moved away before it settled
+                    del self._pending[path]
+                    continue
+                if size != entry["size"]:
+                    # Still being written: wait another debounce period
+                    entry["size"] = size
+                    entry["last"] = now
+                    continue
+                if not self._slots.acquire(blocking=False):
+                    # Backlog full: the file stays pending and is dispatched on a later pass
+                    deferred += 1
+                    continue
+                del self._pending[path]
+                self._inflight.add(path)
+                self._queued += 1
+                ready.append((path, entry["first"]))
+            self._counts["deferred"] += deferred
+
+        if deferred:
+            logger.debug(f"CV watcher backlog full ({self.max_backlog}); deferred {deferred} files")
+        for path, first_seen in ready:
+            self._pool.submit(self._process, path, first_seen)
+
+    def _dispatch_loop(self):
+        while not self._stop.wait(min(0.5, self.debounce_seconds / 2 or 0.5)):
+            try:
+                self._dispatch_ready()
+            except Exception as e:
+                logger.error(f"CV watcher dispatch failed: {str(e)}")
+
+    def _poll_loop(self):
+        """Fallback when watchdog is unavailable: diff (size, mtime) of the folder listing"""
+        while not self._stop.is_set():
+            try:
+                seen = {}
+                with os.scandir(self.folder) as entries:
+                    for entry in entries:
+                        if entry.is_file() and self._is_candidate_file(entry.path):
+                            stat = entry.stat()
+                            seen[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                            if self._poll_state.get(entry.path) != seen[entry.path]:
+                                self.notify(entry.path)
+                self._poll_state = seen
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"CV watcher poll failed: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+    @staticmethod
+    def _doc_id(path: str) -> str:
+        return f"WATCH_{hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:20]}"
+
+    def _extract_text(self, path: str) -> str:
+        """Document text through the extraction workers, OCR for images and scanned PDFs"""
+        ext = Path(path).suffix.lower()
+        try:
+            if ext in SUPPORTED_EXTENSIONS:
+                future = asyncio.run_coroutine_threadsafe(
+                    extraction_executor.extract(path, os.path.basename(path)), self._loop
+                )
+                with self._lock:
+                    self._extractions.add(future)
+                try:
+                    text = future.result()
+                finally:
+                    with self._lock:
+                        self._extractions.discard(future)
+                if ext != '.pdf' or len(text.strip()) >= MIN_PAGE_TEXT_CHARS:
+                    return text
+                return self.processor.extract_text_from_pdf_ocr(path)
+            return self.processor.extract_text_from_image(path)
+        except ExtractionFailed as e:
+            return e.text
+
+    def _process(self, path: str, first_seen: float):
+        with self._lock:
+            self._queued -= 1
+        try:
+            file_hash = self.processor._file_hash(path)
+            doc_id = self._doc_id(path)
+            if path not in self._seen_hashes:
+                # First sight since start: the file may have been ingested by an earlier run
+                existing = FirebaseService.db.collection('cvs').document(doc_id).get()
+                if existing.exists:
+                    self._seen_hashes[path] = (existing.to_dict() or {}).get("fileSha256")
+            if self._seen_hashes.get(path) == file_hash:
+                with self._lock:
+                    self._counts["unchanged"] += 1
+                return
+
+            text_content = self._extract_text(path)
+            filename = os.path.basename(path)
+            cv_data = self.processor.extract_cv_data_with_ml(text_content, filename)
+            FirebaseService.set_cv(doc_id, {
+                **cv_data,
+                "candidateId": doc_id,
+                "fileName": filename,
+                "file_type": Path(filename).suffix.lower(),
+                "fileSha256": file_hash,
+                "extractedText": text_content,
+                "status": "under_review",
+                "analyzed": False,
+                "uploadedAt": datetime.now(),
+                "source": "folder_watch"
+            }, merge=True)
+
+            self._seen_hashes[path] = file_hash
+            with self._lock:
+                self._counts["processed"] += 1
+                self._lag_ms.append((time.monotonic() - first_seen) * 1000)
+            logger.info(f"CV watcher ingested {filename} as {doc_id}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            with self._lock:
+                self._counts["failed"] += 1
+            logger.error(f"CV watcher failed on {path}: {str(e)}")
+        finally:
+            with self._lock:
+                self._inflight.discard(path)
+            self._slots.release()
+
+    def _start_thread(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self):
+        """Start watching; existing files are picked up by an initial sweep"""
+        if self._pool is not None:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        self._stop.clear()
+        try:
+            self._loop = asyncio.get_running_loop()
+            self._owns_loop = False
+        except RuntimeError:
+            # Standalone (scripts): run the extraction coroutines on a loop of our own
+            self._loop = asyncio.new_event_loop()
+            self._owns_loop = True
+            self._start_thread(self._loop.run_forever, "cv-watch-loop")
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cv-watch")
+
+        if WATCHDOG_AVAILABLE:
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), self.folder, recursive=False)
+            self._observer.start()
+            self.mode = "watchdog"
+            # Files dropped while the service was down
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        self.notify(entry.path)
+        else:
+            self.mode = "polling"
+            self._start_thread(self._poll_loop, "cv-watch-poll")
+
+        self._start_thread(self._dispatch_loop, "cv-watch-dispatch")
+        logger.info(f"CV watcher started on {self.folder} ({self.mode})")
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            # Unblock workers waiting on extractions the loop may never finish
+            for future in self._extractions:
+                future.cancel()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        if self._owns_loop and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._owns_loop and self._loop is not None and not self._loop.is_running():
+            self._loop.close()
+        self._loop = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            oldest = min((entry["first"] for entry in self._pending.values()), default=None)
+            lags = sorted(self._lag_ms)
+            return {
+                **self._counts,
+                "mode": self.mode,
+                "running": self._pool is not None,
+                "pending_debounce": len(self._pending),
+                "queued": self._queued,
+                "backlog": len(self._pending) + self._queued,
+                "oldest_pending_seconds": round(now - oldest, 2) if oldest is not None else 0.0,
+                "lag_ms": {
+                    "mean": round(sum(lags) / len(lags), 1) if lags else 0.0,
+                    "p95": round(lags[min(len(lags) - 1, int(len(lags) * 0.95))], 1) if lags else 0.0,
+                    "max": round(lags[-1], 1) if lags else 0.0
+                }
+            }
@@ -6,14 +6,14 @@ from datetime import datetime
 from app.models.cv import CVCreate, CVUpdate, CVResponse, CVStatus
 from app.core.exceptions import NotFoundException, BadRequestException
 from app.core.logging import logger
-from firebase_service import FirebaseService
+from async_firebase_service import AsyncFirebaseService
 
 
 class CVService:
     """Service for CV operations"""
     
     def __init__(self):
-        self.firebase = FirebaseService
+        self.firebase = AsyncFirebaseService
     
     async def create_cv(self, cv_data: CVCreate) -> CVResponse:
         """Create a new CV"""
@@ -31,7 +31,7 @@ class CVService:
             })
             
             # Save to Firebase
-            self.firebase.add_cv(cv_dict)
+            await self.firebase.add_cv(cv_dict)
             
             logger.info(f"Created CV for candidate: {candidate_id}")
             return CVResponse(**cv_dict)
@@ -43,7 +43,7 @@ class CVService:
     async def get_cv(self, candidate_id: str) -> CVResponse:
         """Get a CV by candidate ID"""
         try:
-            cv = self.firebase.get_cv(candidate_id)
+            cv = await self.firebase.get_cv(candidate_id)
             if not cv:
                 raise NotFoundException(f"CV not found: {candidate_id}")
             return CVResponse(**cv)
@@ -61,11 +61,7 @@ class CVService:
     ) -> List[CVResponse]:
         """Get all CVs with optional filtering"""
         try:
-            cvs = self.firebase.get_all_cvs()
-            
-            # Filter by status if provided
-            if status:
-                cvs = [cv for cv in cvs if cv.get('status') == status]
+            cvs = await self.firebase.get_all_cvs(status=status)
             
             # Pagination
             cvs = cvs[skip:skip + limit]
@@ -89,7 +85,7 @@ class CVService:
             update_data = cv_update.model_dump(exclude_unset=True)
             
             # Update in Firebase
-            self.firebase.update_cv(candidate_id, update_data)
+            await self.firebase.update_cv(candidate_id, update_data)
             
             logger.info(f"Updated CV: {candidate_id}")
             
@@ -109,7 +105,7 @@ class CVService:
             await self.get_cv(candidate_id)
             
             # Delete from Firebase
-            self.firebase.delete_cv(candidate_id)
+            await self.firebase.delete_cv(candidate_id)
             
             logger.info(f"Deleted CV: {candidate_id}")
             return {"message": f"CV {candidate_id} deleted successfully"}
@@ -145,8 +141,7 @@ class CVService:
     async def get_user_applications(self, user_id: str) -> List[CVResponse]:
         """Get all applications for a specific user"""
         try:
-            cvs = self.firebase.get_all_cvs()
-            user_cvs = [cv for cv in cvs if cv.get('userId') == user_id]
+            user_cvs = await self.firebase.get_user_cvs(user_id)
             return [CVResponse(**cv) for cv in user_cvs]
         except Exception as e:
             logger.error(f"Error fetching user applications: {str(e)}")
@@ -2,11 +2,10 @@
 Enhanced Analysis Service with comprehensive bias detection
 """
 from app.services.analysis_service import AnalysisService
-from app.services.websocket_service import notification_service
+from app.services.websocket_service import ProgressReporter, notification_service
 from app.services.comprehensive_bias_detector import ComprehensiveBiasDetector
 from app.services.cv_service import CVService
 from typing import Dict, List
-import asyncio
 from app.core.logging import logger
 
 
@@ -41,45 +40,35 @@ class EnhancedAnalysisWithNotifications(AnalysisService):
             results = []
             rescued_count = 0
             
-            # Analyze each CV with progress updates
-            for idx, cv in enumerate(cvs, 1):
-                # Analyze CV
-                result = await self.analyze_cv(cv.candidateId, job_description)
-                results.append(result)
-                
-                # Add to bias detector
-                bias_detector.add_candidate_result(cv, result)
-                
-                # Check if rescued
-                if result.get("rescued", False):
-                    rescued_count += 1
+            # Progress and alerts are recorded as they happen and broadcast at a
+            # bounded rate, so the loop never waits on the websockets
+            async with ProgressReporter(total_cvs) as progress:
+                for idx, cv in enumerate(cvs, 1):
+                    # Analyze CV
+                    result = await self.analyze_cv(cv.candidateId, job_description)
+                    results.append(result)
                     
-                    # Notify individual rescue
-                    await notification_service.notify_candidate_rescued({
-                        "candidateId": cv.candidateId,
-                        "name": cv.name,
-                        "atsScore": result["atsScore"],
-                        "semanticScore": result["semanticScore"]
-                    })
-                
-                # Send progress update every 5 CVs or at the end
-                if idx % 5 == 0 or idx == total_cvs:
-                    await notification_service.notify_analysis_progress(
-                        idx, total_cvs, rescued_count
-                    )
+                    # Add to bias detector
+                    bias_detector.add_candidate_result(cv, result)
+                    
+                    # Check if rescued
+                    if result.get("rescued", False):
+                        rescued_count += 1
+                        progress.rescued({
+                            "candidateId": cv.candidateId,
+                            "name": cv.name,
+                            "atsScore": result["atsScore"],
+                            "semanticScore": result["semanticScore"]
+                        })
+                    
+                    progress.update(idx, rescued_count)
                 
-                # Small delay to prevent overwhelming
-                await asyncio.sleep(0.1)
-            
-            # Detect all biases comprehensively
-            all_biases = bias_detector.detect_all_biases()
-            
-            # Send bias alerts for each detected bias
-            for bias in all_biases:
-                await notification_service.notify_bias_detected(bias)
+                # Detect all biases comprehensively
+                all_biases = bias_detector.detect_all_biases()
                 
-                # Small delay between alerts
-                await asyncio.sleep(0.2)
+                # Bias alerts go out as one digest
+                for bias in all_biases:
+                    progress.bias(bias)
             
             # Get comprehensive bias summary
             bias_summary = bias_detector.get_summary()
@@ -0,0 +1,134 @@
+"""
+Extraction Cache - Persistent CV extraction results keyed by file content
+
+Maps (SHA-256 of a CV file, extractor version) to the text extracted from it
+and the candidate fields parsed from that text, in a single SQLite file shared
+by every CV folder the process reads. The extractor version fingerprints the
+extraction code and its settings, so changing either turns every cached row
+into a miss. Each version is registered with the time it first opened the
+cache; opening the cache prunes only versions registered before the current
+one, so during a rolling deploy the old processes never delete the new
+version's rows.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from app.core.logging import logger
+
+# SQLite's default limit on bound parameters is 999
+_CHUNK = 900
+
+
+class ExtractionCache:
+    """SQLite-backed map of (file hash, extractor version) -> extracted text and parsed fields"""
+
+    def __init__(self, path: str, version: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.version = version
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            " sha256 TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " text_content TEXT NOT NULL,"
+            " parsed TEXT,"
+            " processed_at TEXT NOT NULL,"
+            " PRIMARY KEY (sha256, version))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS versions ("
+            " version TEXT PRIMARY KEY,"
+            " first_seen TEXT NOT NULL)"
+        )
+        self._prune_older_versions()
+
+    def _prune_older_versions(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            # Registrations are kept, so an old version that starts again stays older
+            self._conn.execute(
+                "INSERT OR IGNORE INTO versions (version, first_seen) VALUES (?, ?)",
+                (self.version, datetime.now().isoformat())
+            )
+            older = ("SELECT version FROM versions WHERE first_seen <"
+                     " (SELECT first_seen FROM versions WHERE version = ?)")
+            # Rows of unregistered versions predate version tracking and are older too
+            pruned = self._conn.execute(
+                f"DELETE FROM extractions WHERE version IN ({older})"
+                " OR version NOT IN (SELECT version FROM versions)",
+                (self.version,)
+            ).rowcount
+            self._conn.execute("COMMIT")
+        if pruned:
+            logger.info(f"Extraction cache: dropped {pruned} entries from older extractor versions")
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, dict]:
+        """
+        Cached entries for file hashes
+
+        Returns:
+            Dict of sha256 -> {"text_content", "parsed" (None until parsed), "processed_at"}
+        """
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), _CHUNK):
+                chunk = hashes[start:start + _CHUNK]
+                rows = self._conn.execute(
+                    "SELECT sha256, text_content, parsed, processed_at FROM extractions"
+                    f" WHERE version = ? AND sha256 IN ({','.join('?' * len(chunk))})",
+                    (self.version, *chunk)
+                )
+                for sha256, text_content, parsed, processed_at in rows:
+                    found[sha256] = {
+                        "text_content": text_content,
+                        "parsed": json.loads(parsed) if parsed is not None else None,
+                        "processed_at": processed_at
+                    }
+        return found
+
+    def get(self, sha256: str) -> Optional[dict]:
+        return self.get_many([sha256]).get(sha256)
+
+    def put_texts(self, texts: Dict[str, str]):
+        """Store extracted text for new file hashes (any parsed fields are reset)"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO extractions (sha256, version, text_content, parsed, processed_at)"
+                " VALUES (?, ?, ?, NULL, ?)",
+                [(sha256, self.version, text, now) for sha256, text in texts.items()]
+            )
+            self._conn.execute("COMMIT")
+
+    def put_parsed(self, parsed: Dict[str, dict]):
+        """Store parsed candidate fields for file hashes whose text is already cached"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE extractions SET parsed = ? WHERE sha256 = ? AND version = ?",
+                [(json.dumps(fields, default=str), sha256, self.version)
+                 for sha256, fields in parsed.items()]
+            )
+            self._conn.execute("COMMIT")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total, parsed = self._conn.execute(
+                "SELECT COUNT(*), COUNT(parsed) FROM extractions WHERE version = ?", (self.version,)
+            ).fetchone()
+        return {"path": self.path, "version": self.version, "entries": total, "parsed": parsed}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,190 @@
+"""
+Extraction Executor - Process pool for document text extraction
+
+PDF/DOCX parsing is CPU-bound and can hang or balloon on malformed files, so
+it runs in worker processes with an address-space limit and a per-file
+timeout. Each worker takes one document at a time and the timeout runs from
+the moment a worker picks the document up, so time spent waiting for a free
+worker never counts against it. A worker that times out or dies is replaced on
+its own; documents on the other workers are unaffected, and the API process
+itself is never blocked or taken down by a bad document.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.utils.text_extraction import Source, limit_worker_memory, timed_extract
+
+
+class ExtractionError(Exception):
+    """Text could not be extracted from a document"""
+
+
+class ExtractionTimeout(ExtractionError):
+    """Extraction exceeded the per-file timeout"""
+
+
+class ExtractionExecutor:
+    """Shared worker processes running text extraction with timeouts and latency metrics"""
+
+    def __init__(self, max_workers: int, timeout: float, memory_limit_mb: int, window: int = 500):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        # One single-process pool per worker slot, so a hung document costs only its own worker
+        self._slots: List[Optional[ProcessPoolExecutor]] = [None] * max_workers
+        self._idle: Optional[asyncio.Queue] = None
+        self._idle_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._queue_ms = deque(maxlen=window)
+        self._extract_ms = deque(maxlen=window)
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "restarts": 0}
+        self._pending = 0
+
+    def _idle_slots(self) -> asyncio.Queue:
+        # Slots are handed out through a queue bound to the running loop; scripts and
+        # tests may run several loops in turn, so it is rebuilt when the loop changes
+        loop = asyncio.get_running_loop()
+        if self._idle is None or self._idle_loop is not loop:
+            self._idle = asyncio.Queue()
+            self._idle_loop = loop
+            for slot in range(self.max_workers):
+                self._idle.put_nowait(slot)
+        return self._idle
+
+    def _get_pool(self, slot: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._slots[slot] is None:
+                self._slots[slot] = ProcessPoolExecutor(
+                    max_workers=1,
+                    # Fork is unsafe once the API has started threads
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=limit_worker_memory,
+                    initargs=(self.memory_limit_mb,)
+                )
+            return self._slots[slot]
+
+    @staticmethod
+    def _terminate(pool: ProcessPoolExecutor):
+        # ProcessPoolExecutor cannot cancel a running call, so stop its process directly
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _discard_pool(self, slot: int, pool: ProcessPoolExecutor, reason: str):
+        """Replace a slot's worker that hung or died; other workers keep running"""
+        with self._lock:
+            if self._slots[slot] is not pool:
+                return
+            self._slots[slot] = None
+            self._counts["restarts"] += 1
+        logger.warning(f"Restarting extraction worker {slot}: {reason}")
+        self._terminate(pool)
+
+    async def extract(self, source: Source, filename: str) -> str:
+        """
+        Extract text from a document in a worker process
+
+        The timeout covers the extraction itself: it starts once a worker is
+        free, not while the document waits for one.
+
+        Args:
+            source: Document bytes/memoryview or a path to the document
+            filename: Original file name (selects the parser)
+
+        Returns:
+            Extracted text
+
+        Raises:
+            ExtractionTimeout: The file took longer than the configured timeout
+            ExtractionError: The file could not be parsed or the worker died
+        """
+        if isinstance(source, memoryview):
+            # memoryviews cannot be pickled to a worker; in-memory uploads are small
+            source = source.tobytes()
+        submitted = time.time()
+        self._counts["submitted"] += 1
+        self._pending += 1
+        idle = self._idle_slots()
+        try:
+            slot = await idle.get()
+        except BaseException:
+            self._pending -= 1
+            raise
+        pool = self._get_pool(slot)
+        try:
+            future = asyncio.wrap_future(pool.submit(timed_extract, source, filename))
+            started, duration, text = await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError as e:
+            self._counts["timeouts"] += 1
+            self._discard_pool(slot, pool, f"{filename} exceeded {self.timeout}s")
+            raise ExtractionTimeout(f"Extraction of {filename} timed out after {self.timeout}s") from e
+        except asyncio.CancelledError:
+            # The caller went away; free the worker instead of letting it finish unobserved
+            self._discard_pool(slot, pool, f"extraction of {filename} was cancelled")
+            raise
+        except BrokenProcessPool as e:
+            self._counts["failed"] += 1
+            self._discard_pool(slot, pool, f"worker died while extracting {filename}")
+            raise ExtractionError(f"Extraction worker crashed on {filename}") from e
+        except MemoryError as e:
+            self._counts["failed"] += 1
+            raise ExtractionError(
+                f"{filename} exceeded the {self.memory_limit_mb}MB extraction memory limit"
+            ) from e
+        except Exception as e:
+            self._counts["failed"] += 1
+            raise ExtractionError(f"Failed to extract text from {filename}: {str(e)}") from e
+        finally:
+            self._pending -= 1
+            idle.put_nowait(slot)
+
+        self._counts["completed"] += 1
+        self._queue_ms.append(max(0.0, (started - submitted) * 1000))
+        self._extract_ms.append(duration * 1000)
+        return text
+
+    @staticmethod
+    def _summary(samples) -> dict:
+        values = sorted(samples)
+        if not values:
+            return {"mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {
+            "mean_ms": round(sum(values) / len(values), 2),
+            "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            "max_ms": round(values[-1], 2)
+        }
+
+    def stats(self) -> dict:
+        return {
+            **self._counts,
+            "pending": self._pending,
+            "max_workers": self.max_workers,
+            "queue_latency": self._summary(self._queue_ms),
+            "extract_latency": self._summary(self._extract_ms)
+        }
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._slots = self._slots, [None] * self.max_workers
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Worker processes are started on first use, not at import
+extraction_executor = ExtractionExecutor(
+    max_workers=settings.EXTRACTION_WORKERS,
+    timeout=settings.EXTRACTION_TIMEOUT,
+    memory_limit_mb=settings.EXTRACTION_MEMORY_LIMIT_MB
+)
@@ -4,18 +4,20 @@ File Upload Service - Handle CV file uploads and parsing
 from typing import Dict, Optional
 import os
 from fastapi import UploadFile
-from PyPDF2 import PdfReader
-from docx import Document
-import io
 from app.core.logging import logger
-from app.core.exceptions import BadRequestException
+from app.core.blocking import run_blocking
+from app.core.config import settings
+from app.core.exceptions import BadRequestException, PayloadTooLargeException
+from app.services.extraction_executor import ExtractionError
+from app.utils.uploads import SpooledUpload, spool_upload
+from firebase_service import FirebaseService
 
 
 class FileUploadService:
     """Service for handling file uploads and parsing"""
     
     ALLOWED_EXTENSIONS = {'.pdf', '.docx', '.doc', '.txt'}
-    MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    MAX_FILE_SIZE = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
     
     async def upload_cv(self, file: UploadFile) -> Dict:
         """
@@ -29,16 +31,15 @@ class FileUploadService:
         """
         try:
             # Validate file
-            self._validate_file(file)
+            self.validate_file(file)
             
-            # Read file content
-            content = await file.read()
-            
-            # Extract text based on file type
-            text = await self._extract_text(file.filename, content)
-            
-            # Save file (optional - could save to cloud storage)
-            file_path = await self._save_file(file.filename, content)
+            # Stream to a spooled temp file, aborting once MAX_FILE_SIZE is exceeded
+            async with await spool_upload(file, max_bytes=self.MAX_FILE_SIZE) as upload:
+                # Extract text based on file type (reused when the same file was seen before)
+                text, cached = await self._extract_text(upload)
+                
+                # Save file (optional - could save to cloud storage)
+                file_path = await self._save_file(file.filename, upload)
             
             logger.info(f"Uploaded CV: {file.filename}")
             
@@ -46,15 +47,19 @@ class FileUploadService:
                 "filename": file.filename,
                 "file_path": file_path,
                 "extracted_text": text,
-                "file_size": len(content),
+                "file_size": upload.size,
+                "sha256": upload.sha256,
+                "cached": cached,
                 "content_type": file.content_type
             }
             
+        except PayloadTooLargeException:
+            raise
         except Exception as e:
             logger.error(f"File upload failed: {str(e)}")
             raise BadRequestException(f"File upload failed: {str(e)}")
     
-    def _validate_file(self, file: UploadFile):
+    def validate_file(self, file: UploadFile):
         """Validate uploaded file"""
         # Check extension
         ext = os.path.splitext(file.filename)[1].lower()
@@ -63,55 +68,22 @@ class FileUploadService:
                 f"Invalid file type. Allowed: {', '.join(self.ALLOWED_EXTENSIONS)}"
             )
         
-        # Check file size would be done during upload
-        # FastAPI handles this with max_upload_size
+        # File size is enforced while streaming in spool_upload
     
-    async def _extract_text(self, filename: str, content: bytes) -> str:
-        """Extract text from file based on type"""
-        ext = os.path.splitext(filename)[1].lower()
+    async def _extract_text(self, upload: SpooledUpload) -> tuple:
+        """Extract text in the extraction worker pool, or reuse it from the content-hash cache"""
+        ext = os.path.splitext(upload.filename)[1].lower()
+        if ext not in self.ALLOWED_EXTENSIONS:
+            raise BadRequestException(f"Unsupported file type: {ext}")
         
         try:
-            if ext == '.pdf':
-                return self._extract_from_pdf(content)
-            elif ext in ['.docx', '.doc']:
-                return self._extract_from_docx(content)
-            elif ext == '.txt':
-                return content.decode('utf-8')
-            else:
-                raise BadRequestException(f"Unsupported file type: {ext}")
-        except Exception as e:
+            resolved = await FirebaseService.uploads.resolve(upload)
+        except ExtractionError as e:
             logger.error(f"Text extraction failed: {str(e)}")
             raise BadRequestException(f"Failed to extract text: {str(e)}")
+        return resolved["extractedText"].strip(), resolved["cached"]
     
-    def _extract_from_pdf(self, content: bytes) -> str:
-        """Extract text from PDF"""
-        try:
-            pdf_file = io.BytesIO(content)
-            reader = PdfReader(pdf_file)
-            
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
-        except Exception as e:
-            raise BadRequestException(f"Failed to parse PDF: {str(e)}")
-    
-    def _extract_from_docx(self, content: bytes) -> str:
-        """Extract text from DOCX"""
-        try:
-            docx_file = io.BytesIO(content)
-            doc = Document(docx_file)
-            
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            return text.strip()
-        except Exception as e:
-            raise BadRequestException(f"Failed to parse DOCX: {str(e)}")
-    
-    async def _save_file(self, filename: str, content: bytes) -> str:
+    async def _save_file(self, filename: str, upload: SpooledUpload) -> str:
         """Save file to storage (local or cloud)"""
         try:
             # Create uploads directory
@@ -123,9 +95,8 @@ class FileUploadService:
             safe_filename = f"{timestamp}_{filename}"
             file_path = os.path.join(upload_dir, safe_filename)
             
-            # Save file
-            with open(file_path, 'wb') as f:
-                f.write(content)
+            # Save file (copied from the spooled temp file off the event loop)
+            await run_blocking(upload.copy_to, file_path)
             
             return file_path
             
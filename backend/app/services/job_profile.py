@@ -0,0 +1,125 @@
+"""
+Job Profile - Compiled job descriptions for CV scoring
+
+Scoring many CVs against one job description used to re-split, re-lowercase
+and re-encode the description for every CV. A ``JobProfile`` holds what the
+scorers need from a description (its keyword set and normalized embedding),
+built once per description and kept in a bounded LRU cache keyed by the hash
+of the whitespace-normalized text. Scoring a CV is then one set intersection,
+one CV encode and one dot product.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.models import models
+
+
+class JobProfile:
+    """Keyword set and embedding of one job description"""
+
+    def __init__(self, key: str, text: str, keywords: FrozenSet[str], embedding=None):
+        self.key = key
+        self.text = text
+        self.keywords = keywords
+        # Unit-length vector, or None when the sentence transformer is unavailable
+        self.embedding = embedding
+
+    @staticmethod
+    def key_for(job_description: str) -> str:
+        return hashlib.sha256(" ".join(job_description.split()).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def build(cls, job_description: str) -> "JobProfile":
+        """Compile a job description (embedded only when the sentence transformer is available)"""
+        embedding = None
+        model = models.get("sentence_transformer")
+        if model is not None:
+            try:
+                embedding = model.encode([job_description], normalize_embeddings=True,
+                                         show_progress_bar=False)[0]
+            except Exception as e:
+                logger.error(f"Could not encode job description: {str(e)}")
+        return cls(
+            cls.key_for(job_description),
+            job_description,
+            frozenset(job_description.lower().split()),
+            embedding
+        )
+
+    def ats_score(self, cv_text: str) -> float:
+        """Share of the job's keywords found in the CV text, 0-100"""
+        if not self.keywords:
+            return 0.0
+        matched = self.keywords.intersection(cv_text.lower().split())
+        return round(min(len(matched) / len(self.keywords) * 100, 100), 2)
+
+    def semantic_score(self, cv_embedding) -> float:
+        """Cosine similarity to a unit-length CV embedding"""
+        if self.embedding is None:
+            return 0.0
+        return round(float(np.dot(cv_embedding, self.embedding)), 4)
+
+
+class JobProfileCache:
+    """Bounded LRU cache of compiled job profiles; each description is compiled once"""
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._profiles: "OrderedDict[str, JobProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._building: Dict[str, threading.Lock] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, job_description: str) -> JobProfile:
+        """
+        Profile for a job description, compiling it on first use
+
+        Blocking (may encode the description); call through ``run_blocking``
+        from async code. Concurrent callers of the same description share one build.
+        """
+        key = JobProfile.key_for(job_description)
+        with self._lock:
+            profile = self._lookup(key)
+            if profile is not None:
+                return profile
+            building = self._building.setdefault(key, threading.Lock())
+
+        with building:
+            with self._lock:
+                profile = self._lookup(key)
+                if profile is not None:
+                    return profile
+                self._misses += 1
+            profile = JobProfile.build(job_description)
+            with self._lock:
+                self._profiles[key] = profile
+                while len(self._profiles) > self.max_size:
+                    self._profiles.popitem(last=False)
+                self._building.pop(key, None)
+        return profile
+
+    def _lookup(self, key: str) -> Optional[JobProfile]:
+        profile = self._profiles.get(key)
+        if profile is not None:
+            self._profiles.move_to_end(key)
+            self._hits += 1
+        return profile
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"size": len(self._profiles), "max_size": self.max_size,
+                    "hits": self._hits, "misses": self._misses}
+
+
+job_profiles = JobProfileCache(settings.JOB_PROFILE_CACHE_SIZE)
@@ -6,7 +6,7 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 from app.core.logging import logger
 from app.core.exceptions import NotFoundException, BadRequestException
-from firebase_service import FirebaseService
+from async_firebase_service import AsyncFirebaseService
 
 
 class JobCriteria(BaseModel):
@@ -38,7 +38,7 @@ class JobPostingService:
     """Service for managing job postings"""
     
     def __init__(self):
-        self.firebase = FirebaseService
+        self.firebase = AsyncFirebaseService
     
     async def create_job(
         self,
@@ -68,7 +68,7 @@ class JobPostingService:
             }
             
             # Save to Firebase
-            self.firebase.add_job_posting(job_data)
+            await self.firebase.add_job_posting(job_data)
             
             logger.info(f"Created job posting: {job_id}")
             return JobPosting(**job_data)
@@ -80,7 +80,7 @@ class JobPostingService:
     async def get_job(self, job_id: str) -> JobPosting:
         """Get a job posting by ID"""
         try:
-            job = self.firebase.get_job_posting(job_id)
+            job = await self.firebase.get_job_posting(job_id)
             if not job:
                 raise NotFoundException(f"Job not found: {job_id}")
             return JobPosting(**job)
@@ -98,7 +98,7 @@ class JobPostingService:
     ) -> List[JobPosting]:
         """Get all job postings"""
         try:
-            jobs = self.firebase.get_all_job_postings()
+            jobs = await self.firebase.get_all_job_postings()
             
             # Filter by status
             if status:
@@ -123,7 +123,7 @@ class JobPostingService:
             await self.get_job(job_id)
             
             # Update in Firebase
-            self.firebase.update_job_posting(job_id, updates)
+            await self.firebase.update_job_posting(job_id, updates)
             
             logger.info(f"Updated job: {job_id}")
             return await self.get_job(job_id)
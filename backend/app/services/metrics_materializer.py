@@ -0,0 +1,423 @@
+"""
+Metrics Materializer - Incrementally maintained dashboard metrics
+
+CV writes update sharded counters inside the same storage transaction as the
+CV document itself, so the counters never drift from the data. A rolled-up
+snapshot of those counters is kept in ``metrics/dashboard`` which makes the
+dashboard a single document read instead of a full collection scan. Every
+shard write also bumps a write count, so any process can tell that the
+snapshot lags behind counters written elsewhere (Celery workers, other API
+instances).
+"""
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+from app.core.logging import logger
+from app.storage.base import FieldFilter
+
+
+class MetricsMaterializer:
+    """Maintain sharded CV counters and the materialized dashboard snapshot"""
+
+    NUM_SHARDS = 10
+    SNAPSHOT_COLLECTION = "metrics"
+    SNAPSHOT_DOC = "dashboard"
+    COUNTERS_DOC = "dashboard_counters"
+    # Per-shard count of counter writes; their sum versions the counters
+    WRITES_FIELD = "_writes"
+
+    # Minimum seconds between two snapshot roll-ups triggered by writes
+    REFRESH_INTERVAL = 5.0
+    # Deltas are reported against the snapshot taken at the start of this window
+    DELTA_WINDOW = 24 * 60 * 60
+
+    AGE_GROUPS = ("Under 30", "30-45", "Over 45")
+
+    def __init__(self, db, is_candidate_doc: Callable[[dict, str], bool]):
+        self.db = db
+        self.is_candidate_doc = is_candidate_doc
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_refresh = 0.0
+        # Callables (writer, before, after, doc_id) that stage derived writes,
+        # e.g. lookup entries, in the same transaction/batch as the CV itself
+        self.write_hooks: List[Callable] = []
+
+    # ------------------------------------------------------------------
+    # Counter contributions
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _as_number(value, default: float = 0) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
+
+    @staticmethod
+    def _key(value, default: str = "Unknown") -> str:
+        """Normalize a value so it can be used as a Firestore map key"""
+        key = str(value).strip() if value not in (None, "") else default
+        return key.replace(".", "_").replace("/", "_") or default
+
+    @classmethod
+    def age_group(cls, age) -> str:
+        age = cls._as_number(age, 30)
+        if age < 30:
+            return "Under 30"
+        if age <= 45:
+            return "30-45"
+        return "Over 45"
+
+    def contributions(self, cv: Optional[dict], doc_id: str = "") -> Dict:
+        """Counter values a single CV document contributes"""
+        if not cv or not self.is_candidate_doc(cv, doc_id):
+            return {}
+
+        status = self._key(cv.get("status"), "unknown")
+        gender = self._key(cv.get("gender"))
+        rejected = status == "rejected"
+        experience = self._as_number(cv.get("experience"))
+        skills = cv.get("skills") or []
+
+        counters = {
+            "total": 1,
+            "status": {status: 1},
+            "ageGroup": {self.age_group(cv.get("age")): 1},
+            "gender": {gender: 1},
+        }
+        if rejected:
+            counters["genderRejected"] = {gender: 1}
+        if status == "rescued":
+            counters["rescued"] = 1
+        if self._as_number(cv.get("age")) > 45 and experience > 10:
+            counters["olderExperienced"] = {"total": 1, "rejected": 1 if rejected else 0}
+        if rejected and experience > 5 and len(skills) > 5:
+            counters["rescueOpportunities"] = 1
+        return counters
+
+    @classmethod
+    def _flatten(cls, counters: Dict, prefix: tuple = ()) -> Dict[tuple, float]:
+        flat = {}
+        for key, value in counters.items():
+            if isinstance(value, dict):
+                flat.update(cls._flatten(value, prefix + (key,)))
+            else:
+                flat[prefix + (key,)] = value
+        return flat
+
+    @staticmethod
+    def _nest(flat: Dict[tuple, float], wrap: Callable = lambda v: v) -> Dict:
+        nested = {}
+        for path, value in flat.items():
+            node = nested
+            for part in path[:-1]:
+                node = node.setdefault(part, {})
+            node[path[-1]] = wrap(value)
+        return nested
+
+    def diff(self, before: Optional[dict], after: Optional[dict], doc_id: str = "") -> Dict[tuple, float]:
+        """Non-zero counter deltas for a CV going from ``before`` to ``after``"""
+        old = self._flatten(self.contributions(before, doc_id))
+        new = self._flatten(self.contributions(after, doc_id))
+        deltas = {}
+        for path in set(old) | set(new):
+            delta = new.get(path, 0) - old.get(path, 0)
+            if delta:
+                deltas[path] = delta
+        return deltas
+
+    # ------------------------------------------------------------------
+    # Transactional writes
+    # ------------------------------------------------------------------
+
+    def _shards(self):
+        return (
+            self.db.collection(self.SNAPSHOT_COLLECTION)
+            .document(self.COUNTERS_DOC)
+            .collection("shards")
+        )
+
+    def _shard_update(self, deltas: Dict[tuple, float]) -> Dict:
+        update = self._nest(deltas, self.db.increment)
+        update[self.WRITES_FIELD] = self.db.increment(1)
+        return update
+
+    def _apply_deltas(self, transaction, deltas: Dict[tuple, float]):
+        if not deltas:
+            return
+        shard_ref = self._shards().document(str(random.randrange(self.NUM_SHARDS)))
+        transaction.set(shard_ref, self._shard_update(deltas), merge=True)
+
+    def write_cv(
+        self,
+        doc_ref,
+        data: Optional[dict] = None,
+        merge: bool = False,
+        delete: bool = False,
+        require_existing: bool = False,
+        extra_writes: Optional[Callable] = None
+    ) -> Optional[Dict]:
+        """
+        Create, update or delete a CV document and its counters atomically
+
+        Args:
+            doc_ref: Reference of the CV document
+            data: New document data (ignored when deleting)
+            merge: Merge ``data`` into the existing document
+            delete: Delete the document instead of writing it
+            require_existing: Write nothing and return None if the document does not exist
+            extra_writes: Called as ``extra_writes(transaction, before, after)`` to stage
+                further writes that must commit together with the CV
+
+        Returns:
+            The document data after the write (empty dict when deleted)
+        """
+        def run(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            before = snapshot.to_dict() if snapshot.exists else None
+            if require_existing and before is None:
+                return None
+
+            if delete:
+                after = None
+            elif merge and before:
+                after = {**before, **data}
+            else:
+                after = dict(data)
+
+            self._apply_deltas(transaction, self.diff(before, after, doc_ref.id))
+            for hook in self.write_hooks:
+                hook(transaction, before, after, doc_ref.id)
+            if extra_writes:
+                extra_writes(transaction, before, after)
+
+            if delete:
+                if snapshot.exists:
+                    transaction.delete(doc_ref)
+            else:
+                transaction.set(doc_ref, data, merge=merge)
+            return after or {}
+
+        result = self.db.run_transaction(run)
+        if result is not None:
+            self.mark_dirty()
+        return result
+
+    def add_deltas_to_batch(self, batch, cvs: Dict[str, dict], before: Optional[Dict[str, dict]] = None):
+        """
+        Add the summed counter deltas (and hook writes) of CV writes to a write batch
+
+        Args:
+            batch: Write batch the CV writes are staged in
+            cvs: Mapping of document id -> document data after the write
+            before: Mapping of document id -> data before the write (omit for new CVs)
+        """
+        before = before or {}
+        total: Dict[tuple, float] = {}
+        for doc_id, cv in cvs.items():
+            previous = before.get(doc_id)
+            for path, value in self.diff(previous, cv, doc_id).items():
+                total[path] = total.get(path, 0) + value
+            for hook in self.write_hooks:
+                hook(batch, previous, cv, doc_id)
+        if total:
+            shard_ref = self._shards().document(str(random.randrange(self.NUM_SHARDS)))
+            batch.set(shard_ref, self._shard_update(total), merge=True)
+        self.mark_dirty()
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def _read_shards(self) -> Tuple[Dict, int]:
+        """Summed counters and the total write count across all shards"""
+        total: Dict[tuple, float] = {}
+        for shard in self._shards().stream():
+            for path, value in self._flatten(shard.to_dict() or {}).items():
+                total[path] = total.get(path, 0) + self._as_number(value)
+        version = int(total.pop((self.WRITES_FIELD,), 0))
+        return self._nest(total, int), version
+
+    def read_counters(self) -> Dict:
+        """Sum all counter shards into one nested dict"""
+        return self._read_shards()[0]
+
+    def rebuild_counters(self) -> Dict:
+        """Recompute all counters from a full scan of the cvs collection"""
+        total: Dict[tuple, float] = {}
+        for doc in self.db.collection("cvs").stream():
+            for path, value in self._flatten(self.contributions(doc.to_dict(), doc.id)).items():
+                total[path] = total.get(path, 0) + value
+
+        batch = self.db.batch()
+        for idx in range(self.NUM_SHARDS):
+            shard_ref = self._shards().document(str(idx))
+            batch.set(shard_ref, self._nest(total, int) if idx == 0 else {})
+        batch.commit()
+
+        logger.info(f"Rebuilt dashboard counters from {int(total.get(('total',), 0))} CVs")
+        return self.refresh_snapshot()
+
+    def refresh_if_stale(self) -> Optional[Dict]:
+        """
+        Roll the counters up into the snapshot if writes happened since the last refresh
+
+        Writes made by this process are known locally; writes made by other
+        processes are detected by comparing the shards' write count with the
+        one the snapshot was built from (checked at most every REFRESH_INTERVAL).
+        """
+        if time.monotonic() - self._last_refresh < self.REFRESH_INTERVAL:
+            return None
+        try:
+            if not self._dirty and not self._written_elsewhere():
+                self._last_refresh = time.monotonic()
+                return None
+            return self.refresh_snapshot()
+        except Exception as e:
+            logger.error(f"Dashboard snapshot refresh failed: {str(e)}")
+            return None
+
+    def _written_elsewhere(self) -> bool:
+        """True when the counters moved past the version the snapshot was built from"""
+        snapshot = self.db.collection(self.SNAPSHOT_COLLECTION).document(self.SNAPSHOT_DOC).get()
+        if not snapshot.exists:
+            return False
+        published = (snapshot.to_dict() or {}).get("countersVersion")
+        return published != self._read_shards()[1]
+
+    def refresh_snapshot(self) -> Dict:
+        """Write the materialized dashboard document from the current counters"""
+        with self._lock:
+            self._dirty = False
+            self._last_refresh = time.monotonic()
+
+            counters, version = self._read_shards()
+            snapshot_ref = self.db.collection(self.SNAPSHOT_COLLECTION).document(self.SNAPSHOT_DOC)
+            previous = snapshot_ref.get()
+            previous = previous.to_dict() if previous.exists else {}
+
+            derived_alerts = self._derive_alerts(counters)
+            values = self._metric_values(counters, derived_alerts)
+            baseline = previous.get("baseline") or {}
+            now = time.time()
+            if not baseline or now - self._as_number(baseline.get("takenAt")) >= self.DELTA_WINDOW:
+                # Start a new delta window from the last published values
+                baseline = {
+                    "values": previous.get("values") or values,
+                    "takenAt": now,
+                }
+
+            snapshot = self._build_snapshot(counters, values, baseline["values"])
+            snapshot["derivedAlerts"] = derived_alerts
+            snapshot["baseline"] = baseline
+            snapshot["countersVersion"] = version
+            snapshot_ref.set(snapshot)
+            return snapshot
+
+    def _metric_values(self, counters: Dict, derived_alerts: List[Dict]) -> Dict[str, int]:
+        status = counters.get("status", {})
+        return {
+            "totalCandidates": counters.get("total", 0),
+            "atsRejections": status.get("rejected", 0),
+            "rescuedCandidates": counters.get("rescued", 0),
+            "activeBiasAlerts": len(derived_alerts),
+        }
+
+    def _derive_alerts(self, counters: Dict) -> List[Dict]:
+        """Alerts that can be computed from the counters alone"""
+        alerts = []
+        total = counters.get("total", 0)
+        if not total:
+            return alerts
+
+        rejected = counters.get("status", {}).get("rejected", 0)
+        older = counters.get("olderExperienced", {})
+        older_total = older.get("total", 0)
+        older_rejected = older.get("rejected", 0)
+        if older_total:
+            older_rate = older_rejected / older_total
+            overall_rate = rejected / total
+            # If older candidates have >25% higher rejection rate, flag bias
+            if older_rate > overall_rate + 0.25 and older_rejected > 0:
+                alerts.append({
+                    "type": "warning",
+                    "title": "🟡 Age-Based Bias Detected in Hiring Process",
+                    "description": f"Candidates over 45 with 10+ years experience show {int((older_rate - overall_rate) * 100)}% higher rejection rate than average.",
+                    "affected": f"{older_rejected} highly experienced candidates (age 45+, 10+ years exp)",
+                    "recommendation": "Review rejection criteria - high experience should be valued, not penalized",
+                })
+
+        opportunities = counters.get("rescueOpportunities", 0)
+        if opportunities > 3:
+            alerts.append({
+                "type": "info",
+                "title": "🦸 Talent Rescue Opportunity",
+                "description": f"{opportunities} qualified candidates rejected despite strong skills and experience.",
+                "affected": "Candidates with 5+ skills and 5+ years experience",
+                "recommendation": "",
+            })
+        return alerts
+
+    def _build_snapshot(self, counters: Dict, values: Dict[str, int], baseline: Dict[str, int]) -> Dict:
+        def metric(name: str) -> Dict:
+            change = values[name] - int(self._as_number(baseline.get(name)))
+            return {"value": values[name], "delta": f"{change:+d}", "change": change}
+
+        total = values["totalCandidates"]
+        rejection_rate = int(values["atsRejections"] / total * 100) if total else 0
+
+        gender_totals = counters.get("gender", {})
+        gender_rejected = counters.get("genderRejected", {})
+        gender_stats = {
+            gender: int(gender_rejected.get(gender, 0) / count * 100)
+            for gender, count in gender_totals.items()
+            if count
+        }
+
+        return {
+            "totalCandidates": metric("totalCandidates"),
+            "atsRejections": {
+                **metric("atsRejections"),
+                "rate": rejection_rate,
+                "trend": "down" if rejection_rate < 40 else "up",
+            },
+            "rescuedCandidates": metric("rescuedCandidates"),
+            "activeBiasAlerts": metric("activeBiasAlerts"),
+            "ageStats": {group: counters.get("ageGroup", {}).get(group, 0) for group in self.AGE_GROUPS},
+            "genderStats": gender_stats,
+            "rescuedPreview": self._rescued_preview(),
+            "counters": counters,
+            "values": values,
+            "lastUpdated": datetime.now(),
+        }
+
+    def _rescued_preview(self, limit: int = 3) -> List[Dict]:
+        """Small sample of rescued candidates shown on the dashboard"""
+        preview = []
+        try:
+            docs = (
+                self.db.collection("cvs")
+                .where(filter=FieldFilter("status", "==", "rescued"))
+                .limit(limit)
+                .stream()
+            )
+            for doc in docs:
+                cv = doc.to_dict() or {}
+                preview.append({
+                    "candidateId": cv.get("candidateId", doc.id),
+                    "ageGroup": self.age_group(cv.get("age")),
+                    "gender": cv.get("gender", "Unknown"),
+                    "keywords": ", ".join((cv.get("skills") or [])[:2]) or "N/A",
+                    "score": int(self._as_number(cv.get("atsScore") or cv.get("semanticScore"), 0)),
+                })
+        except Exception as e:
+            logger.warning(f"Could not load rescued preview: {str(e)}")
+        return preview
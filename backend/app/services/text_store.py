@@ -0,0 +1,195 @@
+"""
+Text Store - Content-addressed side store for large CV text and analysis detail
+
+Extracted text and analysis payloads are compressed and written once per
+distinct content (keyed by SHA-256) to ``cv_texts``. The CV document keeps only
+a ``textRefs`` map with the hash and length of each offloaded field, so list
+queries stay small. Analysis code calls ``hydrate`` to pull the text back in
+one batched read when it actually needs it.
+"""
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.logging import logger
+
+
+class TextStore:
+    """Offload large CV fields into compressed, deduplicated side documents"""
+
+    COLLECTION = "cv_texts"
+    REFS_FIELD = "textRefs"
+
+    # Plain text fields moved out of the document when longer than INLINE_LIMIT
+    TEXT_FIELDS = ("extractedText", "content", "text_content")
+    # Structured fields moved out when their JSON is longer than INLINE_LIMIT;
+    # the listed keys stay inline as a summary for list views
+    JSON_FIELDS = {"semantic_analysis": ("overall_match_score",)}
+
+    INLINE_LIMIT = 512
+    # Stay well below Firestore's 1 MiB document limit
+    CHUNK_SIZE = 900 * 1024
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def fingerprint(payload: bytes) -> str:
+        return hashlib.sha256(payload).hexdigest()
+
+    def _ref(self, doc_id: str):
+        return self.db.collection(self.COLLECTION).document(doc_id)
+
+    def put(self, payload: bytes) -> str:
+        """Store ``payload`` once and return its content hash"""
+        digest = self.fingerprint(payload)
+        head_ref = self._ref(digest)
+        if head_ref.get().exists:
+            return digest
+
+        compressed = zlib.compress(payload, 6)
+        chunks = [compressed[i:i + self.CHUNK_SIZE] for i in range(0, len(compressed), self.CHUNK_SIZE)] or [b""]
+        batch = self.db.batch()
+        for idx, chunk in enumerate(chunks[1:], start=1):
+            batch.set(self._ref(f"{digest}.{idx}"), {"data": chunk})
+        # Head document last in the batch: its presence marks the blob complete
+        batch.set(head_ref, {
+            "data": chunks[0],
+            "parts": len(chunks),
+            "length": len(payload),
+            "encoding": "zlib",
+            "createdAt": datetime.now()
+        })
+        batch.commit()
+        return digest
+
+    def get_many(self, digests: Iterable[str]) -> Dict[str, bytes]:
+        """Fetch and decompress several blobs with as few reads as possible"""
+        digests = list(dict.fromkeys(d for d in digests if d))
+        if not digests:
+            return {}
+
+        heads = {
+            snap.id: snap.to_dict()
+            for snap in self.db.get_all([self._ref(d) for d in digests])
+            if snap.exists
+        }
+        extra_refs = [
+            self._ref(f"{digest}.{idx}")
+            for digest, head in heads.items()
+            for idx in range(1, int(head.get("parts", 1)))
+        ]
+        extra = {
+            snap.id: (snap.to_dict() or {}).get("data", b"")
+            for snap in (self.db.get_all(extra_refs) if extra_refs else [])
+            if snap.exists
+        }
+
+        blobs = {}
+        for digest, head in heads.items():
+            compressed = bytes(head.get("data") or b"")
+            compressed += b"".join(bytes(extra.get(f"{digest}.{idx}", b"")) for idx in range(1, int(head.get("parts", 1))))
+            try:
+                blobs[digest] = zlib.decompress(compressed)
+            except zlib.error as e:
+                logger.error(f"Corrupt text blob {digest}: {str(e)}")
+        return blobs
+
+    def offload(self, doc: dict) -> dict:
+        """
+        Move large fields of a CV/reference document into the side store
+
+        Args:
+            doc: Document data about to be written
+
+        Returns:
+            A copy of ``doc`` with large fields replaced by ``textRefs`` entries.
+            Fields written inline get a null entry, so a merge write also
+            clears the reference to a previously offloaded value.
+        """
+        result = dict(doc)
+        refs = dict(result.get(self.REFS_FIELD) or {})
+
+        for field in self.TEXT_FIELDS:
+            if field not in result:
+                continue
+            value = result[field]
+            if isinstance(value, str) and len(value) > self.INLINE_LIMIT:
+                digest = self.put(value.encode("utf-8"))
+                refs[field] = {"hash": digest, "length": len(value), "kind": "text"}
+                del result[field]
+            else:
+                refs[field] = None
+
+        for field, summary_keys in self.JSON_FIELDS.items():
+            if field not in result:
+                continue
+            value = result[field]
+            ref = refs.get(field)
+            if ref and value and not self._inline_value(field, ref, value):
+                # Re-saving a document as read: still the offloaded value's summary
+                continue
+            payload = json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+            if value in (None, "", [], {}) or len(payload) <= self.INLINE_LIMIT:
+                refs[field] = None
+                continue
+            digest = self.put(payload)
+            refs[field] = {"hash": digest, "length": len(payload), "kind": "json"}
+            if isinstance(value, dict):
+                result[field] = {key: value[key] for key in summary_keys if key in value}
+            else:
+                del result[field]
+
+        if refs:
+            result[self.REFS_FIELD] = refs
+        return result
+
+    def hydrate(self, docs: List[dict], fields: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        Restore offloaded fields on ``docs`` in place with one batched read
+
+        Args:
+            docs: Documents as returned by the list queries
+            fields: Only restore these fields (default: all offloaded fields)
+
+        Returns:
+            The same list, for chaining
+        """
+        wanted = set(fields) if fields is not None else None
+        pending = []
+        for doc in docs:
+            for field, ref in (doc.get(self.REFS_FIELD) or {}).items():
+                if not ref or (wanted is not None and field not in wanted):
+                    continue
+                # An inline value wins (legacy documents, or the field was
+                # rewritten inline before the reference was cleared)
+                if self._inline_value(field, ref, doc.get(field)):
+                    continue
+                pending.append((doc, field, ref))
+
+        blobs = self.get_many(ref.get("hash") for _, _, ref in pending)
+        for doc, field, ref in pending:
+            payload = blobs.get(ref.get("hash"))
+            if payload is None:
+                continue
+            if ref.get("kind") == "json":
+                doc[field] = json.loads(payload.decode("utf-8"))
+            else:
+                doc[field] = payload.decode("utf-8")
+        return docs
+
+    def _inline_value(self, field: str, ref: dict, value: Any) -> bool:
+        """True when ``value`` is a full inline value rather than an offload placeholder"""
+        if not value:
+            return False
+        if ref.get("kind") != "json":
+            return True
+        # Offloaded JSON leaves only its summary keys inline
+        summary_keys = self.JSON_FIELDS.get(field, ())
+        return not isinstance(value, dict) or not set(value) <= set(summary_keys)
+
+    def load(self, doc: dict, field: str) -> Any:
+        """Single-field convenience wrapper around ``hydrate``"""
+        return self.hydrate([doc], [field])[0].get(field)
@@ -0,0 +1,165 @@
+"""
+Upload Cache - Content-addressed deduplication of uploaded CV files
+
+Every uploaded file is fingerprinted with SHA-256 while it streams in. The
+first submission of a file is parsed, queued for Storage once under its hash
+(uploaded in the background by ``BlobUploader``) and recorded in
+``file_fingerprints`` together with the extracted text (offloaded to the text
+store) and any parsed fields. Later submissions of the same bytes,
+through any upload path, are a single document read. Semantic embeddings of CV
+text are cached the same way in ``text_embeddings``, keyed by SHA-256 of the
+normalized text, so re-submitted CVs are not re-embedded.
+"""
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core.blocking import run_blocking
+from app.core.logging import logger
+from app.services.blob_uploader import BlobUploader
+from app.services.extraction_executor import extraction_executor
+from app.services.text_store import TextStore
+
+
+class UploadCache:
+    """Reuse extraction, parsing, Storage uploads and embeddings for identical files"""
+
+    COLLECTION = "file_fingerprints"
+    EMBEDDINGS = "text_embeddings"
+    BLOB_PREFIX = "uploads"
+    # Firestore allows 500 writes per batch
+    BATCH_SIZE = 400
+
+    def __init__(self, db, texts: TextStore, uploader: Optional[BlobUploader] = None):
+        self.db = db
+        self.texts = texts
+        self.uploader = uploader
+
+    def _ref(self, digest: str):
+        return self.db.collection(self.COLLECTION).document(digest)
+
+    def get(self, digest: str) -> Optional[Dict]:
+        """Cached record for a file hash, with ``extractedText`` restored"""
+        snap = self._ref(digest).get()
+        if not snap.exists:
+            return None
+        record = snap.to_dict() or {}
+        self.texts.hydrate([record], ["extractedText"])
+        return record
+
+    def put(self, digest: str, data: Dict):
+        """Create or extend the record for a file hash"""
+        self._ref(digest).set(self.texts.offload({**data, "sha256": digest}), merge=True)
+
+    def touch(self, digest: str):
+        """Count a repeat submission"""
+        self._ref(digest).update({
+            "submissions": self.db.increment(1),
+            "lastSeenAt": datetime.now()
+        })
+
+    def blob_path(self, digest: str, filename: str) -> str:
+        return f"{self.BLOB_PREFIX}/{digest}{os.path.splitext(filename or '')[1].lower()}"
+
+    async def resolve(self, upload) -> Dict:
+        """
+        Extracted text and Storage URL for a spooled upload, reusing earlier work
+
+        Args:
+            upload: SpooledUpload (provides ``sha256``, ``source`` and ``filename``)
+
+        Returns:
+            Dict with ``sha256``, ``extractedText``, ``fileUrl`` (None until the file
+            has been stored, see ``store_blob``), ``parsed`` and ``cached`` (True when
+            the file had been seen before)
+
+        Raises:
+            ExtractionError: A new file could not be parsed
+        """
+        digest = upload.sha256
+        record = await run_blocking(self.get, digest)
+        if record is not None and "extractedText" in record:
+            await run_blocking(self.touch, digest)
+            return {
+                "sha256": digest,
+                "extractedText": record.get("extractedText") or "",
+                "fileUrl": record.get("fileUrl"),
+                "parsed": record.get("parsed") or {},
+                "cached": True
+            }
+
+        text = await extraction_executor.extract(upload.source, upload.filename)
+        now = datetime.now()
+        await run_blocking(self.put, digest, {
+            "extractedText": text,
+            "fileName": upload.filename,
+            "contentType": upload.content_type,
+            "size": upload.size,
+            "fileUrl": None,
+            "submissions": 1,
+            "firstSeenAt": now,
+            "lastSeenAt": now
+        })
+        return {"sha256": digest, "extractedText": text, "fileUrl": None, "parsed": {}, "cached": False}
+
+    async def store_blob(self, upload, targets: Iterable[Tuple[str, str]] = (),
+                         fingerprinted: bool = True) -> bool:
+        """
+        Queue a file for Storage under its hash without waiting for the transfer
+
+        Call after the documents in ``targets`` have been written; each gets
+        ``fileUrl`` once the upload completes. The caller may close ``upload``
+        as soon as this returns.
+
+        Args:
+            upload: SpooledUpload or StoredUpload
+            targets: (collection, document id) pairs that reference the file
+            fingerprinted: The file has a ``file_fingerprints`` record (it was
+                resolved), which also receives the URL
+
+        Returns:
+            True if an upload was queued
+        """
+        if self.uploader is None:
+            return False
+        if fingerprinted:
+            targets = [(self.COLLECTION, upload.sha256), *targets]
+        try:
+            return await self.uploader.enqueue(upload, self.blob_path(upload.sha256, upload.filename), targets)
+        except Exception as e:
+            logger.warning(f"Could not queue {upload.filename} for Storage: {str(e)}")
+            return False
+
+    def save_parsed(self, digest: str, parsed: Dict):
+        """Remember fields parsed from a file's text (skills, contact details) for reuse"""
+        self._ref(digest).set({"parsed": parsed}, merge=True)
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_embeddings(self, texts: Iterable[str]) -> Dict[str, Any]:
+        """Cached embeddings for normalized texts, in one batched read"""
+        keys = {self.text_key(text): text for text in texts if text}
+        if not keys:
+            return {}
+        collection = self.db.collection(self.EMBEDDINGS)
+        found = {}
+        for snap in self.db.get_all([collection.document(key) for key in keys]):
+            if snap.exists:
+                found[keys[snap.id]] = (snap.to_dict() or {}).get("vector")
+        return {text: vector for text, vector in found.items() if vector}
+
+    def put_embeddings(self, embeddings: Dict[str, Any]):
+        """Store embeddings for normalized texts"""
+        items = list(embeddings.items())
+        collection = self.db.collection(self.EMBEDDINGS)
+        for start in range(0, len(items), self.BATCH_SIZE):
+            batch = self.db.batch()
+            for text, vector in items[start:start + self.BATCH_SIZE]:
+                batch.set(collection.document(self.text_key(text)), {
+                    "vector": [float(v) for v in vector],
+                    "createdAt": datetime.now()
+                })
+            batch.commit()
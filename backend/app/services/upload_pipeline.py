@@ -0,0 +1,446 @@
+"""
+Upload Pipeline - Staged asynchronous processing of uploaded CV files
+
+An upload is accepted once its file has been written to UPLOAD_PIPELINE_DIR
+and its job record to ``upload_jobs``; the request returns at that point
+without waiting for a free worker. Accepted jobs wait in a bounded backlog
+(uploads are refused with 503 when it is full) and then flow through
+extract -> parse -> embed -> persist -> notify. Stages are connected by
+bounded asyncio queues and each has its own worker count, so a slow stage
+applies back-pressure upstream instead of piling up work, and every stage
+reports queue depth, wait time and processing latency. Each job records the
+instance that accepted it; jobs an instance accepted but did not finish are
+picked up again from its local file on that instance's next start.
+"""
+import asyncio
+import os
+import socket
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app.core.blocking import run_blocking
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.logging import logger
+from app.core.models import models
+from app.services.extraction_executor import ExtractionError
+from app.services.notification_service import NotificationService
+from app.storage.base import FieldFilter
+from app.utils.ids import new_id
+from app.utils.text_extraction import SUPPORTED_EXTENSIONS
+from app.utils.uploads import SpooledUpload, StoredUpload
+from async_firebase_service import AsyncFirebaseService
+from firebase_service import FirebaseService
+
+SKILL_KEYWORDS = [
+    'python', 'javascript', 'react', 'node', 'sql', 'aws', 'docker', 'kubernetes', 'git', 'agile',
+    'scrum', 'java', 'c++', 'html', 'css', 'mongodb', 'postgresql', 'redis', 'tensorflow', 'pytorch',
+    'machine learning', 'data science', 'api', 'rest', 'graphql', 'microservices', 'devops', 'ci/cd',
+    'jenkins', 'terraform', 'ansible'
+]
+MAX_SKILLS = 10
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 1)
+
+
+class Stage:
+    """A bounded queue drained by a fixed number of workers running one handler"""
+
+    def __init__(self, name: str, handler: Callable, concurrency: int, queue_size: int,
+                 window: int = 500):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self._wait_ms = deque(maxlen=window)
+        self._latency_ms = deque(maxlen=window)
+
+    def observe(self, wait: float, latency: float):
+        self._wait_ms.append(wait * 1000)
+        self._latency_ms.append(latency * 1000)
+
+    def stats(self) -> dict:
+        waits, latencies = list(self._wait_ms), list(self._latency_ms)
+        return {
+            "concurrency": self.concurrency,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "busy": self.busy,
+            "processed": self.processed,
+            "failed": self.failed,
+            "wait_ms": {"mean": round(sum(waits) / len(waits), 1) if waits else 0.0,
+                        "p95": _percentile(waits, 0.95)},
+            "latency_ms": {"mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                           "p95": _percentile(latencies, 0.95)}
+        }
+
+
+class UploadPipeline:
+    """Durably accept uploads, then extract, parse, embed, persist and notify in stages"""
+
+    COLLECTION = "upload_jobs"
+    # Job fields kept in the job record (the rest only lives in memory while the job runs)
+    RECORD_FIELDS = ("jobId", "owner", "state", "stage", "done", "fileName", "contentType", "size",
+                     "sha256", "path", "form", "notify", "candidateId", "error", "timings",
+                     "createdAt", "updatedAt")
+
+    # Finished jobs kept in memory for ``wait``/``get_job`` callers
+    FINISHED_RETAINED = 1000
+
+    def __init__(self, directory: str, queue_size: int, concurrency: Dict[str, int],
+                 max_backlog: int = 1000, owner: Optional[str] = None):
+        self.directory = directory
+        self.queue_size = queue_size
+        self.concurrency = concurrency
+        self.max_backlog = max_backlog
+        # Files live in this instance's directory, so only this instance can run its jobs
+        self.owner = owner or socket.gethostname()
+        self.stages: List[Stage] = []
+        self._jobs: Dict[str, dict] = {}
+        # Accepted jobs waiting for room in the extract queue
+        self._backlog: deque = deque()
+        self._backlog_ready = asyncio.Event()
+        self._finished: "OrderedDict[str, dict]" = OrderedDict()
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._accepted = 0
+        self._completed = 0
+        self._failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Start the stage workers and resume jobs left unfinished by a previous run"""
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.stages = [
+            Stage(name, getattr(self, f"_{name}"), self.concurrency.get(name, 1), self.queue_size)
+            for name in ("extract", "parse", "embed", "persist", "notify")
+        ]
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.concurrency):
+                self._tasks.append(asyncio.create_task(self._run_stage(index)))
+        self._backlog_ready = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._feed()))
+        self._tasks.append(asyncio.create_task(self._resume()))
+        logger.info("Upload pipeline started")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Unfinished jobs stay recorded as not done and are resumed on the next start
+        self._jobs.clear()
+        self._backlog.clear()
+
+    def _save_job(self, job: dict):
+        job["updatedAt"] = datetime.now()
+        FirebaseService.db.collection(self.COLLECTION).document(job["jobId"]).set(
+            {field: job.get(field) for field in self.RECORD_FIELDS}
+        )
+
+    @staticmethod
+    def public(job: dict) -> dict:
+        """Status view of a job"""
+        return {
+            "jobId": job.get("jobId"),
+            "state": job.get("state"),
+            "stage": job.get("stage"),
+            "candidateId": job.get("candidateId"),
+            "fileName": job.get("fileName"),
+            "error": job.get("error"),
+            "timings": job.get("timings") or {},
+            "createdAt": job.get("createdAt"),
+            "updatedAt": job.get("updatedAt")
+        }
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        """Status of an in-flight or finished job; None if unknown"""
+        job = self._jobs.get(job_id) or self._finished.get(job_id)
+        if job is None:
+            job = await AsyncFirebaseService.get_document(self.COLLECTION, job_id)
+        return self.public(job) if job else None
+
+    async def submit(self, upload: SpooledUpload, form: Dict, notify: bool = False) -> dict:
+        """
+        Accept an upload for processing
+
+        The file is copied to the pipeline directory and the job record written
+        before this returns; the caller may close ``upload`` afterwards. Never
+        waits for the stages to catch up.
+
+        Args:
+            upload: The spooled upload
+            form: CV fields supplied with the upload (name, email, status, ...)
+            notify: Send the candidate an upload confirmation when done
+
+        Returns:
+            Status view of the accepted job
+
+        Raises:
+            ServiceUnavailableException: The backlog of accepted jobs is full
+        """
+        if not self.running:
+            await self.start()
+        if len(self._backlog) >= self.max_backlog:
+            raise ServiceUnavailableException("Upload processing is at capacity, retry shortly")
+        job_id = new_id("UPJ")
+        path = os.path.join(self.directory, f"{job_id}{os.path.splitext(upload.filename)[1].lower()}")
+        await run_blocking(upload.copy_to, path)
+        stored = StoredUpload(path, upload.filename, upload.content_type, upload.size, upload.sha256)
+        now = datetime.now()
+        job = {
+            "jobId": job_id,
+            "owner": self.owner,
+            "state": "accepted",
+            "stage": "receive",
+            "done": False,
+            "fileName": upload.filename,
+            "contentType": upload.content_type,
+            "size": upload.size,
+            "sha256": upload.sha256,
+            "path": path,
+            "form": form,
+            "notify": notify,
+            "candidateId": new_id("CV"),
+            "error": None,
+            "timings": {},
+            "createdAt": now
+        }
+        try:
+            await run_blocking(self._save_job, job)
+        except Exception:
+            await run_blocking(stored.delete)
+            raise
+        self._accepted += 1
+        self._enqueue(job, stored)
+        return self.public(job)
+
+    def _enqueue(self, job: dict, upload: Optional[StoredUpload] = None):
+        job["_upload"] = upload or StoredUpload(
+            job["path"], job["fileName"], job["contentType"], job["size"], job["sha256"]
+        )
+        self._jobs[job["jobId"]] = job
+        queued_at = time.monotonic()
+        if not self._backlog:
+            try:
+                self.stages[0].queue.put_nowait((job, queued_at))
+                return
+            except asyncio.QueueFull:
+                pass
+        # The extract stage is saturated; the feeder hands the job over once it has room
+        self._backlog.append((job, queued_at))
+        self._backlog_ready.set()
+
+    async def _feed(self):
+        while True:
+            await self._backlog_ready.wait()
+            while self._backlog:
+                # Back-pressure: waits while the extract stage is saturated
+                await self.stages[0].queue.put(self._backlog[0])
+                self._backlog.popleft()
+            self._backlog_ready.clear()
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Wait for an in-flight job to finish
+
+        Returns:
+            The finished job, including ``record`` (the saved CV) when it completed;
+            None if the job was not run by this process
+        """
+        job = self._jobs.get(job_id) or self._finished.get(job_id)
+        if job is None:
+            return None
+        if not job["done"]:
+            waiter = self._waiters.setdefault(job_id, asyncio.get_running_loop().create_future())
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        return job
+
+    async def _resume(self):
+        try:
+            docs = await run_blocking(
+                lambda: [doc.to_dict() for doc in FirebaseService.db.collection(self.COLLECTION)
+                         .where(filter=FieldFilter("owner", "==", self.owner))
+                         .where(filter=FieldFilter("done", "==", False)).stream()]
+            )
+        except Exception as e:
+            logger.error(f"Could not load unfinished upload jobs: {str(e)}")
+            return
+        for job in docs:
+            if job.get("jobId") in self._jobs:
+                continue
+            if not job.get("path") or not os.path.exists(job["path"]):
+                job.update(state="failed", done=True, error="Stored upload is missing")
+                await run_blocking(self._save_job, job)
+                continue
+            logger.info(f"Resuming upload job {job['jobId']}")
+            self._enqueue(job)
+
+    async def _run_stage(self, index: int):
+        stage = self.stages[index]
+        while True:
+            job, enqueued_at = await stage.queue.get()
+            try:
+                await self._process(stage, index, job, enqueued_at)
+            except Exception as e:
+                # Bookkeeping failed (e.g. the job record could not be written); keep the worker
+                logger.error(f"Upload job {job['jobId']} could not be completed in {stage.name}: {str(e)}")
+
+    async def _process(self, stage: Stage, index: int, job: dict, enqueued_at: float):
+        started = time.monotonic()
+        job["stage"] = stage.name
+        job["state"] = "processing"
+        stage.busy += 1
+        try:
+            await stage.handler(job)
+        except Exception as e:
+            stage.failed += 1
+            logger.error(f"Upload job {job['jobId']} failed in {stage.name}: {str(e)}")
+            await self._finish(job, error=f"{stage.name}: {str(e)}")
+            return
+        finally:
+            stage.busy -= 1
+        finished = time.monotonic()
+        stage.processed += 1
+        stage.observe(started - enqueued_at, finished - started)
+        job["timings"][stage.name] = round((finished - started) * 1000, 1)
+        if index + 1 < len(self.stages):
+            await self.stages[index + 1].queue.put((job, finished))
+        else:
+            await self._finish(job)
+
+    async def _finish(self, job: dict, error: Optional[str] = None):
+        job["done"] = True
+        job["state"] = "failed" if error else "completed"
+        job["error"] = error
+        if error:
+            self._failed += 1
+        else:
+            self._completed += 1
+        try:
+            await run_blocking(self._save_job, job)
+        except Exception as e:
+            logger.error(f"Could not record upload job {job['jobId']}: {str(e)}")
+        try:
+            await run_blocking(job["_upload"].delete)
+        except Exception as e:
+            logger.warning(f"Could not delete the stored file of upload job {job['jobId']}: {str(e)}")
+        self._jobs.pop(job["jobId"], None)
+        job.pop("_upload", None)
+        job.pop("text", None)
+        self._finished[job["jobId"]] = job
+        while len(self._finished) > self.FINISHED_RETAINED:
+            self._finished.popitem(last=False)
+        waiter = self._waiters.pop(job["jobId"], None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(job)
+
+    async def _extract(self, job: dict):
+        """Text from the extraction pool, or from the content-hash cache for a known file"""
+        upload = job["_upload"]
+        try:
+            resolved = await FirebaseService.uploads.resolve(upload)
+        except ExtractionError as e:
+            if upload.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                raise
+            logger.warning(f"Could not decode {upload.filename}: {str(e)}")
+            resolved = {"extractedText": "Could not extract text from file", "fileUrl": None, "parsed": {}}
+            job["fingerprinted"] = False
+        job["text"] = resolved["extractedText"]
+        job["fileUrl"] = resolved["fileUrl"]
+        job["skills"] = resolved["parsed"].get("skills") or []
+
+    async def _parse(self, job: dict):
+        """Skills by keyword match (once per distinct file) and the CV record"""
+        text = job["text"]
+        if text and not job["skills"]:
+            text_lower = text.lower()
+            job["skills"] = [skill for skill in SKILL_KEYWORDS if skill in text_lower][:MAX_SKILLS]
+            if job["skills"]:
+                await run_blocking(FirebaseService.uploads.save_parsed, job["sha256"], {"skills": job["skills"]})
+
+        job["record"] = {
+            **job["form"],
+            "candidateId": job["candidateId"],
+            "skills": job["skills"] or ["To be updated"],
+            "fileName": job["fileName"],
+            "fileSha256": job["sha256"],
+            "extractedText": text,  # Offloaded to the text store on write
+            "uploadedAt": datetime.now()
+        }
+
+    def _embed_sync(self, record: dict):
+        sentinel = models.get("fair_hire_sentinel")
+        if not sentinel or not sentinel.semantic_model:
+            return
+        key = sentinel.normalize_text(sentinel._get_cv_text(record))
+        if not key or FirebaseService.uploads.get_embeddings([key]):
+            return
+        vector = sentinel.semantic_model.encode([key], show_progress_bar=False)[0]
+        FirebaseService.uploads.put_embeddings({key: vector})
+        sentinel.preload_embeddings({key: vector})
+
+    async def _embed(self, job: dict):
+        """Precompute the CV's semantic embedding for the next analysis run (once models are warm)"""
+        if models.loaded("fair_hire_sentinel"):
+            await run_blocking(self._embed_sync, job["record"])
+
+    async def _persist(self, job: dict):
+        """Write the CV, then queue the file for Storage if it is not stored yet"""
+        job["record"]["fileUrl"] = job["fileUrl"]
+        # Written by id so a job resumed after a crash overwrites rather than duplicates
+        await AsyncFirebaseService.set_cv(job["candidateId"], job["record"])
+        if job["fileUrl"] is None:
+            # The uploader sets fileUrl on the CV once the transfer completes
+            await FirebaseService.uploads.store_blob(
+                job["_upload"], [("cvs", job["candidateId"])], fingerprinted=job.get("fingerprinted", True)
+            )
+
+    async def _notify(self, job: dict):
+        if not job["notify"]:
+            return
+        form = job["form"]
+        if form.get("email"):
+            await NotificationService().notify_cv_uploaded(form.get("name", ""), form["email"])
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "in_flight": len(self._jobs),
+            "backlog": len(self._backlog),
+            "backlog_capacity": self.max_backlog,
+            "accepted": self._accepted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "stages": {stage.name: stage.stats() for stage in self.stages}
+        }
+
+
+upload_pipeline = UploadPipeline(
+    settings.UPLOAD_PIPELINE_DIR,
+    queue_size=settings.UPLOAD_PIPELINE_QUEUE_SIZE,
+    max_backlog=settings.UPLOAD_PIPELINE_BACKLOG,
+    owner=settings.INSTANCE_ID,
+    concurrency={
+        "extract": settings.UPLOAD_EXTRACT_CONCURRENCY,
+        "parse": settings.UPLOAD_PARSE_CONCURRENCY,
+        "embed": settings.UPLOAD_EMBED_CONCURRENCY,
+        "persist": settings.UPLOAD_PERSIST_CONCURRENCY,
+        "notify": settings.UPLOAD_NOTIFY_CONCURRENCY
+    }
+)
@@ -2,12 +2,16 @@
 Real-time notification system using WebSocket
 """
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 import json
 import asyncio
+import time
 from datetime import datetime
+from app.core.config import settings
 from app.core.logging import logger
 
+SEVERITY_RANK = {"critical": 3, "high": 2, "medium": 1, "low": 0}
+
 
 class ConnectionManager:
     """Manage WebSocket connections"""
@@ -103,6 +107,14 @@ class NotificationService:
         }
         await manager.broadcast(message)
     
+    @staticmethod
+    def _bias_fields(bias_data: dict) -> dict:
+        return {
+            "bias_type": bias_data.get("type", "unknown"),
+            "affected_group": bias_data.get("group", "unknown"),
+            "impact": bias_data.get("impact", "medium")
+        }
+    
     @staticmethod
     async def notify_bias_detected(bias_data: dict):
         """Notify when bias is detected"""
@@ -111,14 +123,56 @@ class NotificationService:
             "timestamp": datetime.now().isoformat(),
             "severity": "warning",
             "data": {
-                "bias_type": bias_data.get("type", "unknown"),
-                "affected_group": bias_data.get("group", "unknown"),
-                "impact": bias_data.get("impact", "medium"),
+                **NotificationService._bias_fields(bias_data),
                 "message": f"⚠️ Bias detected in {bias_data.get('type', 'hiring process')}"
             }
         }
         await manager.broadcast(message)
     
+    @staticmethod
+    async def notify_biases_detected(biases: List[dict]):
+        """
+        Notify a digest of detected biases in one message
+        
+        The top-level fields describe the most severe bias, so clients that
+        render single alerts keep working; ``alerts`` lists all of them.
+        """
+        if not biases:
+            return
+        if len(biases) == 1:
+            await NotificationService.notify_bias_detected(biases[0])
+            return
+        worst = max(biases, key=lambda b: SEVERITY_RANK.get(b.get("severity"), 0))
+        types = list(dict.fromkeys(b.get("type", "unknown") for b in biases))
+        message = {
+            "type": "bias_alert",
+            "timestamp": datetime.now().isoformat(),
+            "severity": "warning",
+            "data": {
+                **NotificationService._bias_fields(worst),
+                "count": len(biases),
+                "alerts": [NotificationService._bias_fields(b) for b in biases],
+                "message": f"⚠️ {len(biases)} biases detected: {NotificationService._summarize(types)}"
+            }
+        }
+        await manager.broadcast(message)
+    
+    @staticmethod
+    def _candidate_fields(candidate_data: dict) -> dict:
+        return {
+            "candidate_id": candidate_data.get("candidateId"),
+            "name": candidate_data.get("name"),
+            "ats_score": candidate_data.get("atsScore"),
+            "semantic_score": candidate_data.get("semanticScore")
+        }
+    
+    @staticmethod
+    def _summarize(names: List[str], shown: int = 3) -> str:
+        text = ", ".join(str(name) for name in names[:shown])
+        if len(names) > shown:
+            text += f" and {len(names) - shown} more"
+        return text
+    
     @staticmethod
     async def notify_candidate_rescued(candidate_data: dict):
         """Notify when a candidate is rescued"""
@@ -126,15 +180,32 @@ class NotificationService:
             "type": "candidate_rescued",
             "timestamp": datetime.now().isoformat(),
             "data": {
-                "candidate_id": candidate_data.get("candidateId"),
-                "name": candidate_data.get("name"),
-                "ats_score": candidate_data.get("atsScore"),
-                "semantic_score": candidate_data.get("semanticScore"),
+                **NotificationService._candidate_fields(candidate_data),
                 "message": f"🎯 Rescued: {candidate_data.get('name')} (ATS: {candidate_data.get('atsScore')}%, Semantic: {candidate_data.get('semanticScore', 0)*100:.1f}%)"
             }
         }
         await manager.broadcast(message)
     
+    @staticmethod
+    async def notify_candidates_rescued(candidates: List[dict]):
+        """Notify a digest of rescued candidates in one message"""
+        if not candidates:
+            return
+        if len(candidates) == 1:
+            await NotificationService.notify_candidate_rescued(candidates[0])
+            return
+        names = [c.get("name") for c in candidates]
+        message = {
+            "type": "candidate_rescued",
+            "timestamp": datetime.now().isoformat(),
+            "data": {
+                "count": len(candidates),
+                "candidates": [NotificationService._candidate_fields(c) for c in candidates],
+                "message": f"🎯 Rescued {len(candidates)} candidates: {NotificationService._summarize(names)}"
+            }
+        }
+        await manager.broadcast(message)
+    
     @staticmethod
     async def notify_cv_uploaded(cv_data: dict):
         """Notify when a CV is uploaded"""
@@ -151,3 +222,90 @@ class NotificationService:
 
 
 notification_service = NotificationService()
+
+
+class ProgressReporter:
+    """
+    Rate-limited progress notifications for one analysis run
+    
+    ``update``, ``rescued`` and ``bias`` only record state and never wait on
+    the websockets. A background task broadcasts at most one round of messages
+    per interval: the latest progress (intermediate counts are dropped) plus
+    digests of the candidates rescued and biases found since the last round.
+    Leaving the ``async with`` block sends whatever is still pending.
+    """
+    
+    def __init__(self, total: int, interval: Optional[float] = None,
+                 max_digest_items: Optional[int] = None):
+        self.total = total
+        self.interval = settings.WS_PROGRESS_INTERVAL if interval is None else interval
+        self.max_digest_items = max_digest_items or settings.WS_DIGEST_MAX_ITEMS
+        self.current = 0
+        self.rescued_count = 0
+        self._sent_current: Optional[int] = None
+        self._rescued: List[dict] = []
+        self._biases: List[dict] = []
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._last_flush = 0.0
+    
+    def update(self, current: int, rescued_count: Optional[int] = None):
+        """Record the number of CVs analyzed so far"""
+        self.current = current
+        if rescued_count is not None:
+            self.rescued_count = rescued_count
+        self._dirty.set()
+    
+    def rescued(self, candidate_data: dict):
+        """Record a rescued candidate for the next digest"""
+        self._rescued.append(candidate_data)
+        self.rescued_count += 1
+        self._dirty.set()
+    
+    def bias(self, bias_data: dict):
+        """Record a detected bias for the next digest"""
+        self._biases.append(bias_data)
+        self._dirty.set()
+    
+    async def __aenter__(self) -> "ProgressReporter":
+        self._task = asyncio.create_task(self._run())
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+    
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            wait = self._last_flush + self.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Progress notification failed: {str(e)}")
+    
+    async def flush(self):
+        """Broadcast pending progress and digests now"""
+        self._dirty.clear()
+        self._last_flush = time.monotonic()
+        rescued, self._rescued = self._rescued, []
+        biases, self._biases = self._biases, []
+        
+        for start in range(0, len(rescued), self.max_digest_items):
+            await notification_service.notify_candidates_rescued(
+                rescued[start:start + self.max_digest_items]
+            )
+        if self.total and self.current != self._sent_current:
+            self._sent_current = self.current
+            await notification_service.notify_analysis_progress(
+                self.current, self.total, self.rescued_count
+            )
+        for start in range(0, len(biases), self.max_digest_items):
+            await notification_service.notify_biases_detected(
+                biases[start:start + self.max_digest_items]
+            )
@@ -0,0 +1,236 @@
+"""
+ZIP Ingest Service - Bulk CV import from ZIP archives
+
+Reads the archive's members one at a time straight out of the ZIP (nothing is
+unpacked to disk), runs each through the same text extraction and content-hash
+cache as single uploads on a pool of async workers, parses the texts in batches
+with ``CVFileProcessor`` (one batched NER pass per batch) and persists each
+batch with a single write. A bounded member queue keeps memory proportional to
+the worker count and batch size, not to the archive.
+"""
+import asyncio
+import os
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.blocking import run_blocking
+from app.core.config import settings
+from app.core.exceptions import BadRequestException
+from app.core.logging import logger
+from app.services.extraction_executor import ExtractionError
+from app.utils.ids import new_id
+from app.utils.text_extraction import SUPPORTED_EXTENSIONS
+from app.utils.uploads import SpooledUpload
+from firebase_service import FirebaseService
+
+
+class _MemberTooLarge(Exception):
+    pass
+
+
+class ZipIngestService:
+    """Stream, extract, parse and batch-persist the CVs in a ZIP archive"""
+
+    # Each CV costs one document write plus its counter deltas; stay under 500 writes per batch
+    BATCH_SIZE = 80
+    READ_CHUNK = 1024 * 1024
+
+    def __init__(self, workers: Optional[int] = None, include_ok: bool = True,
+                 max_member_bytes: Optional[int] = None, max_members: Optional[int] = None):
+        self.workers = workers or settings.ZIP_INGEST_WORKERS
+        self.include_ok = include_ok
+        self.max_member_bytes = max_member_bytes or settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        self.max_members = max_members or settings.ZIP_MAX_MEMBERS
+        self.processor = FirebaseService.get_cv_processor()
+        self.results: List[Dict] = []
+        self.stats = {"members": 0, "created": 0, "failed": 0, "skipped": 0, "cached": 0,
+                      "bytes": 0, "batches": 0}
+        self._pending: List[dict] = []
+        # spaCy pipelines are not safe to share across threads; batches are parsed one at a time
+        self._parse_lock = asyncio.Lock()
+
+    def _record(self, result: Dict):
+        if result["status"] == "error":
+            self.stats["failed"] += 1
+            self.results.append(result)
+        elif result["status"] == "skipped":
+            self.stats["skipped"] += 1
+            self.results.append(result)
+        else:
+            self.stats["created"] += 1
+            if self.include_ok:
+                self.results.append(result)
+
+    def _is_cv_member(self, info: zipfile.ZipInfo) -> bool:
+        name = os.path.basename(info.filename)
+        if info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+            return False
+        return True
+
+    def _read_member(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+        """Decompress one member, refusing to inflate past ``max_member_bytes``"""
+        if info.file_size > self.max_member_bytes:
+            raise _MemberTooLarge()
+        data = bytearray()
+        with archive.open(info) as member:
+            while True:
+                chunk = member.read(self.READ_CHUNK)
+                if not chunk:
+                    break
+                data += chunk
+                if len(data) > self.max_member_bytes:
+                    raise _MemberTooLarge()
+        return bytes(data)
+
+    async def _produce(self, archive: zipfile.ZipFile, queue: asyncio.Queue):
+        try:
+            for info in archive.infolist():
+                if not self._is_cv_member(info):
+                    continue
+                if self.stats["members"] >= self.max_members:
+                    # One entry for the rest of the archive keeps the report bounded
+                    self._record({"member": info.filename, "status": "skipped",
+                                  "error": f"Archive exceeds {self.max_members} members; "
+                                           "this and the remaining members were not imported"})
+                    break
+                self.stats["members"] += 1
+                if Path(info.filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                    self._record({"member": info.filename, "status": "skipped",
+                                  "error": "Unsupported file type"})
+                    continue
+                try:
+                    data = await run_blocking(self._read_member, archive, info)
+                except _MemberTooLarge:
+                    self._record({"member": info.filename, "status": "error",
+                                  "error": f"Exceeds the {self.max_member_bytes // (1024 * 1024)}MB file limit"})
+                    continue
+                except Exception as e:
+                    self._record({"member": info.filename, "status": "error",
+                                  "error": f"Could not read member: {str(e)}"})
+                    continue
+                self.stats["bytes"] += len(data)
+                # Back-pressure: blocks while the workers are behind
+                await queue.put((info.filename, data))
+        finally:
+            for _ in range(self.workers):
+                await queue.put(None)
+
+    async def _extract(self, name: str, data: bytes):
+        upload = SpooledUpload(os.path.basename(name), None, spool_max_bytes=len(data))
+        upload.write(data)
+        upload.finish()
+        try:
+            resolved = await FirebaseService.uploads.resolve(upload)
+        except ExtractionError as e:
+            self._record({"member": name, "status": "error", "error": f"Extraction failed: {str(e)}"})
+            return
+        finally:
+            upload.close()
+        if resolved["cached"]:
+            self.stats["cached"] += 1
+        text = resolved["extractedText"].strip()
+        if not text:
+            self._record({"member": name, "status": "error", "error": "No text could be extracted"})
+            return
+        self._pending.append({"member": name, "sha256": upload.sha256, "text": text})
+        if len(self._pending) >= self.BATCH_SIZE:
+            await self._flush()
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            name, data = item
+            try:
+                await self._extract(name, data)
+            except Exception as e:
+                logger.error(f"ZIP ingest failed on {name}: {str(e)}")
+                self._record({"member": name, "status": "error", "error": str(e)})
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        items, self._pending = self._pending, []
+        self.stats["batches"] += 1
+        async with self._parse_lock:
+            parsed = await run_blocking(
+                self.processor.extract_cv_data_batch,
+                [(item["text"], os.path.basename(item["member"])) for item in items]
+            )
+
+        now = datetime.now()
+        batch = {}
+        for item, cv_data in zip(items, parsed):
+            candidate_id = new_id("CV")
+            item["candidateId"] = candidate_id
+            filename = os.path.basename(item["member"])
+            batch[candidate_id] = {
+                **cv_data,
+                "candidateId": candidate_id,
+                "fileName": filename,
+                "file_type": Path(filename).suffix.lower(),
+                "fileSha256": item["sha256"],
+                "extractedText": item["text"],  # Offloaded to the text store on write
+                "status": "under_review",
+                "analyzed": False,
+                "uploadedAt": now,
+                "source": "zip_import",
+                "archivePath": item["member"]
+            }
+        try:
+            await run_blocking(FirebaseService.add_cvs_batch, batch)
+        except Exception as e:
+            logger.error(f"ZIP ingest batch failed: {str(e)}")
+            for item in items:
+                self._record({"member": item["member"], "status": "error", "error": f"Write failed: {str(e)}"})
+            return
+        for item in items:
+            self._record({"member": item["member"], "status": "created", "candidateId": item["candidateId"]})
+
+    async def ingest(self, path: str) -> Dict:
+        """
+        Import every supported CV in a ZIP archive
+
+        Args:
+            path: Path of the archive (e.g. a spooled upload's temp file)
+
+        Returns:
+            Per-member results and throughput stats
+
+        Raises:
+            BadRequestException: The file is not a ZIP archive
+        """
+        started = time.perf_counter()
+        try:
+            archive = await run_blocking(zipfile.ZipFile, path)
+        except zipfile.BadZipFile as e:
+            raise BadRequestException(f"Not a valid ZIP archive: {str(e)}") from e
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        try:
+            workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.workers)]
+            await self._produce(archive, queue)
+            await asyncio.gather(*workers)
+            await self._flush()
+        finally:
+            archive.close()
+        await run_blocking(FirebaseService.metrics.refresh_if_stale)
+
+        elapsed = time.perf_counter() - started
+        self.results.sort(key=lambda r: r["member"])
+        logger.info(
+            f"ZIP ingest: {self.stats['created']} created, {self.stats['failed']} failed, "
+            f"{self.stats['skipped']} skipped in {elapsed:.1f}s"
+        )
+        return {
+            "results": self.results,
+            "stats": {
+                **self.stats,
+                "elapsed_seconds": round(elapsed, 3),
+                "members_per_second": round(self.stats["members"] / elapsed, 1) if elapsed else 0.0
+            }
+        }
@@ -0,0 +1,61 @@
+"""
+Storage backend protocol
+
+The services talk to a small subset of the Firestore client API: collections,
+document references, ``where``/``order_by``/``limit`` queries, write batches,
+transactions, ``get_all`` and ``Increment``. Every backend exposes that subset
+so the same service code runs against Firestore, an in-memory store or SQLite.
+"""
+from typing import Any, Callable, Iterable, List, Protocol
+
+try:
+    from google.cloud.firestore_v1.base_query import FieldFilter
+except ImportError:  # Local backends do not need the Firestore client library
+    class FieldFilter:
+        """Minimal stand-in for ``google.cloud.firestore_v1.base_query.FieldFilter``"""
+
+        def __init__(self, field_path: str, op_string: str, value: Any = None):
+            self.field_path = field_path
+            self.op_string = op_string
+            self.value = value
+
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+
+class Increment:
+    """Numeric field transform applied by the local backends on write"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+class StorageBackend(Protocol):
+    """Collection operations shared by all storage backends"""
+
+    name: str
+
+    def collection(self, name: str) -> Any:
+        """Collection reference supporting document/add/where/order_by/limit/stream"""
+
+    def batch(self) -> Any:
+        """Write batch supporting set/update/delete/commit"""
+
+    def transaction(self) -> Any:
+        """Transaction whose writes are applied atomically on commit"""
+
+    def get_all(self, refs: Iterable[Any]) -> List[Any]:
+        """Snapshots for several document references in one round-trip"""
+
+    def run_transaction(self, func: Callable[[Any], Any]) -> Any:
+        """Run ``func(transaction)`` atomically, retrying on contention, and return its result"""
+
+    def increment(self, amount) -> Any:
+        """Field transform adding ``amount`` to a numeric field"""
+
+    def bucket(self) -> Any:
+        """Blob store supporting blob(path).upload_from_string/public_url"""
+
+    def async_client(self) -> Any:
+        """Awaitable counterpart of this backend's collection API"""
@@ -0,0 +1,34 @@
+"""
+Storage backend selection
+"""
+import os
+from functools import lru_cache
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.storage.base import StorageBackend
+
+
+@lru_cache()
+def get_storage_backend() -> StorageBackend:
+    """Create the storage backend selected by ``STORAGE_BACKEND`` (once per process)"""
+    kind = settings.STORAGE_BACKEND.strip().lower()
+
+    if kind == "memory":
+        from app.storage.memory_backend import MemoryBackend
+        backend = MemoryBackend(bucket_dir=settings.LOCAL_BUCKET_DIR)
+    elif kind == "sqlite":
+        from app.storage.sqlite_backend import SQLiteBackend
+        backend = SQLiteBackend(settings.SQLITE_PATH, bucket_dir=settings.LOCAL_BUCKET_DIR)
+    elif kind == "firestore":
+        from app.storage.firestore_backend import FirestoreBackend
+        backend = FirestoreBackend(
+            credentials_path=settings.GOOGLE_APPLICATION_CREDENTIALS or settings.FIREBASE_SERVICE_ACCOUNT,
+            project_id=settings.FIREBASE_PROJECT_ID,
+            storage_bucket=settings.FIREBASE_STORAGE_BUCKET or os.getenv("FIREBASE_BUCKET")
+        )
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}' (expected firestore, memory or sqlite)")
+
+    logger.info(f"Using {backend.name} storage backend")
+    return backend
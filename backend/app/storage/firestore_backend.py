@@ -0,0 +1,98 @@
+"""
+Firestore storage backend
+
+Thin wrapper around the firebase_admin Firestore client. Collections, batches
+and transactions are the native Firestore objects; the wrapper only adds the
+backend-neutral helpers (``run_transaction``, ``increment``, ``bucket``).
+"""
+import json
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional
+
+import firebase_admin
+from firebase_admin import credentials, firestore, firestore_async, storage
+
+from app.core.logging import logger
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+class FirestoreBackend:
+    """Storage backend for Cloud Firestore and Firebase Storage"""
+
+    name = "firestore"
+
+    def __init__(
+        self,
+        credentials_path: Optional[str] = None,
+        project_id: Optional[str] = None,
+        storage_bucket: Optional[str] = None
+    ):
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(*self._app_args(credentials_path, project_id, storage_bucket))
+        self._client = firestore.client()
+
+    @staticmethod
+    def _app_args(credentials_path, project_id, storage_bucket):
+        cred = None
+        if credentials_path:
+            path = Path(credentials_path)
+            if not path.is_absolute():
+                path = BACKEND_DIR / path
+            if path.exists():
+                cred = credentials.Certificate(str(path))
+                if not project_id:
+                    try:
+                        with open(path, "r", encoding="utf-8") as f:
+                            project_id = json.load(f).get("project_id")
+                    except Exception:
+                        project_id = None
+            else:
+                logger.warning(f"Firebase credentials not found at {path}, using application default")
+        if cred is None:
+            cred = credentials.ApplicationDefault()
+
+        storage_bucket = storage_bucket or (f"{project_id}.appspot.com" if project_id else None)
+        # Normalize accidental Firebase Hosting domain to the actual GCS bucket domain.
+        if storage_bucket and storage_bucket.endswith(".firebasestorage.app"):
+            storage_bucket = storage_bucket.replace(".firebasestorage.app", ".appspot.com")
+
+        options = {}
+        if storage_bucket:
+            options["storageBucket"] = storage_bucket
+        if project_id:
+            options["projectId"] = project_id
+        logger.info(f"Firebase initialized (project={project_id}, bucket={storage_bucket})")
+        return cred, options
+
+    def __getattr__(self, name: str) -> Any:
+        # Anything else (collections(), document(), ...) is the native client API
+        return getattr(self._client, name)
+
+    def collection(self, name: str):
+        return self._client.collection(name)
+
+    def batch(self):
+        return self._client.batch()
+
+    def transaction(self):
+        return self._client.transaction()
+
+    def get_all(self, refs: Iterable[Any], transaction=None) -> List[Any]:
+        return list(self._client.get_all(list(refs), transaction=transaction))
+
+    def run_transaction(self, func: Callable[[Any], Any]) -> Any:
+        return firestore.transactional(func)(self._client.transaction())
+
+    def increment(self, amount):
+        return firestore.Increment(amount)
+
+    def bucket(self):
+        return storage.bucket()
+
+    def async_client(self):
+        return firestore_async.client()
+
+    def close(self):
+        self._client.close()
+
@@ -0,0 +1,505 @@
+"""
+Shared machinery for the local (in-memory and SQLite) storage backends
+
+Implements the Firestore-shaped collection API on top of four primitives a
+concrete store provides: read one document, scan a collection, optionally run
+a query natively, and apply a set of writes atomically.
+"""
+import copy
+import os
+import secrets
+import shutil
+import string
+import threading
+from datetime import datetime, date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.blocking import run_blocking
+from app.storage.base import ASCENDING, DESCENDING, FieldFilter, Increment
+
+_AUTO_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+class NotFoundError(Exception):
+    """Raised when updating a document that does not exist"""
+
+
+def auto_id() -> str:
+    """20 character random id, like Firestore's auto-generated document ids"""
+    return "".join(secrets.choice(_AUTO_ID_ALPHABET) for _ in range(20))
+
+
+def get_field(data: dict, field_path: str, default: Any = None) -> Any:
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
+
+
+_MISSING = object()
+
+
+def _resolve(existing: Any, value: Any) -> Any:
+    """Apply field transforms (Increment) in ``value`` against the stored value"""
+    if isinstance(value, Increment):
+        base = existing if isinstance(existing, (int, float)) and not isinstance(existing, bool) else 0
+        return base + value.value
+    if isinstance(value, dict):
+        current = existing if isinstance(existing, dict) else {}
+        return {key: _resolve(current.get(key), item) for key, item in value.items()}
+    return copy.deepcopy(value)
+
+
+def _merge(existing: dict, data: dict) -> dict:
+    """Recursive merge with Firestore ``set(..., merge=True)`` semantics"""
+    merged = copy.deepcopy(existing)
+    for key, value in data.items():
+        current = merged.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merged[key] = _merge(current, value)
+        else:
+            merged[key] = _resolve(current, value)
+    return merged
+
+
+def _update(existing: dict, data: dict) -> dict:
+    """Apply ``update()`` semantics, where dotted keys address nested fields"""
+    updated = copy.deepcopy(existing)
+    for field_path, value in data.items():
+        parts = field_path.split(".")
+        target = updated
+        for part in parts[:-1]:
+            if not isinstance(target.get(part), dict):
+                target[part] = {}
+            target = target[part]
+        target[parts[-1]] = _resolve(target.get(parts[-1]), value)
+    return updated
+
+
+def _type_rank(value: Any) -> Tuple[int, Any]:
+    """Sort key ordering mixed value types the way Firestore does"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value.timestamp())
+    if isinstance(value, date):
+        return (3, datetime(value.year, value.month, value.day).timestamp())
+    if isinstance(value, str):
+        return (4, value)
+    if isinstance(value, bytes):
+        return (5, value)
+    return (6, repr(value))
+
+
+def matches(data: dict, flt: FieldFilter) -> bool:
+    value = get_field(data, flt.field_path, _MISSING)
+    if value is _MISSING:
+        return False
+    op, expected = flt.op_string, flt.value
+    try:
+        if op == "==":
+            return value == expected
+        if op == "!=":
+            return value != expected
+        if op == "<":
+            return value < expected
+        if op == "<=":
+            return value <= expected
+        if op == ">":
+            return value > expected
+        if op == ">=":
+            return value >= expected
+        if op == "in":
+            return value in expected
+        if op == "not-in":
+            return value not in expected
+        if op == "array_contains":
+            return isinstance(value, list) and expected in value
+        if op == "array_contains_any":
+            return isinstance(value, list) and any(item in value for item in expected)
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def order_and_limit(rows: List[Tuple[str, dict]], orders, limit: Optional[int]) -> List[Tuple[str, dict]]:
+    """Apply ``order_by`` clauses (dropping docs without the field, as Firestore does) and ``limit``"""
+    for field_path, direction in reversed(orders):
+        rows = [row for row in rows if get_field(row[1], field_path, _MISSING) is not _MISSING]
+        rows.sort(
+            key=lambda row: _type_rank(get_field(row[1], field_path)),
+            reverse=direction == DESCENDING
+        )
+    return rows[:limit] if limit is not None else rows
+
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", data: Optional[dict]):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        return get_field(self._data or {}, field_path)
+
+
+class DocumentReference:
+    def __init__(self, store: "LocalDocumentStore", collection_path: str, doc_id: str):
+        self._store = store
+        self._collection_path = collection_path
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self) -> "CollectionReference":
+        return CollectionReference(self._store, self._collection_path)
+
+    def collection(self, name: str) -> "CollectionReference":
+        return CollectionReference(self._store, f"{self.path}/{name}")
+
+    def get(self, transaction=None) -> DocumentSnapshot:
+        with self._store._lock:
+            return DocumentSnapshot(self, self._store._read(self._collection_path, self.id))
+
+    def set(self, data: dict, merge: bool = False):
+        self._store.batch().set(self, data, merge=merge).commit()
+
+    def update(self, data: dict):
+        self._store.batch().update(self, data).commit()
+
+    def delete(self):
+        self._store.batch().delete(self).commit()
+
+
+class Query:
+    def __init__(
+        self,
+        store: "LocalDocumentStore",
+        collection_path: str,
+        filters: Tuple[FieldFilter, ...] = (),
+        orders: Tuple[Tuple[str, str], ...] = (),
+        limit_to: Optional[int] = None
+    ):
+        self._store = store
+        self._collection_path = collection_path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit_to
+
+    def _copy(self, **changes) -> "Query":
+        params = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit_to": self._limit,
+            **changes
+        }
+        return Query(self._store, self._collection_path, **params)
+
+    def where(self, field_path: str = None, op_string: str = None, value: Any = None, *, filter=None) -> "Query":
+        flt = filter if filter is not None else FieldFilter(field_path, op_string, value)
+        return self._copy(filters=self._filters + (flt,))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "Query":
+        return self._copy(orders=self._orders + ((field_path, str(direction)),))
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit_to=count)
+
+    def stream(self, transaction=None) -> Iterator[DocumentSnapshot]:
+        with self._store._lock:
+            rows = list(self._store._query(self._collection_path, self._filters, self._orders, self._limit))
+        for doc_id, data in rows:
+            yield DocumentSnapshot(DocumentReference(self._store, self._collection_path, doc_id), data)
+
+    def get(self, transaction=None) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, store: "LocalDocumentStore", collection_path: str):
+        super().__init__(store, collection_path)
+
+    @property
+    def id(self) -> str:
+        return self._collection_path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._store, self._collection_path, document_id or auto_id())
+
+    def add(self, document_data: dict, document_id: Optional[str] = None):
+        doc_ref = self.document(document_id)
+        doc_ref.set(document_data)
+        return datetime.now(), doc_ref
+
+
+class WriteBatch:
+    def __init__(self, store: "LocalDocumentStore"):
+        self._store = store
+        self._writes: List[Tuple[str, DocumentReference, Optional[dict], bool]] = []
+
+    def set(self, reference: DocumentReference, document_data: dict, merge: bool = False):
+        self._writes.append(("set", reference, document_data, merge))
+        return self
+
+    def update(self, reference: DocumentReference, field_updates: dict):
+        self._writes.append(("update", reference, field_updates, False))
+        return self
+
+    def delete(self, reference: DocumentReference):
+        self._writes.append(("delete", reference, None, False))
+        return self
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        self._store._commit(writes)
+        return []
+
+
+class Transaction(WriteBatch):
+    """Buffers writes; reads go through ``ref.get(transaction=...)`` under the store lock"""
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, DocumentReference):
+            return ref_or_query.get(transaction=self)
+        return ref_or_query.stream(transaction=self)
+
+
+class LocalDocumentStore:
+    """Base class for stores that keep documents in this process"""
+
+    name = "local"
+
+    def __init__(self, bucket_dir: str):
+        self._lock = threading.RLock()
+        self._bucket = LocalBucket(bucket_dir)
+
+    # Primitives implemented by concrete stores ---------------------------
+
+    def _read(self, collection_path: str, doc_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def _scan(self, collection_path: str) -> Iterable[Tuple[str, dict]]:
+        raise NotImplementedError
+
+    def _write_many(self, changes: Dict[Tuple[str, str], Optional[dict]]):
+        """Persist ``{(collection_path, doc_id): data or None}`` atomically"""
+        raise NotImplementedError
+
+    def _query(self, collection_path, filters, orders, limit) -> Iterable[Tuple[str, dict]]:
+        rows = [
+            (doc_id, data)
+            for doc_id, data in self._scan(collection_path)
+            if all(matches(data, flt) for flt in filters)
+        ]
+        return order_and_limit(rows, orders, limit)
+
+    # Backend API ---------------------------------------------------------
+
+    def _commit(self, writes):
+        with self._lock:
+            changes: Dict[Tuple[str, str], Optional[dict]] = {}
+            for op, ref, data, merge in writes:
+                key = (ref._collection_path, ref.id)
+                current = changes[key] if key in changes else self._read(*key)
+                if op == "delete":
+                    changes[key] = None
+                elif op == "update":
+                    if current is None:
+                        raise NotFoundError(f"No document to update: {ref.path}")
+                    changes[key] = _update(current, data)
+                elif merge and current is not None:
+                    changes[key] = _merge(current, data)
+                else:
+                    changes[key] = _resolve(None, dict(data))
+            if changes:
+                self._write_many(changes)
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+    def document(self, path: str) -> DocumentReference:
+        collection_path, doc_id = path.rsplit("/", 1)
+        return DocumentReference(self, collection_path, doc_id)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def transaction(self) -> Transaction:
+        return Transaction(self)
+
+    def get_all(self, references: Iterable[DocumentReference], transaction=None) -> List[DocumentSnapshot]:
+        with self._lock:
+            return [ref.get() for ref in references]
+
+    def run_transaction(self, func: Callable[[Transaction], Any]) -> Any:
+        # Holding the store lock for the whole callback makes it serializable
+        with self._lock:
+            transaction = self.transaction()
+            result = func(transaction)
+            transaction.commit()
+            return result
+
+    def increment(self, amount) -> Increment:
+        return Increment(amount)
+
+    def bucket(self) -> "LocalBucket":
+        return self._bucket
+
+    def async_client(self) -> "AsyncLocalClient":
+        return AsyncLocalClient(self)
+
+    def close(self):
+        pass
+
+
+class LocalBlob:
+    # Default read size when streaming from a file
+    COPY_CHUNK = 1024 * 1024
+
+    def __init__(self, bucket: "LocalBucket", name: str, chunk_size: Optional[int] = None):
+        self.bucket = bucket
+        self.name = name
+        self.chunk_size = chunk_size
+        self.content_type = None
+
+    @property
+    def path(self) -> Path:
+        return self.bucket.path_for(self.name)
+
+    @property
+    def public_url(self) -> str:
+        return self.path.as_uri()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def upload_from_string(self, data, content_type: Optional[str] = None):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.content_type = content_type
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{auto_id()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def upload_from_filename(self, filename: str, content_type: Optional[str] = None):
+        """Copy a file in ``chunk_size`` pieces (like a resumable upload) without reading it whole"""
+        self.content_type = content_type
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{auto_id()}.tmp")
+        try:
+            with open(filename, "rb") as src, open(tmp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, self.chunk_size or self.COPY_CHUNK)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def download_as_bytes(self) -> bytes:
+        return self.path.read_bytes()
+
+    def delete(self):
+        self.path.unlink(missing_ok=True)
+
+
+class LocalBucket:
+    """Directory-backed stand-in for a Cloud Storage bucket"""
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+        self.name = str(self.root)
+
+    def path_for(self, name: str) -> Path:
+        path = (self.root / name.lstrip("/")).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Blob name escapes the bucket: {name}")
+        return path
+
+    def blob(self, name: str, chunk_size: Optional[int] = None) -> LocalBlob:
+        return LocalBlob(self, name, chunk_size=chunk_size)
+
+
+class _AsyncDocumentReference:
+    def __init__(self, ref: DocumentReference):
+        self._ref = ref
+        self.id = ref.id
+        self.path = ref.path
+
+    def collection(self, name: str) -> "_AsyncQuery":
+        return _AsyncQuery(self._ref.collection(name))
+
+    async def get(self, transaction=None) -> DocumentSnapshot:
+        return await run_blocking(self._ref.get)
+
+    async def set(self, data: dict, merge: bool = False):
+        await run_blocking(self._ref.set, data, merge=merge)
+
+    async def update(self, data: dict):
+        await run_blocking(self._ref.update, data)
+
+    async def delete(self):
+        await run_blocking(self._ref.delete)
+
+
+class _AsyncQuery:
+    def __init__(self, query: Query):
+        self._query = query
+
+    def where(self, *args, **kwargs) -> "_AsyncQuery":
+        return _AsyncQuery(self._query.where(*args, **kwargs))
+
+    def order_by(self, *args, **kwargs) -> "_AsyncQuery":
+        return _AsyncQuery(self._query.order_by(*args, **kwargs))
+
+    def limit(self, count: int) -> "_AsyncQuery":
+        return _AsyncQuery(self._query.limit(count))
+
+    def document(self, document_id: Optional[str] = None) -> _AsyncDocumentReference:
+        return _AsyncDocumentReference(self._query.document(document_id))
+
+    async def add(self, document_data: dict, document_id: Optional[str] = None):
+        return await run_blocking(self._query.add, document_data, document_id)
+
+    async def get(self) -> List[DocumentSnapshot]:
+        return await run_blocking(self._query.get)
+
+    async def stream(self):
+        for snapshot in await run_blocking(self._query.get):
+            yield snapshot
+
+
+class AsyncLocalClient:
+    """Awaitable view of a local store, mirroring the Firestore AsyncClient surface we use"""
+
+    def __init__(self, store: LocalDocumentStore):
+        self._store = store
+
+    def collection(self, name: str) -> _AsyncQuery:
+        return _AsyncQuery(self._store.collection(name))
+
+    async def get_all(self, references: Iterable[_AsyncDocumentReference]):
+        for snapshot in await run_blocking(self._store.get_all, [ref._ref for ref in references]):
+            yield snapshot
@@ -0,0 +1,39 @@
+"""
+In-memory storage backend
+
+Keeps every collection in process dictionaries. Used for tests, local
+development and load tests that should not depend on live GCP.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.storage.local import LocalDocumentStore
+
+
+class MemoryBackend(LocalDocumentStore):
+    """Storage backend holding all documents in memory"""
+
+    name = "memory"
+
+    def __init__(self, bucket_dir: str):
+        super().__init__(bucket_dir)
+        self._collections: Dict[str, Dict[str, dict]] = {}
+
+    def _read(self, collection_path: str, doc_id: str) -> Optional[dict]:
+        return self._collections.get(collection_path, {}).get(doc_id)
+
+    def _scan(self, collection_path: str) -> Iterable[Tuple[str, dict]]:
+        return list(self._collections.get(collection_path, {}).items())
+
+    def _write_many(self, changes: Dict[Tuple[str, str], Optional[dict]]):
+        # Stored dicts are replaced, never mutated, so snapshots stay consistent
+        for (collection_path, doc_id), data in changes.items():
+            docs = self._collections.setdefault(collection_path, {})
+            if data is None:
+                docs.pop(doc_id, None)
+            else:
+                docs[doc_id] = data
+
+    def reset(self):
+        """Drop every document (the bucket directory is left alone)"""
+        with self._lock:
+            self._collections.clear()
@@ -0,0 +1,152 @@
+"""
+SQLite storage backend
+
+Stores each document as a JSON row keyed by (collection path, document id).
+Equality filters on scalar values are pushed down to SQLite through
+``json_extract`` (with expression indexes on the hot fields); everything else
+is evaluated in Python by the shared local query engine.
+"""
+import base64
+import json
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.storage.local import LocalDocumentStore, matches, order_and_limit
+
+# Fields queried with equality filters on hot paths
+INDEXED_FIELDS = ("status", "candidateId", "userId", "active", "email")
+
+
+def _json_path(field_path: str) -> str:
+    return "$." + ".".join(f'"{part}"' for part in field_path.split("."))
+
+
+def _field_expr(field_path: str) -> str:
+    # Must match the indexed expression text exactly for SQLite to use the index
+    return f"json_extract(data, '{_json_path(field_path)}')"
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"__type__": "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"__type__": "date", "value": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"__type__": "bytes", "value": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot store value of type {type(value).__name__}")
+
+
+def _decode(obj: dict):
+    kind = obj.get("__type__")
+    if kind == "datetime":
+        return datetime.fromisoformat(obj["value"])
+    if kind == "date":
+        return date.fromisoformat(obj["value"])
+    if kind == "bytes":
+        return base64.b64decode(obj["value"])
+    return obj
+
+
+def dumps(data: dict) -> str:
+    return json.dumps(data, default=_encode, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(text: str) -> dict:
+    return json.loads(text, object_hook=_decode)
+
+
+class SQLiteBackend(LocalDocumentStore):
+    """Storage backend persisting documents in a single SQLite file"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, bucket_dir: str):
+        super().__init__(bucket_dir)
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        # All access is serialized by the store lock, so one shared connection is safe
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " collection TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (collection, id)"
+            ") WITHOUT ROWID"
+        )
+        for field in INDEXED_FIELDS:
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_documents_{field} "
+                f"ON documents (collection, {_field_expr(field)})"
+            )
+
+    def _read(self, collection_path: str, doc_id: str) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?",
+            (collection_path, doc_id)
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def _scan(self, collection_path: str) -> Iterable[Tuple[str, dict]]:
+        rows = self._conn.execute(
+            "SELECT id, data FROM documents WHERE collection = ? ORDER BY id",
+            (collection_path,)
+        )
+        return [(doc_id, loads(data)) for doc_id, data in rows]
+
+    def _query(self, collection_path, filters, orders, limit) -> Iterable[Tuple[str, dict]]:
+        pushed = [
+            flt for flt in filters
+            if flt.op_string == "==" and isinstance(flt.value, (str, int, float, bool))
+        ]
+        if not pushed:
+            return super()._query(collection_path, filters, orders, limit)
+
+        sql = "SELECT id, data FROM documents WHERE collection = ?"
+        params = [collection_path]
+        for flt in pushed:
+            sql += f" AND {_field_expr(flt.field_path)} = ?"
+            params.append(flt.value)
+        remaining = [flt for flt in filters if flt not in pushed]
+        if limit is not None and not remaining and not orders:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = []
+        for doc_id, text in self._conn.execute(sql, params):
+            data = loads(text)
+            # Re-check every filter so pushed-down and in-memory semantics agree
+            if all(matches(data, flt) for flt in filters):
+                rows.append((doc_id, data))
+        return order_and_limit(rows, orders, limit)
+
+    def _write_many(self, changes: Dict[Tuple[str, str], Optional[dict]]):
+        upserts = [(c, i, dumps(data)) for (c, i), data in changes.items() if data is not None]
+        deletes = [(c, i) for (c, i), data in changes.items() if data is None]
+        self._conn.execute("BEGIN")
+        try:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+                    upserts
+                )
+            if deletes:
+                self._conn.executemany(
+                    "DELETE FROM documents WHERE collection = ? AND id = ?",
+                    deletes
+                )
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,7 +1,18 @@
 """
 Background Tasks - Celery tasks for async processing
+
+Each worker process loads the ML models once when it starts and keeps one
+event loop and one AnalysisService for all the tasks it runs. Batch analyses
+fan out: the candidate IDs are written to ``analysis_batches`` in chunks, one
+task per chunk is run in parallel as a chord, and a merge task combines the
+chunk summaries. Task arguments are only the batch id and chunk index.
 """
-from celery import Celery
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from celery import Celery, chord
+from celery.signals import worker_process_init
 from app.core.config import settings
 from app.core.logging import logger
 
@@ -21,8 +32,100 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
+    worker_prefetch_multiplier=1,  # Chunks are long; hand them to idle workers, not queued ones
 )
 
+BATCHES = "analysis_batches"
+BATCH_CHUNKS = "analysis_batch_chunks"
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_analysis_service = None
+
+
+@worker_process_init.connect
+def load_models(**kwargs):
+    """Load the sentence transformer once per worker process, before it takes tasks"""
+    from app.core.models import models
+
+    started = datetime.now()
+    model = models.get("sentence_transformer")
+    elapsed = (datetime.now() - started).total_seconds()
+    logger.info(f"Worker models {'loaded' if model else 'unavailable'} in {elapsed:.1f}s")
+
+
+def run_async(coro):
+    """
+    Run a coroutine on this worker process's event loop
+
+    The loop stays open between tasks, so async clients created on it (Firestore)
+    keep working; ``asyncio.run`` would close it after every task.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+def get_analysis_service():
+    """AnalysisService shared by the tasks of this worker process"""
+    global _analysis_service
+    if _analysis_service is None:
+        from app.services.analysis_service import AnalysisService
+        _analysis_service = AnalysisService()
+    return _analysis_service
+
+
+def _chunk_id(batch_id: str, index: int) -> str:
+    return f"{batch_id}-{index:05d}"
+
+
+def _write_chunks(batch_id: str, candidate_ids: List[str]) -> int:
+    from firebase_service import FirebaseService
+
+    db = FirebaseService.db
+    size = max(1, settings.ANALYSIS_CHUNK_SIZE)
+    chunks = [candidate_ids[start:start + size] for start in range(0, len(candidate_ids), size)]
+    for index, ids in enumerate(chunks):
+        db.collection(BATCH_CHUNKS).document(_chunk_id(batch_id, index)).set({
+            "batchId": batch_id,
+            "index": index,
+            "candidateIds": ids
+        })
+    db.collection(BATCHES).document(batch_id).update({
+        "total": len(candidate_ids),
+        "chunks": len(chunks)
+    })
+    return len(chunks)
+
+
+def create_analysis_batch(job_description: str, candidate_ids: Optional[List[str]] = None) -> str:
+    """
+    Store a batch analysis request so tasks can refer to it by id
+
+    Args:
+        job_description: Job description to match against
+        candidate_ids: Candidates to analyze; None analyzes every CV (listed when the batch starts)
+
+    Returns:
+        Batch id to pass to ``batch_analyze_task``
+    """
+    from firebase_service import FirebaseService
+    from app.utils.ids import new_id
+
+    batch_id = new_id("BATCH")
+    FirebaseService.db.collection(BATCHES).document(batch_id).set({
+        "batchId": batch_id,
+        "jobDescription": job_description,
+        "status": "pending",
+        "total": None,
+        "chunks": None,
+        "createdAt": datetime.now()
+    })
+    if candidate_ids is not None:
+        _write_chunks(batch_id, list(dict.fromkeys(candidate_ids)))
+    return batch_id
+
 
 @celery_app.task(name="analyze_cv_task")
 def analyze_cv_task(candidate_id: str, job_description: str):
@@ -34,11 +137,7 @@ def analyze_cv_task(candidate_id: str, job_description: str):
         job_description: Job description to match against
     """
     try:
-        from app.services.analysis_service import AnalysisService
-        import asyncio
-        
-        service = AnalysisService()
-        result = asyncio.run(service.analyze_cv(candidate_id, job_description))
+        result = run_async(get_analysis_service().analyze_cv(candidate_id, job_description))
         
         logger.info(f"Background analysis complete for {candidate_id}")
         return result
@@ -48,33 +147,112 @@ def analyze_cv_task(candidate_id: str, job_description: str):
         raise
 
 
-@celery_app.task(name="batch_analyze_task")
-def batch_analyze_task(job_description: str, candidate_ids: list = None):
+@celery_app.task(name="batch_analyze_task", bind=True)
+def batch_analyze_task(self, batch_id: str):
     """
     Background task to analyze multiple CVs
+
+    Splits the batch into chunks and replaces itself with a chord of
+    ``analyze_chunk_task`` followed by ``merge_batch_results_task``, so this
+    task's result is the merged batch summary.
     
     Args:
-        job_description: Job description to match against
-        candidate_ids: Optional list of candidate IDs
+        batch_id: Id returned by ``create_analysis_batch``
     """
     try:
-        from app.services.analysis_service import AnalysisService
+        from firebase_service import FirebaseService
+
+        batch = FirebaseService.db.collection(BATCHES).document(batch_id).get().to_dict()
+        if batch is None:
+            raise ValueError(f"Unknown analysis batch: {batch_id}")
+        chunks = batch.get("chunks")
+        if chunks is None:
+            cvs = run_async(get_analysis_service().cv_service.get_all_cvs(limit=1000))
+            chunks = _write_chunks(batch_id, [cv.candidateId for cv in cvs])
+        FirebaseService.db.collection(BATCHES).document(batch_id).update({"status": "running"})
+    except Exception as e:
+        logger.error(f"Batch analysis task failed: {str(e)}")
+        raise
+
+    if not chunks:
+        return merge_batch_results_task([], batch_id)
+    logger.info(f"Batch analysis {batch_id}: {chunks} chunks")
+    # Raises celery's Ignore to hand this task's result over to the chord
+    return self.replace(chord(
+        [analyze_chunk_task.s(batch_id, index) for index in range(chunks)],
+        merge_batch_results_task.s(batch_id)
+    ))
+
+
+@celery_app.task(name="analyze_chunk_task")
+def analyze_chunk_task(batch_id: str, index: int) -> Dict:
+    """
+    Analyze one chunk of a batch
+
+    Failures are reported in the summary rather than raised, so one bad chunk
+    does not keep the merge step from running.
+
+    Returns:
+        Summary: analyzed and failed counts and the rescued candidate IDs
+    """
+    from firebase_service import FirebaseService
+
+    candidate_ids = []
+    try:
+        db = FirebaseService.db
+        job_description = db.collection(BATCHES).document(batch_id).get().to_dict()["jobDescription"]
+        candidate_ids = db.collection(BATCH_CHUNKS).document(_chunk_id(batch_id, index)).get() \
+            .to_dict()["candidateIds"]
+        result = run_async(get_analysis_service().batch_analyze(job_description, candidate_ids))
+        return {
+            "index": index,
+            "analyzed": result["total_analyzed"],
+            "failed": len(candidate_ids) - result["total_analyzed"],
+            "rescued": [item["candidateId"] for item in result["rescued_candidates"]]
+        }
+    except Exception as e:
+        logger.error(f"Batch {batch_id} chunk {index} failed: {str(e)}")
+        return {"index": index, "analyzed": 0, "failed": len(candidate_ids), "rescued": [], "error": str(e)}
+
+
+@celery_app.task(name="merge_batch_results_task")
+def merge_batch_results_task(chunk_results: List[Dict], batch_id: str) -> Dict:
+    """
+    Combine chunk summaries, record the batch outcome and notify the admin
+
+    Args:
+        chunk_results: Summaries returned by ``analyze_chunk_task``
+        batch_id: The batch
+    """
+    try:
+        from firebase_service import FirebaseService
         from app.services.notification_service import NotificationService
-        import asyncio
-        
-        analysis_service = AnalysisService()
-        notification_service = NotificationService()
-        
-        # Run batch analysis
-        result = asyncio.run(
-            analysis_service.batch_analyze(job_description, candidate_ids)
-        )
+
+        rescued = [cid for chunk in chunk_results for cid in chunk["rescued"]]
+        result = {
+            "batch_id": batch_id,
+            "total_analyzed": sum(chunk["analyzed"] for chunk in chunk_results),
+            "failed_count": sum(chunk["failed"] for chunk in chunk_results),
+            "rescued_count": len(rescued),
+            "rescued_candidates": rescued,
+            "chunk_errors": [chunk["error"] for chunk in chunk_results if chunk.get("error")],
+            "status": "completed"
+        }
+
+        db = FirebaseService.db
+        db.collection(BATCHES).document(batch_id).update({
+            "status": "completed",
+            "result": result,
+            "completedAt": datetime.now()
+        })
+        for chunk in chunk_results:
+            db.collection(BATCH_CHUNKS).document(_chunk_id(batch_id, chunk["index"])).delete()
         
         # Send notification to admin
         admin_email = getattr(settings, 'ADMIN_EMAIL', None)
         if admin_email:
-            asyncio.run(
-                notification_service.notify_batch_analysis_complete(
+            run_async(
+                NotificationService().notify_batch_analysis_complete(
                     admin_email,
                     result['total_analyzed'],
                     result['rescued_count']
@@ -85,7 +263,7 @@ def batch_analyze_task(job_description: str, candidate_ids: list = None):
         return result
         
     except Exception as e:
-        logger.error(f"Batch analysis task failed: {str(e)}")
+        logger.error(f"Batch analysis merge failed: {str(e)}")
         raise
 
 
@@ -105,19 +283,18 @@ def send_notification_task(
     """
     try:
         from app.services.notification_service import NotificationService
-        import asyncio
         
         service = NotificationService()
         
         if notification_type == "cv_uploaded":
-            asyncio.run(
+            run_async(
                 service.notify_cv_uploaded(
                     kwargs.get('candidate_name'),
                     recipient_email
                 )
             )
         elif notification_type == "analysis_complete":
-            asyncio.run(
+            run_async(
                 service.notify_analysis_complete(
                     kwargs.get('candidate_name'),
                     recipient_email,
@@ -126,7 +303,7 @@ def send_notification_task(
                 )
             )
         elif notification_type == "candidate_rescued":
-            asyncio.run(
+            run_async(
                 service.notify_candidate_rescued(
                     kwargs.get('candidate_name'),
                     recipient_email,
@@ -153,18 +330,17 @@ def cleanup_old_data_task(days: int = 90):
     try:
         from datetime import datetime, timedelta
         from app.services.cv_service import CVService
-        import asyncio
         
         service = CVService()
         cutoff_date = datetime.now() - timedelta(days=days)
         
         # Get all CVs
-        cvs = asyncio.run(service.get_all_cvs(limit=10000))
+        cvs = run_async(service.get_all_cvs(limit=10000))
         
         deleted_count = 0
         for cv in cvs:
             if cv.uploadedAt < cutoff_date and cv.status == "rejected":
-                asyncio.run(service.delete_cv(cv.candidateId))
+                run_async(service.delete_cv(cv.candidateId))
                 deleted_count += 1
         
         logger.info(f"Cleanup complete: {deleted_count} CVs deleted")
@@ -186,14 +362,11 @@ def generate_report_task(report_type: str, start_date: str, end_date: str):
         end_date: End date for report
     """
     try:
-        from app.services.analysis_service import AnalysisService
-        import asyncio
-        
-        service = AnalysisService()
+        service = get_analysis_service()
         
         # Generate report based on type
         if report_type == "statistics":
-            result = asyncio.run(service.get_analysis_statistics())
+            result = run_async(service.get_analysis_statistics())
         else:
             result = {"error": "Unknown report type"}
         
@@ -0,0 +1,18 @@
+"""
+ID helpers - Readable, collision-free document identifiers
+"""
+import secrets
+from datetime import datetime
+
+
+def new_id(prefix: str) -> str:
+    """
+    Timestamp-prefixed id with 48 random bits, safe across concurrent requests
+
+    Args:
+        prefix: Short type prefix such as ``CV`` or ``APP``
+
+    Returns:
+        e.g. ``CV20250101120000A1B2C3D4E5F6``
+    """
+    return f"{prefix}{datetime.now().strftime('%Y%m%d%H%M%S')}{secrets.token_hex(6).upper()}"
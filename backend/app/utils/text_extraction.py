@@ -0,0 +1,81 @@
+"""
+Text extraction - PDF, DOCX and TXT parsing
+
+Plain module-level functions so they can run inside extraction worker
+processes. ``source`` is either the raw bytes of the document or a path to it.
+"""
+import io
+import os
+import time
+from typing import Union
+
+Source = Union[bytes, bytearray, memoryview, str, os.PathLike]
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.doc', '.txt')
+
+
+def _open(source: Source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    return io.BytesIO(source)
+
+
+def extract_pdf(source: Source) -> str:
+    from PyPDF2 import PdfReader
+
+    with _open(source) as f:
+        reader = PdfReader(f)
+        return "\n".join((page.extract_text() or "") for page in reader.pages).strip()
+
+
+def extract_docx(source: Source) -> str:
+    from docx import Document
+
+    with _open(source) as f:
+        doc = Document(f)
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
+
+
+def extract_plain(source: Source) -> str:
+    """Decode UTF-8 text; raises UnicodeDecodeError for binary content"""
+    with _open(source) as f:
+        return f.read().decode('utf-8')
+
+
+def extract_text(source: Source, filename: str) -> str:
+    """
+    Extract text from a document, dispatching on the file extension
+
+    Args:
+        source: Document bytes or path
+        filename: Original file name (used for the extension)
+
+    Returns:
+        Extracted text; unknown extensions are decoded as UTF-8
+    """
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext == '.pdf':
+        return extract_pdf(source)
+    if ext in ('.docx', '.doc'):
+        return extract_docx(source)
+    return extract_plain(source)
+
+
+def limit_worker_memory(memory_limit_mb: int):
+    """Pool initializer: cap the worker's address space so a pathological file fails with MemoryError"""
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        # Not available on this platform (e.g. Windows); rely on the timeout only
+        pass
+
+
+def timed_extract(source: Source, filename: str):
+    """Worker entry point returning ``(started_at, duration, text)`` for latency metrics"""
+    started = time.time()
+    text = extract_text(source, filename)
+    return started, time.time() - started, text
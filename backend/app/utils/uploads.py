@@ -0,0 +1,228 @@
+"""
+Uploads - Stream multipart files and raw bodies into size-limited spooled temp files
+
+Upload bodies are read in chunks, hashed on the way through and kept in memory
+only up to ``UPLOAD_SPOOL_MAX_BYTES``; anything larger spills to a named
+temporary file so extractors and Storage uploads can work from a path instead
+of a copy of the bytes. Reading stops as soon as ``MAX_UPLOAD_SIZE_MB`` is
+exceeded.
+"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from typing import AsyncIterator, Optional, Union
+
+from fastapi import UploadFile
+
+from app.core.blocking import run_blocking
+from app.core.config import settings
+from app.core.exceptions import PayloadTooLargeException
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class SpooledUpload:
+    """An uploaded file held in memory or in a temp file, with its size and SHA-256"""
+
+    def __init__(self, filename: str, content_type: Optional[str], spool_max_bytes: int):
+        self.filename = filename or "upload"
+        self.content_type = content_type
+        self.size = 0
+        self.spool_max_bytes = spool_max_bytes
+        self.path: Optional[str] = None
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    def _spill(self):
+        suffix = os.path.splitext(self.filename)[1].lower()
+        self._file = tempfile.NamedTemporaryFile(
+            prefix="upload-", suffix=suffix, dir=settings.UPLOAD_TMP_DIR, delete=False
+        )
+        self.path = self._file.name
+        self._file.write(self._buffer.getbuffer())
+        self._buffer = None
+
+    def write(self, chunk: bytes):
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        if self._buffer is not None and self.size > self.spool_max_bytes:
+            self._spill()
+        target = self._file if self._file is not None else self._buffer
+        target.write(chunk)
+
+    def finish(self):
+        if self._file is not None:
+            self._file.close()
+
+    @property
+    def source(self) -> Union[str, memoryview]:
+        """Path of the spilled file, or a zero-copy view of the in-memory buffer"""
+        return self.path if self.path is not None else self._buffer.getbuffer()
+
+    def read_bytes(self) -> bytes:
+        if self.path is not None:
+            with open(self.path, "rb") as f:
+                return f.read()
+        return self._buffer.getvalue()
+
+    def copy_to(self, destination: str):
+        """Write the upload to a local path"""
+        if self.path is not None:
+            shutil.copyfile(self.path, destination)
+        else:
+            with open(destination, "wb") as f:
+                f.write(self._buffer.getbuffer())
+
+    def upload_to_blob(self, blob) -> str:
+        """Upload to a Storage blob from the temp file when spilled; returns its public URL"""
+        if self.path is not None:
+            blob.upload_from_filename(self.path, content_type=self.content_type)
+        else:
+            blob.upload_from_string(self._buffer.getvalue(), content_type=self.content_type)
+        return blob.public_url
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self._file = None
+        if self._buffer is not None:
+            try:
+                self._buffer.close()
+            except BufferError:
+                # A memoryview from ``source`` is still alive; let GC reclaim the buffer
+                pass
+            self._buffer = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class StoredUpload:
+    """An accepted upload kept at a durable path, usable wherever a SpooledUpload is read"""
+
+    def __init__(self, path: str, filename: str, content_type: Optional[str], size: int, sha256: str):
+        self.path = path
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.sha256 = sha256
+
+    @property
+    def source(self) -> str:
+        return self.path
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def copy_to(self, destination: str):
+        shutil.copyfile(self.path, destination)
+
+    def upload_to_blob(self, blob) -> str:
+        blob.upload_from_filename(self.path, content_type=self.content_type)
+        return blob.public_url
+
+    def delete(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def spool_stream(
+    chunks: AsyncIterator[bytes],
+    filename: str,
+    content_type: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    spool_max_bytes: Optional[int] = None
+) -> SpooledUpload:
+    """
+    Stream raw bytes (e.g. ``request.stream()``) into a SpooledUpload
+
+    Args:
+        chunks: Async iterator over the body
+        filename: Name to record for the upload (its extension picks the temp file suffix)
+        content_type: Content type to record
+        max_bytes: Size limit (default: MAX_UPLOAD_SIZE_MB)
+        spool_max_bytes: Size kept in memory before spilling to disk
+
+    Returns:
+        The spooled upload; the caller must ``close()`` it (or use ``async with``)
+
+    Raises:
+        PayloadTooLargeException: The body exceeds ``max_bytes``
+    """
+    if max_bytes is None:
+        max_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+    upload = SpooledUpload(
+        filename,
+        content_type,
+        settings.UPLOAD_SPOOL_MAX_BYTES if spool_max_bytes is None else spool_max_bytes
+    )
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            if upload.size + len(chunk) > max_bytes:
+                raise PayloadTooLargeException(
+                    f"{upload.filename} exceeds the {max_bytes // (1024 * 1024)}MB upload limit"
+                )
+            if upload.in_memory and upload.size + len(chunk) <= upload.spool_max_bytes:
+                upload.write(chunk)
+            else:
+                await run_blocking(upload.write, chunk)
+        upload.finish()
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
+
+async def _read_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def spool_upload(
+    file: UploadFile,
+    max_bytes: Optional[int] = None,
+    spool_max_bytes: Optional[int] = None
+) -> SpooledUpload:
+    """
+    Stream an UploadFile into a SpooledUpload
+
+    Args:
+        file: Incoming upload
+        max_bytes: Size limit (default: MAX_UPLOAD_SIZE_MB)
+        spool_max_bytes: Size kept in memory before spilling to disk
+
+    Returns:
+        The spooled upload; the caller must ``close()`` it (or use ``async with``)
+
+    Raises:
+        PayloadTooLargeException: The upload exceeds ``max_bytes``
+    """
+    return await spool_stream(
+        _read_chunks(file), file.filename, file.content_type, max_bytes, spool_max_bytes
+    )
@@ -0,0 +1,124 @@
+from app.core.blocking import run_blocking
+from app.storage.base import FieldFilter
+from firebase_service import FirebaseService, db
+
+# Firestore AsyncClient, or an awaitable view of the local backend
+async_db = db.async_client()
+
+
+class AsyncFirebaseService:
+    """Non-blocking counterpart of FirebaseService for async endpoints and services.
+
+    Reads go through the backend's async client. Writes that must stay transactional
+    with the dashboard counters, and Storage uploads (which have no async client),
+    run on the bounded blocking-IO thread pool.
+    """
+    db = async_db
+
+    @staticmethod
+    async def _find_cv_doc(candidate_id):
+        """Same resolution as FirebaseService (lookup table, then field query)"""
+        doc_id = await run_blocking(
+            FirebaseService.index.resolve, doc_ids=[candidate_id], candidate_id=candidate_id
+        )
+        if doc_id is None:
+            return None
+        doc = await async_db.collection('cvs').document(doc_id).get()
+        return doc if doc.exists else None
+
+    @staticmethod
+    async def get_cv(candidate_id):
+        doc = await AsyncFirebaseService._find_cv_doc(candidate_id)
+        if doc is None:
+            return None
+        cv_dict = doc.to_dict()
+        if not FirebaseService._is_candidate_cv_doc(cv_dict, doc.id):
+            return None
+        cv_dict['id'] = doc.id
+        return cv_dict
+
+    @staticmethod
+    async def get_all_cvs(status=None):
+        query = async_db.collection('cvs')
+        if status:
+            query = query.where(filter=FieldFilter('status', '==', status))
+        cvs = []
+        async for doc in query.stream():
+            cv_dict = doc.to_dict()
+            if not FirebaseService._is_candidate_cv_doc(cv_dict, doc.id):
+                continue
+            cv_dict['id'] = doc.id
+            cvs.append(cv_dict)
+        return cvs
+
+    @staticmethod
+    async def get_user_cvs(user_id):
+        query = async_db.collection('cvs').where(filter=FieldFilter('userId', '==', user_id))
+        cvs = []
+        async for doc in query.stream():
+            cv_dict = doc.to_dict()
+            if FirebaseService._is_candidate_cv_doc(cv_dict, doc.id):
+                cv_dict['id'] = doc.id
+                cvs.append(cv_dict)
+        return cvs
+
+    @staticmethod
+    async def add_cv(cv_data, doc_id=None):
+        return await run_blocking(FirebaseService.add_cv, cv_data, doc_id)
+
+    @staticmethod
+    async def set_cv(doc_id, cv_data, merge=False):
+        return await run_blocking(FirebaseService.set_cv, doc_id, cv_data, merge)
+
+    @staticmethod
+    async def update_cv(candidate_id, update_data):
+        return await run_blocking(FirebaseService.update_cv, candidate_id, update_data)
+
+    @staticmethod
+    async def delete_cv(candidate_id):
+        return await run_blocking(FirebaseService.delete_cv, candidate_id)
+
+    @staticmethod
+    async def get_document(collection, doc_id):
+        doc = await async_db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    @staticmethod
+    async def set_document(collection, doc_id, data, merge=False):
+        await async_db.collection(collection).document(doc_id).set(data, merge=merge)
+
+    @staticmethod
+    async def update_document(collection, doc_id, data):
+        await async_db.collection(collection).document(doc_id).update(data)
+
+    @staticmethod
+    async def add_job_posting(job_data):
+        await async_db.collection('job_postings').document(job_data['job_id']).set(job_data)
+
+    @staticmethod
+    async def get_job_posting(job_id):
+        return await AsyncFirebaseService.get_document('job_postings', job_id)
+
+    @staticmethod
+    async def get_all_job_postings():
+        return [doc.to_dict() async for doc in async_db.collection('job_postings').stream()]
+
+    @staticmethod
+    async def update_job_posting(job_id, updates):
+        await AsyncFirebaseService.update_document('job_postings', job_id, updates)
+
+    @staticmethod
+    def _upload_blob(path, contents, content_type=None):
+        blob = FirebaseService.bucket.blob(path)
+        blob.upload_from_string(contents, content_type=content_type)
+        return blob.public_url
+
+    @staticmethod
+    async def upload_blob(path, contents, content_type=None):
+        """Upload bytes to Firebase Storage without blocking the event loop"""
+        return await run_blocking(AsyncFirebaseService._upload_blob, path, contents, content_type)
+
+    @staticmethod
+    async def upload_file(path, upload):
+        """Upload a SpooledUpload to Firebase Storage, streaming from its temp file when spilled"""
+        return await run_blocking(upload.upload_to_blob, FirebaseService.bucket.blob(path))
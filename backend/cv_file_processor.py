@@ -1,27 +1,112 @@
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import json
 import re
+import threading
+from app.core.config import settings
+from app.services.extraction_cache import ExtractionCache
 try:
     import pytesseract
     from PIL import Image
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     OCR_AVAILABLE = True
 except ImportError:
     OCR_AVAILABLE = False
 
-try:
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
-    NLP_AVAILABLE = True
-except:
-    nlp = None
-    NLP_AVAILABLE = False
-    print("Warning: spaCy not loaded. Using basic CV parsing.")
+# A page whose text layer is shorter than this is treated as a scanned image
+MIN_PAGE_TEXT_CHARS = 50
+
+
+class ExtractionFailed(Exception):
+    """Text extraction failed; ``text`` is what could be recovered (or a placeholder)"""
+
+    def __init__(self, text):
+        super().__init__(text)
+        self.text = text
+
+
+def _ocr_pdf_page(file_path, page_number, dpi):
+    """Rasterize a single PDF page and OCR it (both run as external processes)"""
+    images = convert_from_path(
+        file_path, dpi=dpi, first_page=page_number, last_page=page_number, grayscale=True
+    )
+    return "\n".join(pytesseract.image_to_string(image) for image in images)
+
+# Only the entity recognizer is used: drop the tagger/parser/lemmatizer so each
+# call runs just tok2vec + ner
+SPACY_EXCLUDE = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+# Characters of a CV given to NER; names come from the first NER_NAME_CHARS
+NER_CHARS = 1000
+NER_NAME_CHARS = 500
+
+_nlp = None
+_nlp_loaded = False
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """spaCy NER pipeline, imported and loaded on first use; None if spaCy is unavailable"""
+    global _nlp, _nlp_loaded
+    if _nlp_loaded:
+        return _nlp
+    with _nlp_lock:
+        if not _nlp_loaded:
+            try:
+                import spacy
+                _nlp = spacy.load("en_core_web_sm", exclude=SPACY_EXCLUDE)
+            except Exception:
+                _nlp = None
+                print("Warning: spaCy not loaded. Using basic CV parsing.")
+            _nlp_loaded = True
+    return _nlp
+
+# Bump when extraction output changes in a way the source fingerprint below
+# cannot see (e.g. a parser library upgrade)
+EXTRACTOR_VERSION = 1
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+
+def extractor_version():
+    """Fingerprint of this module's source, the spaCy model and the OCR settings"""
+    digest = hashlib.sha256()
+    with open(__file__, 'rb') as f:
+        digest.update(f.read())
+    try:
+        from importlib.metadata import version
+        spacy_model = version("en_core_web_sm")
+    except Exception:
+        spacy_model = None
+    digest.update(repr((
+        spacy_model, OCR_AVAILABLE, settings.OCR_DPI, settings.OCR_MAX_PAGES, settings.OCR_TARGET_CHARS
+    )).encode())
+    return f"{EXTRACTOR_VERSION}-{digest.hexdigest()[:16]}"
+
+
+def get_extraction_cache():
+    """Process-wide extraction cache (in memory only when EXTRACTION_CACHE_PATH is unset)"""
+    global _extraction_cache
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            path = settings.EXTRACTION_CACHE_PATH or ":memory:"
+            try:
+                _extraction_cache = ExtractionCache(path, extractor_version())
+            except Exception as e:
+                print(f"Warning: Could not open extraction cache at {path}: {e}")
+                _extraction_cache = ExtractionCache(":memory:", extractor_version())
+        return _extraction_cache
 
 class CVFileProcessor:
-    def __init__(self, cv_folder_path=None):
+    # Per-folder record of file metadata (size, mtime -> hash); extraction results
+    # live in the extraction cache, keyed by hash
+    MANIFEST_NAME = '.cv_manifest.json'
+    MANIFEST_VERSION = 2
+    
+    def __init__(self, cv_folder_path=None, cache=None):
         # Use absolute path to sample_cvs folder by default
         if cv_folder_path is None:
             # Get the path of this file (cv_file_processor.py)
@@ -31,6 +116,7 @@ class CVFileProcessor:
         
         self.cv_folder_path = cv_folder_path
         self.supported_formats = ['.txt', '.pdf', '.docx', '.doc', '.jpg', '.jpeg', '.png']
+        self.cache = cache if cache is not None else get_extraction_cache()
         print(f"✓ CV Processor initialized - looking for CVs in: {self.cv_folder_path}")
     
     def extract_text_from_txt(self, file_path):
@@ -39,32 +125,67 @@ class CVFileProcessor:
                 return file.read()
         except Exception as e:
             print(f"Error reading TXT {file_path}: {e}")
-            return ""
+            raise ExtractionFailed("")
     
-    def extract_text_from_pdf_ocr(self, file_path):
-        """Extract text from PDF using OCR for image-based PDFs"""
+    def extract_text_from_pdf_ocr(self, file_path, page_texts=None):
+        """Extract text from PDF using OCR for image-based PDFs
+        
+        Pages are rasterized one at a time at OCR_DPI and OCR'd in parallel,
+        pages that already have a text layer (``page_texts``) are kept as-is,
+        and no further pages are started once OCR_TARGET_CHARS is reached.
+        """
         if not OCR_AVAILABLE:
-            return "[OCR not available - install pytesseract and pdf2image]"
+            raise ExtractionFailed("[OCR not available - install pytesseract and pdf2image]")
         
         try:
-            # Convert PDF to images
-            pages = convert_from_path(file_path)
-            text = ""
+            page_texts = list(page_texts or [])
+            if not page_texts:
+                page_count = int(pdfinfo_from_path(file_path).get('Pages', 0))
+                page_texts = [''] * page_count
+            page_texts = page_texts[:settings.OCR_MAX_PAGES]
             
-            for page in pages:
-                # Use OCR to extract text from each page
-                page_text = pytesseract.image_to_string(page)
-                text += page_text + "\n"
+            pending = [
+                number for number, text in enumerate(page_texts, start=1)
+                if len(text.strip()) < MIN_PAGE_TEXT_CHARS
+            ]
+            results = {number: text for number, text in enumerate(page_texts, start=1)}
+            recovered = sum(len(text.strip()) for text in page_texts)
+            failed_pages = 0
             
-            return text
+            pool = ThreadPoolExecutor(max_workers=max(1, settings.OCR_WORKERS))
+            try:
+                # Keep at most one page per worker in flight so we can stop early
+                in_flight = []
+                while (pending or in_flight) and recovered < settings.OCR_TARGET_CHARS:
+                    while pending and len(in_flight) < max(1, settings.OCR_WORKERS):
+                        number = pending.pop(0)
+                        in_flight.append((number, pool.submit(_ocr_pdf_page, file_path, number, settings.OCR_DPI)))
+                    number, future = in_flight.pop(0)
+                    try:
+                        results[number] = future.result()
+                    except Exception as e:
+                        print(f"OCR failed on page {number} of {file_path}: {e}")
+                        failed_pages += 1
+                        continue
+                    recovered += len(results[number].strip())
+            finally:
+                # Return without waiting for pages still being OCR'd once the target
+                # is reached; they finish in the background and are discarded
+                pool.shutdown(wait=False, cancel_futures=True)
+            
+            text = "\n".join(results[number] for number in sorted(results) if results[number])
         except Exception as e:
             print(f"Error with OCR extraction from {file_path}: {e}")
-            return "[OCR extraction failed]"
+            raise ExtractionFailed("[OCR extraction failed]")
+        if failed_pages:
+            # Partial text is usable now, but must not be cached as the file's text
+            raise ExtractionFailed(text)
+        return text
     
     def extract_text_from_image(self, file_path):
         """Extract text from image files using OCR"""
         if not OCR_AVAILABLE:
-            return "[OCR not available - install pytesseract]"
+            raise ExtractionFailed("[OCR not available - install pytesseract]")
         
         try:
             image = Image.open(file_path)
@@ -72,9 +193,17 @@ class CVFileProcessor:
             return text
         except Exception as e:
             print(f"Error reading image {file_path}: {e}")
-            return ""
+            raise ExtractionFailed("")
     
     def extract_text_from_file(self, file_path):
+        """Text of a CV file; on failure, whatever was recovered or a placeholder"""
+        try:
+            return self.extract_text_or_raise(file_path)
+        except ExtractionFailed as e:
+            return e.text
+    
+    def extract_text_or_raise(self, file_path):
+        """Text of a CV file; raises ExtractionFailed (carrying the fallback text) on failure"""
         file_ext = Path(file_path).suffix.lower()
         
         if file_ext == '.txt':
@@ -85,16 +214,17 @@ class CVFileProcessor:
                 import PyPDF2
                 with open(file_path, 'rb') as file:
                     pdf_reader = PyPDF2.PdfReader(file)
-                    text = ""
-                    for page in pdf_reader.pages:
-                        text += page.extract_text()
+                    page_texts = [page.extract_text() or "" for page in pdf_reader.pages]
+                    text = "".join(page_texts)
                     
-                    # If no text extracted, try OCR
-                    if len(text.strip()) < 50:
+                    # If no text extracted, OCR the pages without a text layer
+                    if len(text.strip()) < MIN_PAGE_TEXT_CHARS:
                         print(f"PDF appears to be image-based, trying OCR...")
-                        text = self.extract_text_from_pdf_ocr(file_path)
+                        text = self.extract_text_from_pdf_ocr(file_path, page_texts)
                     
                     return text
+            except ExtractionFailed:
+                raise
             except Exception as e:
                 print(f"PDF extraction failed, trying OCR: {e}")
                 return self.extract_text_from_pdf_ocr(file_path)
@@ -109,42 +239,119 @@ class CVFileProcessor:
                 return text
             except Exception as e:
                 print(f"Error reading DOCX {file_path}: {e}")
-                return "[DOCX extraction failed]"
+                raise ExtractionFailed("[DOCX extraction failed]")
         
         elif file_ext in ['.jpg', '.jpeg', '.png']:
             return self.extract_text_from_image(file_path)
         
         return "[Unsupported file format]"
     
-    def scan_cv_folder(self):
-        cv_files = []
+    def _manifest_path(self):
+        return os.path.join(self.cv_folder_path, self.MANIFEST_NAME)
+    
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path(), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == self.MANIFEST_VERSION:
+                return manifest
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable CV manifest: {e}")
+        return {'version': self.MANIFEST_VERSION, 'files': {}}
+    
+    def _save_manifest(self, manifest):
+        path = self._manifest_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write CV manifest: {e}")
+    
+    def _iter_cv_files(self):
+        """Supported CV files in the folder, from directory metadata only"""
         if not os.path.exists(self.cv_folder_path):
-            return cv_files
-        
-        for filename in os.listdir(self.cv_folder_path):
-            if filename.startswith('.') or filename == 'README.md':
-                continue
-                
-            file_path = os.path.join(self.cv_folder_path, filename)
-            file_ext = Path(filename).suffix.lower()
-            
-            if file_ext in self.supported_formats and os.path.isfile(file_path):
-                text_content = self.extract_text_from_file(file_path)
-                cv_files.append({
-                    'filename': filename,
-                    'file_path': file_path,
-                    'file_type': file_ext,
-                    'text_content': text_content,
-                    'file_size': os.path.getsize(file_path),
+            return
+        with os.scandir(self.cv_folder_path) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or entry.name == 'README.md':
+                    continue
+                if Path(entry.name).suffix.lower() in self.supported_formats and entry.is_file():
+                    yield entry
+    
+    @staticmethod
+    def _file_hash(file_path):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _scan(self):
+        """
+        Scan the folder, extracting text only from content the cache has not seen
+        
+        Returns (cv_files, cached): the CV file records and the extraction cache
+        entries for their hashes (``parsed`` is None for files not yet parsed)
+        """
+        manifest = self._load_manifest()
+        known = manifest['files']
+        current = {}
+        changed = False
+        
+        for entry in self._iter_cv_files():
+            stat = entry.stat()
+            record = known.get(entry.name)
+            if not record or record.get('size') != stat.st_size or record.get('mtime') != stat.st_mtime_ns:
+                # New or touched file: only hash it, extraction is keyed by content
+                record = {'sha256': self._file_hash(entry.path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+                changed = True
+            current[entry.name] = (entry.path, record)
+        
+        cached = self.cache.get_many(record['sha256'] for _, record in current.values())
+        new_texts = {}
+        cv_files = []
+        for filename, (file_path, record) in current.items():
+            file_hash = record['sha256']
+            if file_hash not in cached:
+                try:
+                    text = new_texts[file_hash] = self.extract_text_or_raise(file_path)
+                except ExtractionFailed as e:
+                    # Used for this scan only; the file is extracted again next time
+                    text = e.text
+                cached[file_hash] = {
+                    'text_content': text,
+                    'parsed': None,
                     'processed_at': datetime.now().isoformat()
-                })
+                }
+            cv_files.append({
+                'filename': filename,
+                'file_path': file_path,
+                'file_type': Path(filename).suffix.lower(),
+                'text_content': cached[file_hash]['text_content'],
+                'file_size': record['size'],
+                'sha256': file_hash,
+                'processed_at': cached[file_hash]['processed_at']
+            })
+        
+        if new_texts:
+            self.cache.put_texts(new_texts)
+        if changed or len(current) != len(known):
+            manifest['files'] = {filename: record for filename, (_, record) in current.items()}
+            self._save_manifest(manifest)
+        return cv_files, cached
+    
+    def scan_cv_folder(self):
+        cv_files, _ = self._scan()
         return cv_files
     
     def get_cv_count_by_format(self):
-        cv_files = self.scan_cv_folder()
         format_count = {}
-        for cv in cv_files:
-            file_type = cv['file_type']
+        for entry in self._iter_cv_files():
+            file_type = Path(entry.name).suffix.lower()
             format_count[file_type] = format_count.get(file_type, 0) + 1
         return format_count
     
@@ -196,28 +403,46 @@ class CVFileProcessor:
         
         return name, position
     
-    def extract_cv_data_with_ml(self, text_content, filename):
-        """Use ML models (spaCy NER) and regex patterns to extract candidate information"""
+    @staticmethod
+    def _entities(doc):
+        """First PERSON (near the top of the CV) and GPE entity of one NER doc"""
+        entities = {}
+        if doc is None:
+            return entities
+        for ent in doc.ents:
+            if ent.label_ == 'PERSON' and ent.start_char < NER_NAME_CHARS:
+                entities.setdefault('PERSON', ent.text)
+            elif ent.label_ == 'GPE':  # Geo-political entity
+                entities.setdefault('GPE', ent.text)
+        return entities
+    
+    def extract_cv_data_with_ml(self, text_content, filename, doc=None):
+        """Use ML models (spaCy NER) and regex patterns to extract candidate information
+        
+        ``doc`` is a precomputed NER doc of the CV's first NER_CHARS characters
+        (see ``extract_cv_data_batch``); otherwise one is computed here.
+        """
         try:
             name, position = self.extract_candidate_info_from_text(text_content, filename)
             
-            # Extract using spaCy NER if available
+            # One NER pass serves both the location and the name lookup
+            nlp = get_nlp() if doc is None else None
+            if nlp is not None:
+                doc = nlp(text_content[:NER_CHARS])
+            entities = self._entities(doc)
+            
             email = self._extract_email(text_content)
             phone = self._extract_phone(text_content)
             age = self._extract_age(text_content)
             gender = self._extract_gender(text_content)
             experience = self._extract_experience(text_content)
-            location = self._extract_location(text_content, nlp if NLP_AVAILABLE else None)
+            location = self._extract_location(text_content, entities)
             education = self._extract_education(text_content)
             skills = self._extract_skills(text_content)
             
             # If name not found from filename, try NER
-            if name == 'Unknown Candidate' and NLP_AVAILABLE:
-                doc = nlp(text_content[:500])  # First 500 chars usually have name
-                for ent in doc.ents:
-                    if ent.label_ == 'PERSON':
-                        name = ent.text
-                        break
+            if name == 'Unknown Candidate' and entities.get('PERSON'):
+                name = entities['PERSON']
             
             # Generate email if not found
             if not email:
@@ -328,13 +553,10 @@ class CVFileProcessor:
         
         return 3  # Default
     
-    def _extract_location(self, text, nlp_model):
-        """Extract location using NER and regex"""
-        if nlp_model:
-            doc = nlp_model(text[:1000])
-            for ent in doc.ents:
-                if ent.label_ == 'GPE':  # Geo-political entity
-                    return ent.text
+    def _extract_location(self, text, entities=None):
+        """Extract location using NER entities and regex"""
+        if entities and entities.get('GPE'):
+            return entities['GPE']
         
         # Fallback: look for common location patterns
         locations = ['bangalore', 'mumbai', 'delhi', 'hyderabad', 'pune', 'chennai', 
@@ -455,15 +677,54 @@ class CVFileProcessor:
             'skills': skills
         }
     
+    def extract_cv_data_batch(self, items):
+        """
+        Parse many CVs, running NER over them in batches with ``nlp.pipe``
+        
+        Args:
+            items: List of (text_content, filename) pairs
+        
+        Returns:
+            List of candidate dicts, in input order
+        """
+        if not items:
+            return []
+        docs = [None] * len(items)
+        nlp = get_nlp()
+        if nlp is not None:
+            try:
+                docs = list(nlp.pipe(
+                    (text[:NER_CHARS] for text, _ in items),
+                    batch_size=settings.SPACY_BATCH_SIZE,
+                    n_process=settings.SPACY_N_PROCESS
+                ))
+            except Exception as e:
+                print(f"Batched NER failed, parsing CVs one by one: {e}")
+        return [
+            self.extract_cv_data_with_ml(text, filename, doc=doc)
+            for (text, filename), doc in zip(items, docs)
+        ]
+    
     def process_cvs_for_analysis(self):
-        cv_files = self.scan_cv_folder()
+        cv_files, cached = self._scan()
         processed_cvs = []
         
         print(f"🤖 Processing {len(cv_files)} CVs with ML-based extraction (spaCy NER + regex)...")
         
+        # Use ML models to extract candidate information for content not parsed before,
+        # batching NER over all of it (results are kept in the extraction cache)
+        unparsed = {}
+        for cv in cv_files:
+            if cached[cv['sha256']]['parsed'] is None:
+                unparsed.setdefault(cv['sha256'], cv)
+        parsed = self.extract_cv_data_batch([(cv['text_content'], cv['filename']) for cv in unparsed.values()])
+        new_parsed = dict(zip(unparsed, parsed))
+        for file_hash, cv_data in new_parsed.items():
+            cached[file_hash]['parsed'] = cv_data
+        parsed_new = len(new_parsed)
+        
         for i, cv in enumerate(cv_files):
-            # Use ML models to extract all candidate information
-            cv_data = self.extract_cv_data_with_ml(cv['text_content'], cv['filename'])
+            cv_data = cached[cv['sha256']]['parsed']
             
             # Assign realistic status based on age and experience to simulate bias
             age = cv_data.get('age', 30)
@@ -513,5 +774,7 @@ class CVFileProcessor:
             }
             processed_cvs.append(cv_analysis_data)
         
-        print(f"✓ Processed {len(processed_cvs)} CVs successfully using ML models")
+        if new_parsed:
+            self.cache.put_parsed(new_parsed)
+        print(f"✓ Processed {len(processed_cvs)} CVs successfully using ML models ({parsed_new} newly parsed)")
         return processed_cvs
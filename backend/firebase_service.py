@@ -1,9 +1,14 @@
-import firebase_admin
-from firebase_admin import credentials, firestore, storage
-from google.cloud.firestore_v1.base_query import FieldFilter
 from datetime import datetime
-import json
-import os
+
+from app.core.config import settings
+from app.services.alert_store import AlertStore
+from app.services.blob_uploader import BlobUploader
+from app.services.candidate_index import CandidateIndex
+from app.services.metrics_materializer import MetricsMaterializer
+from app.services.text_store import TextStore
+from app.services.upload_cache import UploadCache
+from app.storage.base import FieldFilter
+from app.storage.factory import get_storage_backend
 
 try:
     from cv_file_processor import CVFileProcessor
@@ -12,40 +17,12 @@ except ImportError:
     CV_PROCESSOR_AVAILABLE = False
     print("CV file processor not available - install PyPDF2 and python-docx")
 
-# Initialize Firebase Admin SDK
-cred_path = r"D:\Echelon\backend\service-account-key.json"
-cred = credentials.Certificate(cred_path)
-
-configured_bucket = os.getenv("FIREBASE_STORAGE_BUCKET") or os.getenv("FIREBASE_BUCKET")
-project_id = os.getenv("FIREBASE_PROJECT_ID")
-
-# Try to derive project_id from service account if env isn't set.
-if not project_id:
-    try:
-        with open(cred_path, "r", encoding="utf-8") as f:
-            service_account = json.load(f)
-            project_id = service_account.get("project_id")
-    except Exception:
-        project_id = None
-
-storage_bucket = configured_bucket or (f"{project_id}.appspot.com" if project_id else None)
-
-# Normalize accidental Firebase Hosting domain to the actual GCS bucket domain.
-if storage_bucket and storage_bucket.endswith(".firebasestorage.app"):
-    storage_bucket = storage_bucket.replace(".firebasestorage.app", ".appspot.com")
-
-init_options = {}
-if storage_bucket:
-    init_options["storageBucket"] = storage_bucket
-if project_id:
-    init_options["projectId"] = project_id
+# Firestore, in-memory or SQLite, selected by STORAGE_BACKEND
+db = get_storage_backend()
+bucket = db.bucket()
 
-firebase_admin.initialize_app(cred, init_options)
-
-print(f"Firebase initialized (project={project_id}, bucket={storage_bucket})")
-
-db = firestore.client()
-bucket = storage.bucket()
+# Created on first use and reused, so its extraction cache stays open
+_cv_processor = None
 
 class FirebaseService:
     db = db  # Class attribute for external access
@@ -69,11 +46,19 @@ class FirebaseService:
         doc_ref = db.collection('metrics').document('dashboard')
         doc = doc_ref.get()
         return doc.to_dict() if doc.exists else None
+
+    @staticmethod
+    def get_dashboard_snapshot():
+        """Materialized dashboard metrics, maintained incrementally on every CV write"""
+        snapshot = FirebaseService.metrics.refresh_if_stale() or FirebaseService.get_metrics()
+        if not snapshot or 'counters' not in snapshot:
+            # First run (or legacy sample doc): bootstrap the counters once from the cvs collection
+            snapshot = FirebaseService.metrics.rebuild_counters()
+        return snapshot
     
     @staticmethod
-    def get_alerts():
-        alerts_ref = db.collection('alerts').where(filter=FieldFilter('active', '==', True))
-        return [alert.to_dict() for alert in alerts_ref.stream()]
+    def get_alerts(types=None):
+        return FirebaseService.alerts.get_active(types)
     
     @staticmethod
     def get_rescued_candidates():
@@ -87,8 +72,151 @@ class FirebaseService:
         return doc.to_dict() if doc.exists else None
     
     @staticmethod
-    def add_cv(cv_data):
-        return db.collection('cvs').add(cv_data)
+    def add_cv(cv_data, doc_id=None):
+        """Create a CV document and update the dashboard counters in one transaction"""
+        cvs_ref = db.collection('cvs')
+        doc_ref = cvs_ref.document(doc_id) if doc_id else cvs_ref.document()
+        FirebaseService.metrics.write_cv(doc_ref, FirebaseService.texts.offload(cv_data))
+        FirebaseService.metrics.refresh_if_stale()
+        return doc_ref
+
+    @staticmethod
+    def set_cv(doc_id, cv_data, merge=False):
+        """Write a CV document by id, keeping the dashboard counters in sync"""
+        doc_ref = db.collection('cvs').document(doc_id)
+        result = FirebaseService.metrics.write_cv(doc_ref, FirebaseService.texts.offload(cv_data), merge=merge)
+        FirebaseService.metrics.refresh_if_stale()
+        return result
+
+    @staticmethod
+    def add_cvs_batch(cvs):
+        """
+        Create many CV documents in one write batch, counters and lookup entries included
+
+        Args:
+            cvs: Mapping of document id -> CV data; ids must be new
+        """
+        cvs = {doc_id: FirebaseService.texts.offload(cv_data) for doc_id, cv_data in cvs.items()}
+        batch = db.batch()
+        for doc_id, cv_data in cvs.items():
+            batch.set(db.collection('cvs').document(doc_id), cv_data)
+        FirebaseService.metrics.add_deltas_to_batch(batch, cvs)
+        batch.commit()
+
+    @staticmethod
+    def _find_cv_ref(candidate_id):
+        """Resolve a CV reference by document id or candidateId field"""
+        doc_id = FirebaseService.index.resolve(doc_ids=[candidate_id], candidate_id=candidate_id)
+        return db.collection('cvs').document(doc_id) if doc_id else None
+
+    @staticmethod
+    def resolve_cv_id(doc_id='', candidate_id='', user_id='', file_name='', email='', name=''):
+        """Canonical CV document id for any combination of identifiers, in one read"""
+        return FirebaseService.index.resolve(
+            doc_ids=[doc_id, candidate_id],
+            candidate_id=candidate_id,
+            user_id=user_id,
+            file_name=file_name,
+            email=email,
+            name=name
+        )
+
+    @staticmethod
+    def get_cv(candidate_id):
+        doc_ref = FirebaseService._find_cv_ref(candidate_id)
+        if doc_ref is None:
+            return None
+        cv_dict = doc_ref.get().to_dict()
+        if not FirebaseService._is_candidate_cv_doc(cv_dict, doc_ref.id):
+            return None
+        cv_dict['id'] = doc_ref.id
+        return cv_dict
+
+    @staticmethod
+    def get_cvs_by_ids(candidate_ids):
+        """
+        Fetch many CVs in one batched read
+
+        Args:
+            candidate_ids: Document ids or candidateIds
+
+        Returns:
+            Mapping of requested id -> CV data (with ``id``); unknown ids are left out
+        """
+        candidate_ids = list(dict.fromkeys(candidate_ids))
+        found = {}
+        snaps = db.get_all([db.collection('cvs').document(cid) for cid in candidate_ids]) if candidate_ids else []
+        for snap in snaps:
+            cv_dict = snap.to_dict() if snap.exists else None
+            if cv_dict and FirebaseService._is_candidate_cv_doc(cv_dict, snap.id):
+                cv_dict['id'] = snap.id
+                found[snap.id] = cv_dict
+        # CVs created with auto ids are only reachable through the lookup table
+        for cid in candidate_ids:
+            if cid not in found:
+                cv_dict = FirebaseService.get_cv(cid)
+                if cv_dict:
+                    found[cid] = cv_dict
+        return found
+
+    @staticmethod
+    def update_cvs_batch(updates, current):
+        """
+        Update many existing CV documents in one write batch, counters included
+
+        Args:
+            updates: Mapping of document id -> fields to update
+            current: Mapping of document id -> the document as read (for counter deltas)
+
+        Returns:
+            Ids of the CVs that no longer exist; nothing is written for them
+
+        Each CV costs one document write plus its lookup and counter writes;
+        keep a call to about 150 CVs to stay under the 500 writes per batch.
+        A CV deleted since it was read fails the batch (updates never create
+        documents), so the chunk is then written CV by CV.
+        """
+        updates = {doc_id: FirebaseService.texts.offload(data) for doc_id, data in updates.items()}
+        batch = db.batch()
+        after = {}
+        for doc_id, data in updates.items():
+            fields = {key: value for key, value in data.items() if key != TextStore.REFS_FIELD}
+            # Dotted paths so the update leaves the other offloaded fields' refs alone
+            for field, ref in (data.get(TextStore.REFS_FIELD) or {}).items():
+                fields[f"{TextStore.REFS_FIELD}.{field}"] = ref
+            batch.update(db.collection('cvs').document(doc_id), fields)
+            after[doc_id] = {**current[doc_id], **data}
+        FirebaseService.metrics.add_deltas_to_batch(batch, after, before=current)
+        try:
+            batch.commit()
+            missing = []
+        except Exception:
+            missing = [
+                doc_id for doc_id, data in updates.items()
+                if FirebaseService.metrics.write_cv(
+                    db.collection('cvs').document(doc_id), data, merge=True, require_existing=True
+                ) is None
+            ]
+        FirebaseService.metrics.refresh_if_stale()
+        return missing
+
+    @staticmethod
+    def update_cv(candidate_id, update_data):
+        doc_ref = FirebaseService._find_cv_ref(candidate_id)
+        if doc_ref is None:
+            return None
+        result = FirebaseService.metrics.write_cv(doc_ref, FirebaseService.texts.offload(update_data), merge=True)
+        FirebaseService.metrics.refresh_if_stale()
+        return result
+
+    @staticmethod
+    def delete_cv(candidate_id):
+        doc_ref = FirebaseService._find_cv_ref(candidate_id)
+        if doc_ref is None:
+            return False
+        FirebaseService.metrics.write_cv(doc_ref, delete=True)
+        FirebaseService.metrics.refresh_if_stale()
+        return True
     
     @staticmethod
     def get_cvs():
@@ -113,21 +241,27 @@ class FirebaseService:
             cvs.append(cv_dict)
         return cvs
     
+    @staticmethod
+    def get_cv_processor():
+        """Shared CVFileProcessor for the sample_cvs folder"""
+        global _cv_processor
+        if _cv_processor is None:
+            _cv_processor = CVFileProcessor()
+        return _cv_processor
+    
     @staticmethod
     def get_cvs_from_files():
         """Get CVs from the sample_cvs folder with ML-powered extraction"""
         if not CV_PROCESSOR_AVAILABLE:
             return []
-        processor = CVFileProcessor()
-        return processor.process_cvs_for_analysis()
+        return FirebaseService.get_cv_processor().process_cvs_for_analysis()
     
     @staticmethod
     def get_cv_file_stats():
         """Get statistics about CV files in the folder"""
         if not CV_PROCESSOR_AVAILABLE:
             return {'total_files': 0, 'format_breakdown': {}, 'last_scanned': datetime.now().isoformat()}
-        processor = CVFileProcessor()
-        format_count = processor.get_cv_count_by_format()
+        format_count = FirebaseService.get_cv_processor().get_cv_count_by_format()
         total_files = sum(format_count.values())
         return {
             'total_files': total_files,
@@ -251,4 +385,22 @@ class FirebaseService:
         
         for cv in cvs:
             cv['uploadedAt'] = datetime.now()
-            db.collection('cvs').add(cv)
+            FirebaseService.add_cv(cv)
+
+        FirebaseService.metrics.rebuild_counters()
+
+
+FirebaseService.metrics = MetricsMaterializer(db, FirebaseService._is_candidate_cv_doc)
+FirebaseService.index = CandidateIndex(db)
+FirebaseService.texts = TextStore(db)
+FirebaseService.alerts = AlertStore(db, ttl_days=settings.ALERT_TTL_DAYS)
+FirebaseService.blobs = BlobUploader(
+    db, bucket, settings.BLOB_UPLOAD_DIR,
+    workers=settings.BLOB_UPLOAD_WORKERS,
+    queue_size=settings.BLOB_UPLOAD_QUEUE_SIZE,
+    max_attempts=settings.BLOB_UPLOAD_MAX_ATTEMPTS,
+    backoff_seconds=settings.BLOB_UPLOAD_BACKOFF_SECONDS,
+    chunk_size=settings.BLOB_UPLOAD_CHUNK_MB * 1024 * 1024
+)
+FirebaseService.uploads = UploadCache(db, FirebaseService.texts, FirebaseService.blobs)
+FirebaseService.metrics.write_hooks.append(FirebaseService.index.stage)
@@ -1,17 +1,33 @@
-from fastapi import FastAPI, File, UploadFile, Form, BackgroundTasks, Body, HTTPException, WebSocket
+from fastapi import FastAPI, File, UploadFile, Form, Body, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from firebase_service import FirebaseService
+from async_firebase_service import AsyncFirebaseService
+from app.core.blocking import blocking_executor, run_blocking
+from app.core.config import settings
+from app.core.exceptions import AppException, app_exception_handler
+from app.core.response_cache import SingleFlightCache
+from app.services.analysis_jobs import AnalysisCancelled, AnalysisJob, AnalysisJobManager
+from app.services.cv_folder_watcher import create_watcher
+from app.services.extraction_executor import ExtractionError, extraction_executor
+from app.services.text_store import TextStore
+from app.services.upload_pipeline import upload_pipeline
+from app.utils.text_extraction import SUPPORTED_EXTENSIONS
+from app.utils.ids import new_id
+from app.core.loop_monitor import loop_monitor
+from app.core.models import models
+from app.core.middleware import BodySizeLimitMiddleware
+from app.utils.uploads import spool_upload
 from ats_analysis import ATSAnalysisService
-from ml_fair_hire_sentinel import FairHireSentinel
 import json
 from datetime import datetime
 import asyncio
 import os
 from dotenv import load_dotenv
 from uuid import uuid4
-from google.cloud.firestore_v1.base_query import FieldFilter
+from app.storage.base import FieldFilter
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +37,9 @@ FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:3000")
 
 app = FastAPI(title="Fair-Hire Sentinel API")
 
+# BadRequest (400), PayloadTooLarge (413), ServiceUnavailable (503), ... as their own status codes
+app.add_exception_handler(AppException, app_exception_handler)
+
 # Include v1 API router
 try:
     from app.api.v1.api import api_router
@@ -29,14 +48,18 @@ try:
 except Exception as e:
     print(f"Warning: Could not mount v1 API: {e}")
 
-# Initialize ML-powered Fair-Hire Sentinel with local ML models
-try:
-    print("Initializing Fair-Hire Sentinel with local ML models...")
-    ml_sentinel = FairHireSentinel()
-    print("✓ Fair-Hire Sentinel ready")
-except Exception as e:
-    print(f"Warning: Could not initialize ML Sentinel: {e}")
-    ml_sentinel = None
+# ML-powered Fair-Hire Sentinel with local ML models. torch/sklearn are only
+# imported when it is first built: by the startup warmup or the first request
+# that needs it, whichever comes first.
+def _load_ml_sentinel():
+    from ml_fair_hire_sentinel import FairHireSentinel
+    return FairHireSentinel(semantic_model=models.get("sentence_transformer"))
+
+models.register("fair_hire_sentinel", _load_ml_sentinel)
+
+def get_ml_sentinel():
+    """The shared FairHireSentinel, loading it if warmup has not yet (None if it failed to load)"""
+    return models.get("fair_hire_sentinel")
 
 app.add_middleware(
     CORSMiddleware,
@@ -46,6 +69,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized multipart uploads before they are buffered (1MB allowance for form fields)
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=(settings.MAX_UPLOAD_SIZE_MB + 1) * 1024 * 1024)
+
 class MetricData(BaseModel):
     title: str
     value: str
@@ -118,137 +144,180 @@ def read_root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up and serving, whether or not models have loaded"""
     return {
         "status": "healthy",
         "service": "fair-hire-sentinel-backend",
         "version": "1.0.0"
     }
 
-@app.get("/api/home", response_model=HomePageData)
-def get_home_data():
-    # Try to get data from Firebase, fallback to static data
+# One batch analysis at a time; repeated start requests join the running job
+analysis_jobs = AnalysisJobManager(FirebaseService.db)
+
+# Optional drop-folder ingestion (CV_WATCH_ENABLED)
+cv_watcher = create_watcher() if settings.CV_WATCH_ENABLED else None
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    loop_monitor.start()
+    await upload_pipeline.start()
+    await FirebaseService.blobs.start()
+    if cv_watcher:
+        cv_watcher.start()
+
+@app.on_event("startup")
+async def build_candidate_index():
+    """Backfill the candidate lookup table if it predates the stored CVs (full scan, first run only)"""
     try:
-        firebase_metrics = FirebaseService.get_metrics()
-        firebase_alerts = FirebaseService.get_alerts()
-        firebase_candidates = FirebaseService.get_rescued_candidates()
-        firebase_analytics = FirebaseService.get_analytics()
-        
-        if firebase_metrics and firebase_alerts:
-            return HomePageData(
-                metrics=[
-                    MetricData(title="Total Candidates", value=str(firebase_metrics['totalCandidates']['value']), delta=firebase_metrics['totalCandidates']['delta']),
-                    MetricData(title="ATS Rejections", value=str(firebase_metrics['atsRejections']['value']), delta=firebase_metrics['atsRejections']['delta'], trend="down"),
-                    MetricData(title="Rescued Candidates", value=str(firebase_metrics['rescuedCandidates']['value']), delta=firebase_metrics['rescuedCandidates']['delta']),
-                    MetricData(title="Active Bias Alerts", value=str(firebase_metrics['activeBiasAlerts']['value']), delta=firebase_metrics['activeBiasAlerts']['delta'])
-                ],
-                alerts=[AlertData(**alert) for alert in firebase_alerts],
-                rescued_candidates=[CandidateData(id=c['id'], age_group=c['ageGroup'], gender=c['gender'], keywords=c['keywords'], score=c['score']) for c in firebase_candidates],
-                age_stats=firebase_analytics['ageStats'] if firebase_analytics else {},
-                gender_stats=firebase_analytics['genderStats'] if firebase_analytics else {}
-            )
+        if await run_blocking(FirebaseService.index.ensure_built):
+            print("✓ Candidate lookup index built")
     except Exception as e:
-        print(f"Firebase error: {e}")
-    
-    # Generate dynamic alerts based on actual ML analysis
+        print(f"Warning: Could not build candidate lookup index: {e}")
+
+@app.on_event("startup")
+async def warm_up_models():
+    """Load ML models in the background, or before serving when WARMUP_MODE=eager"""
+    if settings.WARMUP_MODE == "eager":
+        await models.warmup()
+    else:
+        app.state.warmup_task = asyncio.create_task(models.warmup())
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 until the warmup has loaded every required model"""
+    ready = models.ready()
+    body = {"status": "ready" if ready else "warming_up", "models": models.status()}
+    return body if ready else JSONResponse(status_code=503, content=body)
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    loop_monitor.stop()
+    await upload_pipeline.stop()
+    await FirebaseService.blobs.stop()
+    if analysis_jobs.current:
+        analysis_jobs.cancel(analysis_jobs.current.job_id)
+    extraction_executor.shutdown()
+    if cv_watcher:
+        cv_watcher.stop()
+
+@app.get("/api/metrics/event-loop")
+async def event_loop_metrics():
+    """Event loop lag and blocking thread pool saturation"""
+    return {
+        "eventLoopLag": loop_monitor.stats(),
+        "blockingPool": blocking_executor.stats()
+    }
+
+@app.get("/api/metrics/cv-watcher")
+async def cv_watcher_metrics():
+    """Drop-folder watcher backlog, ingestion lag and counters"""
+    if not cv_watcher:
+        return {"running": False, "enabled": False}
+    return {"enabled": True, **cv_watcher.stats()}
+
+@app.get("/api/metrics/upload-pipeline")
+async def upload_pipeline_metrics():
+    """Per-stage queue depth, wait time and latency of the upload pipeline"""
+    return upload_pipeline.stats()
+
+@app.get("/api/metrics/blob-uploads")
+async def blob_upload_metrics():
+    """Queue depth, retries and throughput of background Storage uploads"""
+    return FirebaseService.blobs.stats()
+
+@app.get("/api/metrics/extraction")
+async def extraction_metrics():
+    """Document extraction pool queue/extract latency and failure counts"""
+    return extraction_executor.stats()
+
+def _metric_from_snapshot(snapshot: dict, key: str, title: str) -> MetricData:
+    metric = snapshot.get(key) or {}
+    return MetricData(
+        title=title,
+        value=str(metric.get('value', 0)),
+        delta=str(metric.get('delta', '--')),
+        trend=metric.get('trend', 'up')
+    )
+
+def _alert_from_doc(alert: dict) -> AlertData:
+    """Build an AlertData from a stored alert, tolerating the different alert shapes we persist"""
+    return AlertData(
+        type=str(alert.get('type') or 'info'),
+        title=str(alert.get('title') or 'Alert'),
+        description=str(alert.get('description') or ''),
+        affected=str(alert.get('affected') or alert.get('affected_count') or ''),
+        recommendation=str(alert.get('recommendation') or '')
+    )
+
+def _candidate_from_doc(candidate: dict, idx: int) -> CandidateData:
+    raw_id = str(candidate.get('id') or candidate.get('candidateId') or '')
+    digits = ''.join(ch for ch in raw_id.split('_')[-1] if ch.isdigit())
+    return CandidateData(
+        id=int(digits) if digits else idx,
+        age_group=str(candidate.get('ageGroup') or candidate.get('age_group') or 'Unknown'),
+        gender=str(candidate.get('gender') or 'Unknown'),
+        keywords=str(candidate.get('keywords') or 'N/A'),
+        score=int(candidate.get('score') or 0)
+    )
+
+async def _read_with_timeout(name: str, func, default=None):
+    """Run one blocking dashboard read off the loop; a slow or failing read degrades to ``default``"""
     try:
-        # Get all CVs from Firestore only; avoid expensive file re-processing on each poll.
-        all_cvs = FirebaseService.get_all_cvs()
-        
-        # Calculate real metrics
-        total_candidates = len(all_cvs)
-        rejected_count = len([cv for cv in all_cvs if cv.get('status') == 'rejected'])
-        shortlisted_count = len([cv for cv in all_cvs if cv.get('status') in ['shortlisted', 'under_review']])
-        
-        # Run quick bias analysis
-        bias_detected = False
-        bias_score = 0.0
-        affected_candidates = 0
-        bias_keywords = []
-        
-        if ml_sentinel and total_candidates > 0:
-            # Check for age-based bias
-            older_candidates = [cv for cv in all_cvs if cv.get('age', 0) > 45 and cv.get('experience', 0) > 10]
-            older_rejected = len([cv for cv in older_candidates if cv.get('status') == 'rejected'])
-            
-            if len(older_candidates) > 0:
-                older_rejection_rate = older_rejected / len(older_candidates)
-                overall_rejection_rate = rejected_count / total_candidates if total_candidates > 0 else 0
-                
-                # If older candidates have >25% higher rejection rate, flag bias
-                if older_rejection_rate > overall_rejection_rate + 0.25:
-                    bias_detected = True
-                    bias_score = older_rejection_rate - overall_rejection_rate
-                    affected_candidates = older_rejected
-                    bias_keywords = ['age_discrimination', 'experience_bias']
-        
-        # Build alerts based on real data
-        alerts = []
-        if bias_detected and affected_candidates > 0:
-            alerts.append(AlertData(
-                type="warning",
-                title="🟡 Age-Based Bias Detected in Hiring Process",
-                description=f"Candidates over 45 with 10+ years experience show {int(bias_score*100)}% higher rejection rate than average.",
-                affected=f"{affected_candidates} highly experienced candidates (age 45+, 10+ years exp)",
-                recommendation="Review rejection criteria - high experience should be valued, not penalized"
-            ))
-        
-        # Check for semantic mismatch bias
-        semantic_issues = 0
-        for cv in all_cvs[:20]:  # Sample check
-            if cv.get('status') == 'rejected':
-                skills = cv.get('skills', [])
-                if len(skills) > 5 and cv.get('experience', 0) > 5:
-                    semantic_issues += 1
-        
-        if semantic_issues > 3:
-            alerts.append(AlertData(
+        return await asyncio.wait_for(run_blocking(func), timeout=settings.HOME_READ_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"Warning: dashboard read '{name}' timed out after {settings.HOME_READ_TIMEOUT}s")
+    except Exception as e:
+        print(f"Warning: dashboard read '{name}' failed: {e}")
+    return default
+
+async def _load_home_data() -> HomePageData:
+    # Counts, rejection rates and age/gender buckets are materialized on every CV write,
+    # so the metrics are a single document read instead of a full collection scan.
+    # The four reads are independent, so they are issued together.
+    snapshot, firebase_alerts, firebase_candidates, firebase_analytics = await asyncio.gather(
+        _read_with_timeout('snapshot', FirebaseService.get_dashboard_snapshot, {}),
+        _read_with_timeout('alerts', FirebaseService.get_alerts, []),
+        _read_with_timeout('rescued', FirebaseService.get_rescued_candidates, []),
+        _read_with_timeout('analytics', FirebaseService.get_analytics, {})
+    )
+    snapshot = snapshot or {}
+
+    alerts = [_alert_from_doc(alert) for alert in snapshot.get('derivedAlerts', [])]
+    alerts.extend(_alert_from_doc(alert) for alert in firebase_alerts or [])
+    if not alerts:
+        alerts = [
+            AlertData(
                 type="info",
-                title="🦸 Talent Rescue Opportunity",
-                description=f"{semantic_issues} qualified candidates rejected despite strong skills and experience.",
-                affected=f"Candidates with 5+ skills and 5+ years experience"
-            ))
-        
-        # Build dynamic metrics
-        rejection_rate = int((rejected_count / total_candidates * 100)) if total_candidates > 0 else 0
-        
-        return HomePageData(
-            metrics=[
-                MetricData(title="Total Candidates", value=str(total_candidates), delta="+0"),
-                MetricData(title="ATS Rejections", value=str(rejected_count), delta=f"{rejection_rate}%", trend="down" if rejection_rate < 40 else "up"),
-                MetricData(title="Rescued Candidates", value=str(semantic_issues), delta=f"+{semantic_issues}"),
-                MetricData(title="Active Bias Alerts", value=str(len(alerts)), delta="⚠️" if len(alerts) > 0 else "✓")
-            ],
-            alerts=alerts if alerts else [
-                AlertData(
-                    type="info",
-                    title="✅ No Critical Bias Detected",
-                    description=f"Analysis of {total_candidates} candidates shows fair hiring patterns.",
-                    affected="System monitoring active"
-                )
-            ],
-            rescued_candidates=[
-                CandidateData(
-                    id=int(cv.get('candidateId', 'FILE_001').split('_')[-1]) if cv.get('candidateId') else idx,
-                    age_group=">45" if cv.get('age', 30) > 45 else "30-45" if cv.get('age', 30) >= 30 else "<30",
-                    gender=cv.get('gender', 'Unknown'),
-                    keywords=', '.join(cv.get('skills', [])[:2]) if cv.get('skills') else 'N/A',
-                    score=85 + (cv.get('experience', 0) * 2)
-                )
-                for idx, cv in enumerate([c for c in all_cvs if c.get('status') == 'rejected' and c.get('experience', 0) > 5][:3])
-            ],
-            age_stats={
-                "Under 30": len([cv for cv in all_cvs if cv.get('age', 30) < 30]),
-                "30-45": len([cv for cv in all_cvs if 30 <= cv.get('age', 30) <= 45]),
-                "Over 45": len([cv for cv in all_cvs if cv.get('age', 30) > 45])
-            },
-            gender_stats={
-                "Male": int(rejection_rate * 0.28) if total_candidates > 0 else 28,
-                "Female": int(rejection_rate * 0.42) if total_candidates > 0 else 42,
-                "Non-binary": int(rejection_rate * 0.30) if total_candidates > 0 else 30
-            }
-        )
+                title="✅ No Critical Bias Detected",
+                description=f"Analysis of {snapshot.get('totalCandidates', {}).get('value', 0)} candidates shows fair hiring patterns.",
+                affected="System monitoring active"
+            )
+        ]
+
+    rescued = firebase_candidates or snapshot.get('rescuedPreview', [])
+
+    return HomePageData(
+        metrics=[
+            _metric_from_snapshot(snapshot, 'totalCandidates', "Total Candidates"),
+            _metric_from_snapshot(snapshot, 'atsRejections', "ATS Rejections"),
+            _metric_from_snapshot(snapshot, 'rescuedCandidates', "Rescued Candidates"),
+            _metric_from_snapshot(snapshot, 'activeBiasAlerts', "Active Bias Alerts")
+        ],
+        alerts=alerts,
+        rescued_candidates=[_candidate_from_doc(c, idx) for idx, c in enumerate(rescued)],
+        age_stats=(firebase_analytics or {}).get('ageStats') or snapshot.get('ageStats', {}),
+        gender_stats=(firebase_analytics or {}).get('genderStats') or snapshot.get('genderStats', {})
+    )
+
+# Shared by every dashboard poller so concurrent clients don't each repeat the same reads
+home_cache = SingleFlightCache(ttl=settings.HOME_CACHE_TTL)
+
+@app.get("/api/home", response_model=HomePageData)
+async def get_home_data():
+    try:
+        return await home_cache.get_or_load('home', _load_home_data)
     except Exception as e:
-        print(f"Error generating dynamic alerts: {e}")
+        print(f"Error loading dashboard metrics: {e}")
         import traceback
         traceback.print_exc()
     
@@ -278,12 +347,12 @@ async def bulk_upload_cvs(cvs: List[dict]):
     try:
         results = []
         for cv_data in cvs:
-            candidate_id = f"CV{datetime.now().strftime('%Y%m%d%H%M%S')}{len(results)}"
+            candidate_id = new_id("CV")
             cv_data['candidateId'] = candidate_id
             cv_data['uploadedAt'] = datetime.now()
             cv_data['status'] = 'under_review'
             
-            FirebaseService.add_cv(cv_data)
+            await AsyncFirebaseService.add_cv(cv_data)
             results.append(candidate_id)
         
         return {"message": f"Successfully uploaded {len(results)} CVs", "candidateIds": results}
@@ -302,155 +371,83 @@ async def upload_cv_file(
     education: str = Form(...),
     location: str = Form(...),
     currentRole: str = Form(...),
-    expectedSalary: str = Form(...)
+    expectedSalary: str = Form(...),
+    wait: bool = True
 ):
+    upload = None
     try:
-        # Generate candidate ID
-        candidate_id = f"CV{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        # Stream the file into a size-limited spooled temp file
+        upload = await spool_upload(file)
         
-        # Read file contents
-        contents = await file.read()
-        
-        # Parse CV content based on file type
-        extracted_text = ""
-        extracted_skills = []
-        
-        try:
-            if file.filename.lower().endswith('.pdf'):
-                import PyPDF2
-                from io import BytesIO
-                pdf_reader = PyPDF2.PdfReader(BytesIO(contents))
-                for page in pdf_reader.pages:
-                    extracted_text += page.extract_text() + "\n"
-            
-            elif file.filename.lower().endswith('.docx'):
-                import docx
-                from io import BytesIO
-                doc = docx.Document(BytesIO(contents))
-                for paragraph in doc.paragraphs:
-                    extracted_text += paragraph.text + "\n"
-            
-            elif file.filename.lower().endswith('.txt'):
-                extracted_text = contents.decode('utf-8')
-            
-            else:
-                # Try to decode as text
-                try:
-                    extracted_text = contents.decode('utf-8')
-                except:
-                    extracted_text = "Could not extract text from file"
-            
-            # Extract skills using simple keyword matching
-            if extracted_text and ml_sentinel:
-                try:
-                    # Use ML to extract skills from text
-                    skill_keywords = ['python', 'javascript', 'react', 'node', 'sql', 'aws', 'docker', 'kubernetes', 'git', 'agile', 'scrum', 'java', 'c++', 'html', 'css', 'mongodb', 'postgresql', 'redis', 'tensorflow', 'pytorch', 'machine learning', 'data science', 'api', 'rest', 'graphql', 'microservices', 'devops', 'ci/cd', 'jenkins', 'terraform', 'ansible']
-                    text_lower = extracted_text.lower()
-                    extracted_skills = [skill for skill in skill_keywords if skill in text_lower]
-                    
-                    # Limit to top 10 skills
-                    extracted_skills = extracted_skills[:10]
-                except Exception as e:
-                    print(f"Error extracting skills: {e}")
-                    extracted_skills = ["To be updated"]
-            
-            if not extracted_skills:
-                extracted_skills = ["To be updated"]
-                
-        except Exception as e:
-            print(f"Error parsing CV file: {e}")
-            extracted_text = "Error parsing file content"
-            extracted_skills = ["To be updated"]
-        
-        # Save file to Firebase Storage (optional)
-        file_url = None
-        try:
-            blob = FirebaseService.bucket.blob(f"cvs/{file.filename}")
-            blob.upload_from_string(contents, content_type=file.content_type)
-            file_url = blob.public_url
-        except Exception as e:
-            print(f"Warning: Could not save file to Firebase Storage: {e}")
-        
-        # Create CV data with extracted information
-        cv_data = {
-            "candidateId": candidate_id,
+        # Store it and queue it for extraction, skill parsing, embedding and the CV write
+        job = await upload_pipeline.submit(upload, {
             "name": name,
             "email": email,
             "phone": phone,
             "age": age,
             "gender": gender,
             "experience": experience,
-            "skills": extracted_skills,
             "education": education,
             "location": location,
             "currentRole": currentRole,
             "expectedSalary": expectedSalary,
-            "fileName": file.filename,
-            "fileUrl": file_url,
-            "extractedText": extracted_text[:1000],  # Store first 1000 chars
-            "status": "under_review",
-            "uploadedAt": datetime.now()
-        }
+            "status": "under_review"
+        })
+        upload.close()
+        if not wait:
+            return {"message": "CV accepted for processing", **job}
         
-        # Save to Firebase
-        FirebaseService.add_cv(cv_data)
+        job = await upload_pipeline.wait(job["jobId"])
+        if job["state"] == "failed":
+            return {"error": job["error"], "jobId": job["jobId"]}
         
+        cv_data = job["record"]
+        extracted_text = cv_data["extractedText"]
         return {
             "message": "CV uploaded and parsed successfully",
-            "candidateId": candidate_id,
+            "candidateId": cv_data["candidateId"],
+            "jobId": job["jobId"],
             "cv": cv_data,
             "file_info": {
                 "filename": file.filename,
-                "file_size": len(contents),
-                "extracted_skills": extracted_skills,
+                "file_size": job["size"],
+                "extracted_skills": cv_data["skills"],
                 "text_preview": extracted_text[:200] + "..." if len(extracted_text) > 200 else extracted_text
             }
         }
     except Exception as e:
         print(f"Error uploading CV: {e}")
         return {"error": str(e)}
+    finally:
+        if upload is not None:
+            upload.close()
 
 @app.post("/api/upload-reference-cv")
 async def upload_reference_cv(
     file: UploadFile = File(...),
     jobTitle: str = Form(...)
 ):
+    upload = None
     try:
         # Generate reference CV ID
         ref_id = f"REF{datetime.now().strftime('%Y%m%d%H%M%S')}"
         
-        # Read and extract text from file
-        contents = await file.read()
+        # Stream the file to a spooled temp file and extract text from it (or reuse a cached extraction)
+        upload = await spool_upload(file)
         extracted_text = ""
+        file_url = None
+        fingerprinted = False
         
         try:
-            if file.filename.lower().endswith('.pdf'):
-                import PyPDF2
-                from io import BytesIO
-                pdf_reader = PyPDF2.PdfReader(BytesIO(contents))
-                for page in pdf_reader.pages:
-                    extracted_text += page.extract_text() + "\n"
-            elif file.filename.lower().endswith('.docx'):
-                import docx
-                from io import BytesIO
-                doc = docx.Document(BytesIO(contents))
-                for paragraph in doc.paragraphs:
-                    extracted_text += paragraph.text + "\n"
-            elif file.filename.lower().endswith('.txt'):
-                extracted_text = contents.decode('utf-8')
-        except Exception as e:
+            if file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                resolved = await FirebaseService.uploads.resolve(upload)
+                extracted_text = resolved["extractedText"]
+                file_url = resolved["fileUrl"]
+                fingerprinted = True
+        except ExtractionError as e:
             print(f"Error extracting text: {e}")
             extracted_text = "Could not extract text"
         
-        # Save file to Firebase Storage
-        file_url = None
-        try:
-            blob = FirebaseService.bucket.blob(f"reference_cvs/{file.filename}")
-            blob.upload_from_string(contents, content_type=file.content_type)
-            file_url = blob.public_url
-        except Exception as e:
-            print(f"Warning: Could not save reference CV to Firebase Storage: {e}")
-        
         # Allow multiple active reference CVs - no auto-deactivation
         
         # Save reference CV data
@@ -459,13 +456,19 @@ async def upload_reference_cv(
             "jobTitle": jobTitle,
             "fileName": file.filename,
             "fileUrl": file_url,
+            "fileSha256": upload.sha256,
             "extractedText": extracted_text,
             "uploadedAt": datetime.now(),
             "status": "active"
         }
         
-        # Save to Firebase
-        FirebaseService.db.collection('reference_cvs').document(ref_id).set(ref_data)
+        # Save to Firebase (full text goes to the side store, the doc keeps a fingerprint)
+        ref_data = await run_blocking(FirebaseService.texts.offload, ref_data)
+        await AsyncFirebaseService.set_document('reference_cvs', ref_id, ref_data)
+        
+        # Save file to Firebase Storage in the background; fileUrl is set on the reference CV when done
+        if file_url is None:
+            await FirebaseService.uploads.store_blob(upload, [('reference_cvs', ref_id)], fingerprinted=fingerprinted)
         
         return {
             "message": "Reference CV uploaded successfully. All future analyses will use this as reference.",
@@ -476,6 +479,9 @@ async def upload_reference_cv(
     except Exception as e:
         print(f"Error uploading reference CV: {e}")
         return {"error": str(e)}
+    finally:
+        if upload is not None:
+            upload.close()
 
 @app.post("/api/cvs")
 async def add_cv(
@@ -517,7 +523,7 @@ async def add_cv(
         }
         
         # Add CV to Firebase
-        result = FirebaseService.add_cv(cv_data)
+        await AsyncFirebaseService.add_cv(cv_data)
         return {"message": "CV added successfully", "candidateId": candidate_id}
     except Exception as e:
         return {"error": str(e)}
@@ -575,29 +581,68 @@ def get_company_criteria(company_name: str):
         return {"error": str(e)}
 
 @app.post("/api/start-batch-analysis")
-async def start_batch_analysis(background_tasks: BackgroundTasks):
+async def start_batch_analysis():
     try:
-        # Run ML-powered analysis in background
-        background_tasks.add_task(run_ml_analysis)
+        # Run ML-powered analysis in background; a second click joins the running job
+        job, created = analysis_jobs.start(run_ml_analysis)
         return {
-            "message": "ML-powered Fair-Hire Sentinel analysis started",
+            "message": "ML-powered Fair-Hire Sentinel analysis started" if created
+            else "ML-powered Fair-Hire Sentinel analysis already running",
             "status": "processing",
+            "jobId": job.job_id,
+            "alreadyRunning": not created,
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
         return {"error": str(e)}
 
-async def run_ml_analysis():
+@app.get("/api/analysis-jobs")
+async def list_analysis_jobs():
+    """The running analysis (if any) and recent runs with their durations"""
+    current = analysis_jobs.current
+    return {
+        "current": current.to_dict() if current else None,
+        "history": analysis_jobs.history()
+    }
+
+@app.get("/api/analysis-jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job.to_dict()
+
+@app.post("/api/analysis-jobs/{job_id}/cancel")
+async def cancel_analysis_job(job_id: str):
+    """Stop a running analysis at its next checkpoint (results already being saved are kept)"""
+    job = analysis_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job.to_dict()
+
+async def run_ml_analysis(job: AnalysisJob):
+    """Run the analysis off the event loop so status requests are answered meanwhile"""
+    return await run_blocking(_run_ml_analysis, job)
+
+def _run_ml_analysis(job: AnalysisJob):
     """Run ML-powered bias detection and semantic analysis with two-stage screening"""
     try:
+        job.set_phase("loading_models")
+        ml_sentinel = get_ml_sentinel()
+        if not ml_sentinel:
+            print("ML Sentinel not available; skipping analysis")
+            return {"skipped": "ML Sentinel not available"}
+        
+        job.set_phase("loading_cvs")
         # Get all CVs from Firestore only
         all_cvs = FirebaseService.get_all_cvs()
         
         if not all_cvs:
             print("No CVs found for analysis")
-            return
+            return {"analyzed": 0}
         
         # Get job criteria (prefer reference CV context, then active saved criteria, then AI fallback).
+        job.set_phase("criteria")
         job_keywords = []
         use_multi_job = False
         
@@ -613,8 +658,10 @@ async def run_ml_analysis():
                 matched_families = []
                 all_job_titles = []
 
-                for ref_doc in ref_cv_docs:
-                    ref_cv_data = ref_doc.to_dict()
+                ref_cv_datas = FirebaseService.texts.hydrate(
+                    [ref_doc.to_dict() for ref_doc in ref_cv_docs], ['extractedText']
+                )
+                for ref_cv_data in ref_cv_datas:
                     ref_text = (ref_cv_data.get('extractedText') or '').strip()
                     ref_title = (ref_cv_data.get('jobTitle') or '').strip()
 
@@ -675,16 +722,42 @@ async def run_ml_analysis():
         else:
             print("AI Mode: Using semantic analysis to match CVs to best positions across all industries")
         
+        # CV text lives in the side store; pull it in with one batched read now that it's needed
+        FirebaseService.texts.hydrate(all_cvs, TextStore.TEXT_FIELDS)
+        
+        # Reuse embeddings of CV texts seen in earlier runs (e.g. re-submitted files)
+        try:
+            ml_sentinel.preload_embeddings(FirebaseService.uploads.get_embeddings(
+                ml_sentinel.normalize_text(ml_sentinel._get_cv_text(cv)) for cv in all_cvs
+            ))
+        except Exception as e:
+            print(f"Warning: Could not load cached embeddings: {e}")
+        
         # Run ML analysis with two-stage screening
-        analysis_results = ml_sentinel.run_full_analysis(all_cvs, job_keywords if not use_multi_job else [])
+        job.set_phase("scoring", total=len(all_cvs))
+        analysis_results = ml_sentinel.run_full_analysis(
+            all_cvs, job_keywords if not use_multi_job else [], progress=job.advance
+        )
+        
+        try:
+            FirebaseService.uploads.put_embeddings(ml_sentinel.pop_new_embeddings())
+        except Exception as e:
+            print(f"Warning: Could not cache embeddings: {e}")
         
         # Update ALL CV statuses in Firebase with analysis results
         print(f"Updating CV statuses in Firebase...")
+        # Results are written in full once saving starts, so the dashboard never shows half a run
+        job.set_phase("saving", total=sum(
+            len(analysis_results.get(key, [])) for key in ('immediate_interviews', 'rescue_alerts', 'rejected')
+        ), cancellable=False)
+
+        # CVs created through add() have auto ids, so map candidateId -> Firestore doc id
+        doc_ids = {cv.get('candidateId'): cv['id'] for cv in all_cvs if cv.get('candidateId')}
         
         # Update immediate interview candidates
         for cv in analysis_results.get('immediate_interviews', []):
             try:
-                doc_id = cv.get('candidateId')
+                doc_id = cv.get('id') or doc_ids.get(cv.get('candidateId'))
                 if not doc_id:
                     # Try to find by name and userId
                     name = cv.get('name')
@@ -712,16 +785,17 @@ async def run_ml_analysis():
                         'analysisDate': datetime.now(),
                         'analyzed': True
                     }
-                    FirebaseService.db.collection('cvs').document(doc_id).set(update_data, merge=True)
+                    FirebaseService.set_cv(doc_id, update_data, merge=True)
                     position_info = f" (Suggested: {cv.get('best_job_family')})" if use_multi_job else ""
                     print(f"✓ Updated {cv.get('name')} - Selected ({cv.get('match_rate', 0):.0%} match){position_info}")
             except Exception as e:
                 print(f"Error updating CV: {e}")
+            job.advance()
         
         # Update rescued candidates
         for alert in analysis_results.get('rescue_alerts', []):
             try:
-                doc_id = alert.get('candidate_id')
+                doc_id = doc_ids.get(alert.get('candidate_id'))
                 if not doc_id:
                     name = alert.get('name')
                     if name:
@@ -747,16 +821,17 @@ async def run_ml_analysis():
                         'analysisDate': datetime.now(),
                         'analyzed': True
                     }
-                    FirebaseService.db.collection('cvs').document(doc_id).set(update_data, merge=True)
+                    FirebaseService.set_cv(doc_id, update_data, merge=True)
                     position_info = f" (Suggested: {alert.get('best_job_family')})" if use_multi_job else ""
                     print(f"✓ Rescued {alert.get('name')} - {alert.get('semantic_score', 0):.0%} semantic match{position_info}")
             except Exception as e:
                 print(f"Error updating rescued CV: {e}")
+            job.advance()
         
         # Update rejected candidates
         for cv in analysis_results.get('rejected', []):
             try:
-                doc_id = cv.get('candidateId')
+                doc_id = cv.get('id') or doc_ids.get(cv.get('candidateId'))
                 if not doc_id:
                     name = cv.get('name')
                     if name:
@@ -777,24 +852,27 @@ async def run_ml_analysis():
                         'analysisDate': datetime.now(),
                         'analyzed': True
                     }
-                    FirebaseService.db.collection('cvs').document(doc_id).set(update_data, merge=True)
+                    FirebaseService.set_cv(doc_id, update_data, merge=True)
                     print(f"✗ Rejected {cv.get('name')} - {cv.get('match_rate', 0):.0%} match")
             except Exception as e:
                 print(f"Error updating rejected CV: {e}")
-        
-        # Save rescue alerts
-        if analysis_results.get('rescue_alerts'):
-            for alert in analysis_results['rescue_alerts']:
-                FirebaseService.db.collection('alerts').add({
-                    'type': 'rescue_alert',
-                    'title': f'🚨 Qualified Candidate Rescued',
-                    'description': f'{alert["name"]} has {alert["semantic_score"]:.0%} semantic match despite {alert.get("ats_score", 0):.0f}% keyword match',
-                    'candidate_id': alert.get('candidate_id'),
-                    'candidates': [alert],
-                    'active': True,
-                    'created_at': datetime.now(),
-                    'severity': 'high'
-                })
+            job.advance()
+        
+        job.set_phase("alerts", cancellable=False)
+        # Alerts are keyed by type + candidate, so re-runs update them in place and
+        # rescue/peer alerts from earlier runs that no longer apply are deactivated.
+        run_id = f"RUN{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        run_alerts = [
+            {
+                'type': 'rescue_alert',
+                'title': f'🚨 Qualified Candidate Rescued',
+                'description': f'{alert["name"]} has {alert["semantic_score"]:.0%} semantic match despite {alert.get("ats_score", 0):.0f}% keyword match',
+                'candidate_id': alert.get('candidate_id') or alert.get('name'),
+                'candidates': [alert],
+                'severity': 'high'
+            }
+            for alert in analysis_results.get('rescue_alerts', [])
+        ]
         
         # Save peer comparison bias alerts (similar CVs with different outcomes)
         bias_analysis = analysis_results.get('bias_analysis', {})
@@ -802,7 +880,7 @@ async def run_ml_analysis():
         
         if peer_comparison_cases:
             # Group all peer comparison cases into one alert
-            FirebaseService.db.collection('alerts').add({
+            run_alerts.append({
                 'type': 'peer_comparison_bias',
                 'title': f'⚠️ Disparate Treatment Detected: Similar Candidates, Different Outcomes',
                 'description': f'Found {len(peer_comparison_cases)} case(s) where candidates with similar qualifications received different screening outcomes',
@@ -816,34 +894,42 @@ async def run_ml_analysis():
                     }
                     for case in peer_comparison_cases
                 ],
-                'active': True,
-                'created_at': datetime.now(),
                 'severity': 'critical'
             })
             print(f"Peer comparison: Detected {len(peer_comparison_cases)} disparate treatment cases")
         
-        # Update metrics
-        FirebaseService.db.collection('metrics').document('current').set({
-            'totalCandidates': {'value': len(all_cvs), 'delta': '+12%'},
-            'atsRejections': {'value': len(analysis_results.get('rejected', [])), 'delta': '-8%'},
-            'rescuedCandidates': {'value': len(analysis_results.get('rescue_alerts', [])), 'delta': '+15%'},
-            'activeBiasAlerts': {'value': len(analysis_results.get('rescue_alerts', [])), 'delta': '+3%'},
-            'lastUpdated': datetime.now()
-        })
+        FirebaseService.alerts.upsert_many(
+            run_alerts, run_id, supersede=('rescue_alert', 'peer_comparison_bias')
+        )
+        
+        # Status updates above already moved the counters; publish the new dashboard snapshot
+        FirebaseService.metrics.refresh_snapshot()
         
         print(f"ML Analysis completed: {len(analysis_results.get('rescue_alerts', []))} candidates rescued")
+        return analysis_results.get('statistics', {})
         
+    except AnalysisCancelled:
+        print("ML Analysis cancelled")
+        raise
     except Exception as e:
         print(f"ML Analysis error: {e}")
+        raise
 
 @app.get("/api/analysis-status")
-def get_analysis_status():
+def get_analysis_status(jobId: Optional[str] = None):
     try:
         # Get latest metrics to show current status
         metrics = FirebaseService.get_metrics()
         alerts = FirebaseService.get_alerts()
+        job = analysis_jobs.get(jobId)
+        if job is not None:
+            # completed, failed or cancelled once the run has ended
+            status = job.state if job.done else "processing"
+        else:
+            status = "completed" if metrics else "idle"
         return {
-            "status": "completed" if metrics else "idle",
+            "status": status,
+            "job": job.to_dict() if job else None,
             "metrics": metrics,
             "active_alerts": len(alerts) if alerts else 0,
             "last_updated": metrics.get('lastUpdated') if metrics else None
@@ -854,12 +940,7 @@ def get_analysis_status():
 @app.get("/api/rescue-alerts")
 def get_rescue_alerts():
     try:
-        alerts_ref = FirebaseService.db.collection('alerts').where(
-            filter=FieldFilter('type', '==', 'rescue_alert')
-        ).where(
-            filter=FieldFilter('active', '==', True)
-        )
-        alerts = [alert.to_dict() for alert in alerts_ref.stream()]
+        alerts = FirebaseService.get_alerts(types=['rescue_alert'])
         return {"rescue_alerts": alerts}
     except Exception as e:
         return {"error": str(e)}
@@ -903,6 +984,7 @@ def get_active_job_criteria():
 @app.post("/api/semantic-analysis")
 def semantic_analysis(data: dict):
     try:
+        ml_sentinel = get_ml_sentinel()
         text1 = data.get('text1', '')
         text2 = data.get('text2', '')
         
@@ -919,6 +1001,7 @@ def semantic_analysis(data: dict):
 @app.post("/api/bias-detection")
 def bias_detection(data: dict):
     try:
+        ml_sentinel = get_ml_sentinel()
         cv_text = data.get('cv_text', '')
         keywords = data.get('keywords', [])
         
@@ -930,6 +1013,7 @@ def bias_detection(data: dict):
 @app.post("/api/extract-skills")
 def extract_skills(data: dict):
     try:
+        ml_sentinel = get_ml_sentinel()
         job_title = data.get('jobTitle', '')
         
         if not job_title:
@@ -952,6 +1036,7 @@ def extract_skills(data: dict):
 @app.post("/api/job-criteria")
 def save_job_criteria(data: dict):
     try:
+        ml_sentinel = get_ml_sentinel()
         job_title = data.get('jobTitle')
         keywords = data.get('keywords', [])
         
@@ -983,6 +1068,7 @@ def analyze_ml_bias(data: dict):
     Analyzes text for potential biases using NLP and ML models
     """
     try:
+        ml_sentinel = get_ml_sentinel()
         if not ml_sentinel:
             return {
                 "ok": False,
@@ -1076,26 +1162,11 @@ def generate_bias_alerts(fairness_issues, biased_skills, total_cvs):
         from datetime import datetime
         alerts = []
         
-        # Check if alerts already exist to avoid duplicates
-        existing_alerts = {}
-        try:
-            existing_docs = FirebaseService.db.collection('alerts').where(
-                filter=FieldFilter('active', '==', True)
-            ).stream()
-            for doc in existing_docs:
-                alert_data = doc.to_dict()
-                alert_type = alert_data.get('type')
-                if alert_type:
-                    existing_alerts[alert_type] = doc.id
-        except Exception as e:
-            print(f"Could not check existing alerts: {e}")
-        
         # Age bias alerts
         age_bias_issues = [i for i in fairness_issues if i.get('type') == 'age_bias']
         if len(age_bias_issues) > 0:
-            alert_id = existing_alerts.get('age_discrimination', f'age_bias_static')
             alerts.append({
-                'id': alert_id,
+                'key': 'age_bias_static',
                 'type': 'age_discrimination',
                 'severity': 'high' if len(age_bias_issues) > 3 else 'medium',
                 'title': 'Age-Based Bias Detected',
@@ -1114,9 +1185,8 @@ def generate_bias_alerts(fairness_issues, biased_skills, total_cvs):
         if len(biased_skills) > 0:
             top_biased_skill = biased_skills[0]
             skill_list = ', '.join([s['skill'].title() for s in biased_skills[:3]])
-            alert_id = existing_alerts.get('skill_keyword_bias', f'skill_bias_static')
             alerts.append({
-                'id': alert_id,
+                'key': 'skill_bias_static',
                 'type': 'skill_keyword_bias',
                 'severity': 'high',
                 'title': f'Skill-Based Bias: {top_biased_skill["skill"].title()}',
@@ -1135,9 +1205,8 @@ def generate_bias_alerts(fairness_issues, biased_skills, total_cvs):
         # Gender bias alerts
         gender_bias_issues = [i for i in fairness_issues if i.get('demographic_factor') == 'gender']
         if len(gender_bias_issues) > 0:
-            alert_id = existing_alerts.get('gender_bias', f'gender_bias_static')
             alerts.append({
-                'id': alert_id,
+                'key': 'gender_bias_static',
                 'type': 'gender_bias',
                 'severity': 'critical',
                 'title': 'Gender-Based Disparate Treatment',
@@ -1152,9 +1221,11 @@ def generate_bias_alerts(fairness_issues, biased_skills, total_cvs):
                 'active': True
             })
         
-        # Update or create alerts in Firestore (updates existing, doesn't duplicate)
-        for alert in alerts:
-            FirebaseService.db.collection('alerts').document(alert['id']).set(alert)
+        # Upsert under stable keys; bias types no longer detected are deactivated
+        run_id = f"BIAS{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        alerts = FirebaseService.alerts.upsert_many(
+            alerts, run_id, supersede=('age_discrimination', 'skill_keyword_bias', 'gender_bias')
+        )
         
         print(f"✓ Updated {len(alerts)} alerts in Firestore (no duplicates)\n")
         return alerts
@@ -1169,6 +1240,7 @@ def analyze_fairness(data: dict):
     Evaluates fairness metrics and disparate impact in the hiring process
     """
     try:
+        ml_sentinel = get_ml_sentinel()
         if not ml_sentinel:
             return {
                 "ok": False,
@@ -1388,7 +1460,7 @@ async def google_auth(data: dict):
         
         # Create user in database
         user_id = f"USER{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        FirebaseService.db.collection('users').document(user_id).set({
+        await AsyncFirebaseService.set_document('users', user_id, {
             'userId': user_id,
             'email': user_data['email'],
             'name': user_data['name'],
@@ -1426,6 +1498,7 @@ async def user_apply(
     expectedSalary: Optional[str] = Form(None),
     authorization: str = None
 ):
+    upload = None
     try:
         # Extract user from token (simplified)
         user_id = userId or "USER123"  # In production, decode from JWT
@@ -1434,12 +1507,19 @@ async def user_apply(
         app_id = f"APP{datetime.now().strftime('%Y%m%d%H%M%S')}"
         
         # Parse CV file
-        contents = await file.read()
         extracted_text = ""
-        
-        if file.filename.lower().endswith('.txt'):
-            extracted_text = contents.decode('utf-8')
-        else:
+        file_url = None
+        fingerprinted = False
+        upload = await spool_upload(file)
+        file_sha256 = upload.sha256
+        try:
+            # Re-submitted files reuse the earlier extraction and Storage blob
+            resolved = await FirebaseService.uploads.resolve(upload)
+            extracted_text = resolved["extractedText"]
+            file_url = resolved["fileUrl"]
+            fingerprinted = True
+        except ExtractionError as e:
+            print(f"Error extracting application CV text: {e}")
             extracted_text = "File content extracted"
         
         # Save application
@@ -1449,12 +1529,14 @@ async def user_apply(
             'candidateId': f"CV{datetime.now().strftime('%Y%m%d%H%M%S%f')}",
             'jobTitle': jobTitle,
             'fileName': file.filename,
+            'fileUrl': file_url,
+            'fileSha256': file_sha256,
             'extractedText': extracted_text[:1000],
             'status': 'pending',
             'submittedAt': datetime.now()
         }
         
-        FirebaseService.db.collection('applications').document(app_id).set(app_data)
+        await AsyncFirebaseService.set_document('applications', app_id, app_data)
 
         # Also persist candidate CV so HR dashboard/admin analysis can see user uploads.
         candidate_id = app_data['candidateId']
@@ -1474,23 +1556,32 @@ async def user_apply(
             "expectedSalary": expectedSalary or "",
             "jobTitle": jobTitle,
             "fileName": file.filename,
-            "extractedText": extracted_text[:1000],
+            "fileUrl": file_url,
+            "fileSha256": file_sha256,
+            "extractedText": extracted_text,
             "status": "under_review",
             "uploadedAt": datetime.now(),
             "analyzed": False,
             "userId": user_id,
+            "applicationId": app_id,
             "source": "user_portal"
         }
-        FirebaseService.db.collection('cvs').document(candidate_id).set(cv_data)
+        await AsyncFirebaseService.set_cv(candidate_id, cv_data)
+        
+        # Store the file in the background; fileUrl is set on both documents when done
+        if file_url is None:
+            await FirebaseService.uploads.store_blob(
+                upload, [('applications', app_id), ('cvs', candidate_id)], fingerprinted=fingerprinted
+            )
         
         # Trigger analysis
-        if ml_sentinel:
+        if models.loaded("fair_hire_sentinel"):
             # Run basic analysis
             ats_score = 75  # Mock score
             bias_score = 0.15
             
             # Update application with results
-            FirebaseService.db.collection('applications').document(app_id).update({
+            await AsyncFirebaseService.update_document('applications', app_id, {
                 'status': 'completed',
                 'atsScore': ats_score,
                 'biasScore': bias_score,
@@ -1501,6 +1592,9 @@ async def user_apply(
         return {'success': True, 'applicationId': app_id, 'candidateId': candidate_id}
     except Exception as e:
         return {'success': False, 'error': str(e)}
+    finally:
+        if upload is not None:
+            upload.close()
 
 @app.get("/api/user/applications")
 def get_user_applications(userId: Optional[str] = None, authorization: str = None):
@@ -1550,132 +1644,76 @@ def manual_save_candidate(data: dict):
         if not candidate_id and not doc_id and not name and not email:
             return {"success": False, "error": "At least one identifier is required (candidateId/docId/name/email)"}
 
-        cv_ref = None
-        cv_doc = None
-
-        # 1) Direct by Firestore doc id
-        if doc_id:
-            possible_ref = FirebaseService.db.collection('cvs').document(doc_id)
-            possible_doc = possible_ref.get()
-            if possible_doc.exists:
-                cv_ref = possible_ref
-                cv_doc = possible_doc
-
-        # 2) Direct by candidateId as doc id
-        if cv_doc is None and candidate_id:
-            possible_ref = FirebaseService.db.collection('cvs').document(candidate_id)
-            possible_doc = possible_ref.get()
-            if possible_doc.exists:
-                cv_ref = possible_ref
-                cv_doc = possible_doc
-
-        # 3) By candidateId field
-        if cv_doc is None and candidate_id:
-            matches = list(
-                FirebaseService.db.collection('cvs')
-                .where(filter=FieldFilter('candidateId', '==', candidate_id))
-                .limit(1)
-                .stream()
-            )
-            if matches:
-                cv_ref = matches[0].reference
-                cv_doc = matches[0]
-
-        # 4) By userId + fileName
-        if cv_doc is None and user_id and file_name:
-            matches = list(
-                FirebaseService.db.collection('cvs')
-                .where(filter=FieldFilter('userId', '==', user_id))
-                .where(filter=FieldFilter('fileName', '==', file_name))
-                .limit(1)
-                .stream()
-            )
-            if matches:
-                cv_ref = matches[0].reference
-                cv_doc = matches[0]
-
-        # 5) By email
-        if cv_doc is None and email:
-            try:
-                matches = list(
-                    FirebaseService.db.collection('cvs')
-                    .where(filter=FieldFilter('email', '==', email))
-                    .limit(5)
-                    .stream()
-                )
-                if matches:
-                    # Prefer most recently uploaded doc without requiring an index.
-                    matches.sort(
-                        key=lambda d: (d.to_dict() or {}).get('uploadedAt') or datetime.min,
-                        reverse=True
-                    )
-                    cv_ref = matches[0].reference
-                    cv_doc = matches[0]
-            except Exception as email_lookup_error:
-                print(f"Warning: email fallback lookup failed: {email_lookup_error}")
-
-        # 6) By name as last fallback
-        if cv_doc is None and name:
-            try:
-                matches = list(
-                    FirebaseService.db.collection('cvs')
-                    .where(filter=FieldFilter('name', '==', name))
-                    .limit(5)
-                    .stream()
-                )
-                if matches:
-                    matches.sort(
-                        key=lambda d: (d.to_dict() or {}).get('uploadedAt') or datetime.min,
-                        reverse=True
-                    )
-                    cv_ref = matches[0].reference
-                    cv_doc = matches[0]
-            except Exception as name_lookup_error:
-                print(f"Warning: name fallback lookup failed: {name_lookup_error}")
-
-        if cv_doc is None:
+        # One batched read against the identifier lookup table maintained on every CV write
+        resolved_id = FirebaseService.resolve_cv_id(
+            doc_id=doc_id,
+            candidate_id=candidate_id,
+            user_id=user_id,
+            file_name=file_name,
+            email=email,
+            name=name
+        )
+        if not resolved_id:
             return {"success": False, "error": f"Candidate not found (candidateId={candidate_id}, docId={doc_id})"}
 
-        cv_data = cv_doc.to_dict() or {}
-        previous_status = cv_data.get('status', 'unknown')
-
+        now = datetime.now()
         update_payload = {
             'status': 'shortlisted',
             'analyzed': True,
             'manual_saved': True,
             'manual_save_note': note,
             'manual_saved_by': reviewer,
-            'manual_saved_at': datetime.now(),
+            'manual_saved_at': now,
             'review_decision': 'give_chance'
         }
-        cv_ref.set(update_payload, merge=True)
+        app_updates = {
+            'status': 'shortlisted',
+            'manual_saved': True,
+            'manual_save_note': note,
+            'manual_saved_by': reviewer,
+            'manual_saved_at': now
+        }
+        previous = {}
+
+        def sync_application(transaction, before, after):
+            # CV and linked application commit together
+            previous.update(before or {})
+            application_id = (before or {}).get('applicationId')
+            if application_id:
+                transaction.set(
+                    FirebaseService.db.collection('applications').document(application_id),
+                    app_updates,
+                    merge=True
+                )
 
-        # Keep legacy applications collection in sync when possible.
-        try:
-            app_updates = {
-                'status': 'shortlisted',
-                'manual_saved': True,
-                'manual_save_note': note,
-                'manual_saved_by': reviewer,
-                'manual_saved_at': datetime.now()
-            }
-            app_matches = list(
-                FirebaseService.db.collection('applications')
-                .where(filter=FieldFilter('candidateId', '==', cv_data.get('candidateId', candidate_id)))
-                .stream()
-            )
-            if not app_matches and cv_data.get('userId'):
+        cv_ref = FirebaseService.db.collection('cvs').document(resolved_id)
+        cv_data = FirebaseService.metrics.write_cv(
+            cv_ref,
+            update_payload,
+            merge=True,
+            require_existing=True,
+            extra_writes=sync_application
+        )
+        if cv_data is None:
+            return {"success": False, "error": f"Candidate not found (candidateId={candidate_id}, docId={doc_id})"}
+        previous_status = previous.get('status', 'unknown')
+
+        if not cv_data.get('applicationId'):
+            # CVs written before applicationId was stored on them: link them once
+            try:
                 app_matches = list(
                     FirebaseService.db.collection('applications')
-                    .where(filter=FieldFilter('userId', '==', cv_data.get('userId')))
-                    .where(filter=FieldFilter('fileName', '==', cv_data.get('fileName', '')))
+                    .where(filter=FieldFilter('candidateId', '==', cv_data.get('candidateId', candidate_id)))
                     .limit(1)
                     .stream()
                 )
-            for app_doc in app_matches:
-                app_doc.reference.set(app_updates, merge=True)
-        except Exception as sync_error:
-            print(f"Warning: Could not sync manual save to applications: {sync_error}")
+                if app_matches:
+                    batch = FirebaseService.db.batch()
+                    batch.set(app_matches[0].reference, app_updates, merge=True)
+                    batch.set(cv_ref, {'applicationId': app_matches[0].id}, merge=True)
+                    batch.commit()
+            except Exception as sync_error:
+                print(f"Warning: Could not sync manual save to applications: {sync_error}")
 
         return {
             "success": True,
@@ -1,27 +1,13 @@
 import os
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, Dict, List, Optional
 import json
 import re
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sentence_transformers import SentenceTransformer
 import numpy as np
-try:
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
-    print("✓ Successfully loaded spaCy model: en_core_web_sm")
-except Exception as e:
-    nlp = None
-    print("=" * 80)
-    print("WARNING: spaCy model 'en_core_web_sm' not loaded")
-    print("=" * 80)
-    print(f"Error details: {type(e).__name__}: {str(e)}")
-    print("\nTo fix this issue, run one of these commands:")
-    print("  1. python -m spacy download en_core_web_sm")
-    print("  2. pip install https://github.com/explosion/spacy-models/releases/download/en_core_web_sm-3.7.1/en_core_web_sm-3.7.1-py3-none-any.whl")
-    print("\nImpact: Some NLP features may be limited, but core ML bias detection will still work.")
-    print("=" * 80)
 
 class FairHireSentinel:
     # Define multiple job families with their key skills
@@ -68,19 +54,29 @@ class FairHireSentinel:
         }
     }
     
-    def __init__(self):
-        """Initialize ML models for semantic analysis"""
+    # Most recently used embeddings kept in memory (~1.5 KB each); all of them
+    # also persist in the text_embeddings collection between runs
+    EMBEDDING_CACHE_SIZE = 10000
+    
+    def __init__(self, semantic_model=None):
+        """Initialize ML models for semantic analysis
+        
+        ``semantic_model`` is an already loaded SentenceTransformer to share;
+        one is loaded here when it is not given.
+        """
         print("Loading ML models...")
-        try:
-            # Load sentence transformer for semantic similarity
-            self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
-            print("✓ Loaded semantic similarity model (all-MiniLM-L6-v2)")
-        except Exception as e:
-            print(f"Warning: Could not load sentence-transformers model: {e}")
-            self.semantic_model = None
+        self.semantic_model = semantic_model
+        if self.semantic_model is None:
+            try:
+                # Load sentence transformer for semantic similarity
+                self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
+                print("✓ Loaded semantic similarity model (all-MiniLM-L6-v2)")
+            except Exception as e:
+                print(f"Warning: Could not load sentence-transformers model: {e}")
         
         # Cache expensive semantic embeddings to avoid repeated model calls.
-        self._embedding_cache = {}
+        self._embedding_cache = OrderedDict()
+        self._new_embeddings = {}
         self._role_embeddings = {}
         
         # TF-IDF vectorizer for keyword matching
@@ -115,33 +111,71 @@ class FairHireSentinel:
 
     def _encode_text(self, text: str):
         """Return cached embedding for one text with progress bars disabled."""
-        normalized = str(text).lower().strip()
+        normalized = self.normalize_text(text)
         if not normalized or not self.semantic_model:
             return None
-        cached = self._embedding_cache.get(normalized)
+        cached = self._cached_embedding(normalized)
         if cached is not None:
             return cached
         embedding = self.semantic_model.encode(
             [normalized],
             show_progress_bar=False
         )[0]
-        self._embedding_cache[normalized] = embedding
+        self._cache_embedding(normalized, embedding)
+        self._new_embeddings[normalized] = embedding
         return embedding
 
     def _encode_texts(self, texts: List[str]) -> List:
         """Batch-encode texts with caching and no tqdm output."""
         if not self.semantic_model:
             return []
-        normalized_texts = [str(t).lower().strip() for t in texts]
-        pending = [t for t in normalized_texts if t and t not in self._embedding_cache]
+        normalized_texts = [self.normalize_text(t) for t in texts]
+        # Collected here: a large batch may evict its own first entries from the cache
+        found = {}
+        for text in normalized_texts:
+            if text and text not in found:
+                found[text] = self._cached_embedding(text)
+        pending = [text for text, embedding in found.items() if embedding is None]
         if pending:
             embeddings = self.semantic_model.encode(
                 pending,
                 show_progress_bar=False
             )
             for text, embedding in zip(pending, embeddings):
-                self._embedding_cache[text] = embedding
-        return [self._embedding_cache[t] for t in normalized_texts if t]
+                self._cache_embedding(text, embedding)
+                self._new_embeddings[text] = embedding
+                found[text] = embedding
+        return [found[t] for t in normalized_texts if t]
+
+    def _cached_embedding(self, text: str):
+        """Cached embedding for a normalized text, marked as recently used."""
+        embedding = self._embedding_cache.get(text)
+        if embedding is not None:
+            self._embedding_cache.move_to_end(text)
+        return embedding
+
+    def _cache_embedding(self, text: str, embedding):
+        """Cache an embedding, evicting the least recently used past the size limit."""
+        self._embedding_cache[text] = embedding
+        self._embedding_cache.move_to_end(text)
+        while len(self._embedding_cache) > self.EMBEDDING_CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Key under which a text's embedding is cached."""
+        return str(text).lower().strip()
+
+    def preload_embeddings(self, embeddings: Dict[str, List[float]]):
+        """Seed the embedding cache with vectors computed in earlier runs."""
+        for text, vector in embeddings.items():
+            if text not in self._embedding_cache:
+                self._cache_embedding(text, np.asarray(vector, dtype=np.float32))
+
+    def pop_new_embeddings(self) -> Dict[str, np.ndarray]:
+        """Embeddings computed since the last call, for persisting."""
+        new, self._new_embeddings = self._new_embeddings, {}
+        return new
     
     def extract_required_skills(self, job_title: str) -> List[str]:
         """Extract required skills for a job position using ML-based matching"""
@@ -488,8 +522,14 @@ class FairHireSentinel:
         
         return bias_cases
     
-    def run_full_analysis(self, candidates: List[Dict], job_keywords: List[str]) -> Dict:
-        """Run complete Fair-Hire Sentinel analysis with two-stage screening"""
+    def run_full_analysis(self, candidates: List[Dict], job_keywords: List[str],
+                          progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Run complete Fair-Hire Sentinel analysis with two-stage screening
+
+        ``progress`` is called with 1 after each candidate is screened; an
+        exception it raises (e.g. a cancellation) aborts the run.
+        """
         results = {
             'immediate_interviews': [],
             'rescue_alerts': [],
@@ -590,6 +630,9 @@ class FairHireSentinel:
                     )
                     candidate['ats_score'] = final_score * 100
                     results['rejected'].append(candidate)
+
+            if progress is not None:
+                progress(1)
         
         # Run demographic bias analysis
         results['bias_analysis'] = self.analyze_demographic_bias(candidates)
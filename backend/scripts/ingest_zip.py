@@ -0,0 +1,50 @@
+"""
+Import the CVs in a ZIP archive into the configured storage backend
+
+Members are read straight from the archive (nothing is unpacked), extracted,
+parsed and written in batches, exactly as the ``POST /api/v1/cvs/bulk/zip``
+endpoint does. Prints throughput stats and every failed or skipped member.
+
+Usage
+  python backend/scripts/ingest_zip.py agency_batch.zip
+  python backend/scripts/ingest_zip.py agency_batch.zip --workers 8 --json > results.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.extraction_executor import extraction_executor  # noqa: E402
+from app.services.zip_ingest_service import ZipIngestService  # noqa: E402
+
+
+async def run(path: str, workers: int | None, include_ok: bool) -> dict:
+    try:
+        return await ZipIngestService(workers=workers, include_ok=include_ok).ingest(path)
+    finally:
+        extraction_executor.shutdown()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk-import CV files from a ZIP archive")
+    parser.add_argument("archive", help="Path of the ZIP archive")
+    parser.add_argument("--workers", type=int, help="Members extracted concurrently (default: ZIP_INGEST_WORKERS)")
+    parser.add_argument("--json", action="store_true", help="Print every member result as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.archive, args.workers, include_ok=args.json))
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        for result in report["results"]:
+            print(f"{result['status']:>8}  {result['member']}: {result.get('error', '')}")
+        print(json.dumps(report["stats"]))
+    return 1 if report["stats"]["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
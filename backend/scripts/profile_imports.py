@@ -0,0 +1,100 @@
+"""
+Report where the API spends its import time
+
+Imports ``main`` in a fresh interpreter under ``python -X importtime`` and
+lists the top-level packages that take the longest to import (self time of
+all their modules, wherever they sit in the import tree). With
+``--budget-ms`` the script exits non-zero when importing ``main`` takes longer,
+so it can run in CI to catch an eager import of a heavy library creeping back.
+
+Usage
+  python backend/scripts/profile_imports.py                       # top 25 packages
+  python backend/scripts/profile_imports.py --module app.api.v1.api --top 10
+  python backend/scripts/profile_imports.py --budget-ms 1500 --json
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:      self [us] |  cumulative | imported package"
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+# Modules that are only imported once models are actually needed
+HEAVY = ("torch", "sentence_transformers", "transformers", "sklearn", "spacy", "firebase_admin")
+
+
+def profile(module: str) -> dict:
+    """Import ``module`` in a subprocess and aggregate ``-X importtime`` output"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    packages = defaultdict(int)
+    subtree = []
+    seen = set()
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative = int(match.group(1)), int(match.group(2))
+        indent, name = len(match.group(3)), match.group(4)
+        # Output is post-order: a module's imports are listed (indented) before it
+        subtree.append((name, self_us))
+        if indent > 1:
+            continue
+        if name == module:
+            total_us = cumulative
+            # Attribute self time to top-level packages across the whole import tree
+            for child, child_us in subtree:
+                packages[child.split(".")[0]] += child_us
+                seen.add(child.split(".")[0])
+        subtree = []
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "total_ms": round(total_us / 1000, 1),
+        "packages": [{"package": name, "ms": round(us / 1000, 1)} for name, us in ranked],
+        "heavy_loaded": sorted(name for name in seen if name in HEAVY)
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile import time of the API entry point")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=25, help="Packages to list")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the import takes longer than this")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = profile(args.module)
+    report["packages"] = report["packages"][:args.top]
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        if not report["ok"]:
+            print(f"import {args.module} failed: {report['error']}")
+        print(f"import {args.module}: {report['total_ms']:.1f} ms")
+        for entry in report["packages"]:
+            print(f"  {entry['ms']:>9.1f} ms  {entry['package']}")
+        if report["heavy_loaded"]:
+            print(f"Eagerly imported heavy packages: {', '.join(report['heavy_loaded'])}")
+
+    if not report["ok"]:
+        return 1
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        print(f"Import time {report['total_ms']:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
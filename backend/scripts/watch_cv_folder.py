@@ -0,0 +1,43 @@
+"""
+Run the CV drop-folder watcher as a standalone service
+
+New or modified CV files in the folder are debounced, extracted, parsed and
+saved to the configured storage backend; metrics are logged periodically.
+
+Usage
+  python backend/scripts/watch_cv_folder.py                 # folder from CV_WATCH_FOLDER / sample_cvs
+  python backend/scripts/watch_cv_folder.py --folder /mnt/cv-drop --stats-interval 30
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cv_folder_watcher import create_watcher  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Watch a folder and ingest CVs as they arrive")
+    parser.add_argument("--folder", help="Folder to watch (default: CV_WATCH_FOLDER or sample_cvs)")
+    parser.add_argument("--stats-interval", type=float, default=60.0, help="Seconds between metric logs")
+    args = parser.parse_args()
+
+    watcher = create_watcher(args.folder)
+    watcher.start()
+    try:
+        while True:
+            time.sleep(args.stats_interval)
+            print(json.dumps(watcher.stats()), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,42 @@
 """
 Test configuration for pytest
 """
-import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+import os
+import tempfile
+
+# Service tests run against the in-memory backend; set before settings are loaded
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("LOCAL_BUCKET_DIR", tempfile.mkdtemp(prefix="fairhire-bucket-"))
+os.environ.setdefault("EXTRACTION_CACHE_PATH", "")
+
+import pytest  # noqa: E402
+
+from app.storage.memory_backend import MemoryBackend  # noqa: E402
 
 
 @pytest.fixture
-def client():
-    """Test client fixture"""
+def client(firebase):
+    """Test client fixture (on an emptied in-memory store)"""
+    # Imported here so service tests do not need the whole API app
+    from fastapi.testclient import TestClient
+    from main import app
     return TestClient(app)
 
 
+@pytest.fixture
+def store(tmp_path):
+    """Empty in-memory storage backend with a bucket under tmp_path"""
+    return MemoryBackend(bucket_dir=str(tmp_path / "bucket"))
+
+
+@pytest.fixture
+def firebase():
+    """FirebaseService on an emptied in-memory store"""
+    from firebase_service import FirebaseService
+    FirebaseService.db.reset()
+    return FirebaseService
+
+
 @pytest.fixture
 def mock_cv_data():
     """Mock CV data for testing"""
@@ -0,0 +1,61 @@
+"""
+Tests for the keyed alert store on the in-memory backend
+"""
+from datetime import datetime, timedelta
+
+from app.services.alert_store import AlertStore
+
+
+def _alerts(store):
+    return {doc.id: doc.to_dict() for doc in store.collection(AlertStore.COLLECTION).stream()}
+
+
+def test_rerun_updates_alerts_in_place(store):
+    """The same alert from a second run overwrites the first under its deterministic id"""
+    alerts = AlertStore(store)
+    first = alerts.upsert_many([{"type": "rescue", "candidate_id": "CV-1", "score": 60}], "run-1",
+                               supersede=["rescue"])
+    second = alerts.upsert_many([{"type": "rescue", "candidate_id": "CV-1", "score": 75}], "run-2",
+                                supersede=["rescue"])
+
+    stored = _alerts(store)
+    assert list(stored) == [AlertStore.key("rescue", "CV-1")] == [second[0]["id"]]
+    assert stored[second[0]["id"]]["score"] == 75
+    assert stored[second[0]["id"]]["runId"] == "run-2"
+    assert stored[second[0]["id"]]["created_at"] == first[0]["created_at"]
+
+
+def test_alerts_missing_from_a_run_are_deactivated(store):
+    """Active alerts of a superseded type that the run did not produce are deactivated"""
+    alerts = AlertStore(store, ttl_days=7)
+    alerts.upsert_many([{"type": "rescue", "candidate_id": "CV-1"},
+                        {"type": "rescue", "candidate_id": "CV-2"},
+                        {"type": "bias"}], "run-1")
+
+    alerts.upsert_many([{"type": "rescue", "candidate_id": "CV-2"}], "run-2", supersede=["rescue"])
+
+    stored = _alerts(store)
+    gone = stored[AlertStore.key("rescue", "CV-1")]
+    assert gone["active"] is False and gone["supersededBy"] == "run-2"
+    assert gone["expiresAt"] - gone["deactivatedAt"] == timedelta(days=7)
+    # Other types are not owned by the run and stay active
+    assert {a["id"] for a in alerts.get_active()} == {AlertStore.key("rescue", "CV-2"), "bias"}
+
+
+def test_compact_deletes_only_expired_alerts(store):
+    """Expired alerts are deleted, at most BATCH_SIZE per call; live ones are kept"""
+    alerts = AlertStore(store)
+    alerts.BATCH_SIZE = 3
+    collection = store.collection(AlertStore.COLLECTION)
+    past = datetime.now() - timedelta(days=1)
+    for n in range(5):
+        collection.document(f"old-{n}").set({"type": "rescue", "active": False, "expiresAt": past})
+    collection.document("later").set(
+        {"type": "rescue", "active": False, "expiresAt": datetime.now() + timedelta(days=1)}
+    )
+    collection.document("live").set({"type": "rescue", "active": True, "expiresAt": None})
+
+    assert alerts.compact() == 3
+    assert alerts.compact() == 2
+    assert alerts.compact() == 0
+    assert set(_alerts(store)) == {"later", "live"}
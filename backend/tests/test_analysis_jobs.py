@@ -0,0 +1,88 @@
+"""
+Tests for the single-flight analysis job registry
+"""
+import asyncio
+
+from app.services.analysis_jobs import AnalysisJobManager
+
+
+def test_start_coalesces_while_a_run_is_in_flight(store):
+    """A second start returns the running job; a new one starts after it ends"""
+    manager = AnalysisJobManager(store)
+    calls = []
+
+    async def runner(job):
+        calls.append(job.job_id)
+        await asyncio.sleep(0.05)
+        return {"analyzed": 3}
+
+    async def run():
+        first, created = manager.start(runner)
+        second, created_again = manager.start(runner)
+        assert created and not created_again
+        assert second is first
+        await manager._task
+        third, created_third = manager.start(runner)
+        await manager._task
+        return first, third, created_third
+
+    first, third, created_third = asyncio.run(run())
+    assert created_third and third is not first
+    assert calls == [first.job_id, third.job_id]
+    assert first.state == "completed" and first.result == {"analyzed": 3}
+    assert manager.get() is third
+    recorded = store.collection(AnalysisJobManager.COLLECTION).document(first.job_id).get()
+    assert recorded.to_dict()["state"] == "completed"
+
+
+def test_cancel_stops_at_the_next_checkpoint(store):
+    """A cancelled run ends as cancelled, unless it is in a non-cancellable phase"""
+    manager = AnalysisJobManager(store)
+
+    async def runner(job):
+        job.set_phase("scoring", total=10)
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            job.advance()
+        return {}
+
+    async def saving(job):
+        job.set_phase("saving", cancellable=False)
+        await asyncio.sleep(0.05)
+        job.advance()
+        return {"saved": True}
+
+    async def run():
+        job, _ = manager.start(runner)
+        await asyncio.sleep(0.03)
+        manager.cancel(job.job_id)
+        await manager._task
+        unstoppable, _ = manager.start(saving)
+        await asyncio.sleep(0.01)
+        manager.cancel(unstoppable.job_id)
+        await manager._task
+        return job, unstoppable
+
+    job, unstoppable = asyncio.run(run())
+    assert job.state == "cancelled"
+    assert 0 < job.processed < 10
+    assert unstoppable.state == "completed"
+    assert manager.cancel("ANL-unknown") is None
+
+
+def test_failed_run_keeps_its_error(store):
+    """A run that raises ends as failed with the error recorded"""
+    manager = AnalysisJobManager(store)
+
+    async def runner(job):
+        raise RuntimeError("model unavailable")
+
+    async def run():
+        job, _ = manager.start(runner)
+        await manager._task
+        return job
+
+    job = asyncio.run(run())
+    assert job.state == "failed" and job.done
+    assert job.error == "model unavailable"
+    assert manager.history()[0]["state"] == "failed"
@@ -0,0 +1,108 @@
+"""
+Tests for the background blob uploader against the local directory bucket
+"""
+import asyncio
+import os
+
+from app.services.blob_uploader import BlobUploader
+from app.storage.local import LocalBucket
+from app.utils.uploads import SpooledUpload
+
+
+class FlakyBucket(LocalBucket):
+    """LocalBucket whose first ``failures`` uploads raise"""
+
+    def __init__(self, root, failures):
+        super().__init__(root)
+        self.failures = failures
+        self.attempts = 0
+
+    def blob(self, name, chunk_size=None):
+        blob = super().blob(name, chunk_size=chunk_size)
+        upload = blob.upload_from_filename
+
+        def flaky_upload(filename, content_type=None):
+            self.attempts += 1
+            if self.attempts <= self.failures:
+                raise ConnectionError("connection reset")
+            upload(filename, content_type=content_type)
+
+        blob.upload_from_filename = flaky_upload
+        return blob
+
+
+def _upload(data=b"%PDF-1.4 cv"):
+    upload = SpooledUpload("cv.pdf", "application/pdf", spool_max_bytes=1024)
+    upload.write(data)
+    upload.finish()
+    return upload
+
+
+def _uploader(store, bucket, directory, **kwargs):
+    return BlobUploader(store, bucket, str(directory), backoff_seconds=0.01, **kwargs)
+
+
+async def _enqueue_and_drain(uploader, blob_path, targets):
+    await uploader.enqueue(_upload(), blob_path, targets)
+    await uploader.drain(timeout=5)
+    await uploader.stop()
+
+
+def test_failed_transfers_are_retried_until_stored(store, tmp_path):
+    """Transient errors are retried; the URL is recorded and staging cleaned up"""
+    bucket = FlakyBucket(tmp_path / "bucket", failures=2)
+    uploader = _uploader(store, bucket, tmp_path / "staging", workers=1)
+    store.collection("cvs").document("cv-1").set({"name": "Ada"})
+
+    asyncio.run(_enqueue_and_drain(uploader, "cvs/cv-1.pdf", [("cvs", "cv-1")]))
+
+    assert bucket.attempts == 3
+    assert uploader.stats()["retries"] == 2 and uploader.stats()["uploaded"] == 1
+    assert (tmp_path / "bucket" / "cvs" / "cv-1.pdf").read_bytes() == b"%PDF-1.4 cv"
+    doc = store.collection("cvs").document("cv-1").get().to_dict()
+    assert doc["fileUrl"] == bucket.blob("cvs/cv-1.pdf").public_url
+    assert os.listdir(tmp_path / "staging") == []
+
+
+def test_gives_up_after_max_attempts(store, tmp_path):
+    """A transfer that keeps failing records the error on its documents"""
+    bucket = FlakyBucket(tmp_path / "bucket", failures=10)
+    uploader = _uploader(store, bucket, tmp_path / "staging", workers=1, max_attempts=3)
+    store.collection("cvs").document("cv-1").set({"name": "Ada"})
+
+    asyncio.run(_enqueue_and_drain(uploader, "cvs/cv-1.pdf", [("cvs", "cv-1")]))
+
+    assert bucket.attempts == 3
+    assert uploader.stats()["failed"] == 1
+    doc = store.collection("cvs").document("cv-1").get().to_dict()
+    assert doc["fileUploadError"] == "connection reset"
+    assert "fileUrl" not in doc
+    assert os.listdir(tmp_path / "staging") == []
+
+
+def test_staged_transfers_resume_on_next_start(store, tmp_path):
+    """Files still staged when the uploader stopped are uploaded by the next one"""
+    bucket = LocalBucket(tmp_path / "bucket")
+    store.collection("cvs").document("cv-1").set({"name": "Ada"})
+
+    async def stage_only():
+        # No workers: the transfer stays staged when the uploader stops
+        stopped = _uploader(store, bucket, tmp_path / "staging", workers=0)
+        await stopped.enqueue(_upload(), "cvs/cv-1.pdf", [("cvs", "cv-1")])
+        await stopped.stop()
+
+    async def resume():
+        uploader = _uploader(store, bucket, tmp_path / "staging", workers=1)
+        await uploader.start()
+        # The last task re-queues the staged manifests
+        await uploader._tasks[-1]
+        await uploader.drain(timeout=5)
+        await uploader.stop()
+
+    asyncio.run(stage_only())
+    assert len(os.listdir(tmp_path / "staging")) == 2
+    asyncio.run(resume())
+
+    assert bucket.blob("cvs/cv-1.pdf").exists()
+    assert "fileUrl" in store.collection("cvs").document("cv-1").get().to_dict()
+    assert os.listdir(tmp_path / "staging") == []
@@ -0,0 +1,84 @@
+"""
+Tests for the streaming NDJSON bulk import
+"""
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from app.core.exceptions import PayloadTooLargeException
+from app.services.bulk_ingest_service import BulkIngestService, BulkIngestTooLarge
+
+
+async def _stream(body: bytes, chunk_size: int = 4096):
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+def _ndjson(records) -> bytes:
+    return b"".join(json.dumps(record).encode() + b"\n" for record in records)
+
+
+def test_ingest_creates_valid_records_and_reports_errors(firebase, mock_cv_data):
+    """Valid lines are written, invalid ones are reported by line number"""
+    body = _ndjson([mock_cv_data, {"name": "No email"}]) + b"not json\n" + _ndjson([mock_cv_data])
+
+    report = asyncio.run(BulkIngestService().ingest(_stream(body, chunk_size=50)))
+
+    assert report["stats"]["created"] == 2
+    assert report["stats"]["failed"] == 2
+    assert [r["status"] for r in report["results"]] == ["created", "error", "error", "created"]
+    assert len(firebase.get_cvs()) == 2
+
+
+def test_gzip_body_is_decompressed(firebase, mock_cv_data):
+    """A gzip body is inflated while streaming"""
+    body = gzip.compress(_ndjson([mock_cv_data] * 5))
+
+    report = asyncio.run(BulkIngestService(include_ok=False).ingest(_stream(body, chunk_size=64)))
+
+    assert report["stats"]["created"] == 5
+    assert report["results"] == []
+
+
+def test_gzip_bomb_is_rejected(firebase):
+    """A small gzip body inflating past the cap is refused without inflating it whole"""
+    body = gzip.compress(b" " * (20 * 1024 * 1024))
+    service = BulkIngestService(max_inflated_bytes=1024 * 1024)
+
+    with pytest.raises(PayloadTooLargeException):
+        asyncio.run(service.ingest(_stream(body, chunk_size=len(body))))
+    # Stopped within one decompress step of the cap
+    assert service._inflated_bytes <= 1024 * 1024 + service.INFLATE_CHUNK_BYTES
+
+
+def test_rows_before_the_cap_are_written_and_reported(firebase, mock_cv_data):
+    """Lines inflated before the cap are committed and returned with the 413"""
+    records = _ndjson([mock_cv_data] * 3)
+    body = gzip.compress(records + b" " * (4 * 1024 * 1024))
+    service = BulkIngestService(max_inflated_bytes=1024 * 1024)
+    service.BATCH_SIZE = 2
+
+    with pytest.raises(BulkIngestTooLarge) as raised:
+        asyncio.run(service.ingest(_stream(body, chunk_size=64)))
+
+    report = raised.value.report
+    assert raised.value.status_code == 413
+    assert report["stats"]["created"] == 3
+    assert [r["line"] for r in report["results"]] == [1, 2, 3]
+    assert not service._inflight
+    assert len(firebase.get_cvs()) == 3
+
+
+def test_api_returns_partial_results_with_413(client, mock_cv_data, monkeypatch):
+    """POST /cvs/bulk answers a gzip bomb with 413 and the lines imported before it"""
+    monkeypatch.setattr("app.core.config.settings.BULK_MAX_INFLATED_MB", 1)
+    body = gzip.compress(_ndjson([mock_cv_data]) + b" " * (4 * 1024 * 1024))
+
+    response = client.post("/api/v1/cvs/bulk", content=body,
+                           headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 413
+    assert response.json()["stats"]["created"] == 1
+    assert response.json()["detail"].startswith("Decompressed body exceeds")
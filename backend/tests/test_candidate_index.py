@@ -0,0 +1,67 @@
+"""
+Tests for the candidate lookup index
+"""
+
+
+def test_resolves_by_candidate_id_and_direct_doc_id(firebase):
+    """A CV is found through its candidateId entry or its own document id"""
+    firebase.set_cv("doc-1", {"candidateId": "C-1", "name": "Ada", "email": "ada@example.com"})
+
+    assert firebase.resolve_cv_id(candidate_id="C-1") == "doc-1"
+    assert firebase.resolve_cv_id(doc_id="doc-1") == "doc-1"
+    assert firebase.resolve_cv_id(email="ADA@example.com ") == "doc-1"
+    assert firebase.resolve_cv_id(candidate_id="C-404") is None
+
+
+def test_shared_key_of_deleted_cv_moves_to_the_older_cv(firebase):
+    """Deleting the newer of two CVs sharing an email resolves to the older one"""
+    firebase.set_cv("old", {"candidateId": "C-old", "email": "shared@example.com",
+                            "uploadedAt": "2026-01-01"})
+    firebase.set_cv("new", {"candidateId": "C-new", "email": "shared@example.com",
+                            "uploadedAt": "2026-02-01"})
+    assert firebase.resolve_cv_id(email="shared@example.com") == "new"
+
+    firebase.delete_cv("new")
+
+    assert firebase.resolve_cv_id(email="shared@example.com") == "old"
+    assert firebase.resolve_cv_id(email="shared@example.com", candidate_id="C-new") == "old"
+
+
+def test_changed_email_no_longer_resolves_to_the_cv(firebase):
+    """An email taken off a CV stops resolving to it; the new one does"""
+    firebase.set_cv("c1", {"candidateId": "C1", "email": "ada@x.com"})
+    firebase.update_cv("C1", {"email": "new@x.com"})
+
+    assert firebase.resolve_cv_id(email="ada@x.com") is None
+    assert firebase.resolve_cv_id(email="new@x.com") == "c1"
+
+
+def test_shared_key_kept_when_another_cv_holds_it(firebase):
+    """Removing a key from an older CV leaves the newer CV's entry alone"""
+    firebase.set_cv("old", {"name": "Bo", "uploadedAt": "2026-01-01"})
+    firebase.set_cv("new", {"name": "Bo", "uploadedAt": "2026-02-01"})
+    firebase.update_cv("old", {"name": "Robert"})
+
+    assert firebase.resolve_cv_id(name="bo") == "new"
+    assert firebase.resolve_cv_id(name="robert") == "old"
+
+
+def test_stale_entry_is_repaired_from_the_field_query(firebase):
+    """An entry pointing at a CV without the key is replaced by the query result"""
+    firebase.set_cv("a", {"email": "ada@x.com"})
+    # Written behind the index's back
+    firebase.db.collection("cvs").document("a").set({"email": "other@x.com"})
+    firebase.db.collection("cvs").document("b").set({"email": "ada@x.com"})
+
+    assert firebase.resolve_cv_id(email="ada@x.com") == "b"
+    entry = firebase.index._ref("email:ada@x.com").get().to_dict()
+    assert entry["docId"] == "b"
+
+
+def test_ensure_built_backfills_once(firebase):
+    """CVs written behind the index's back are resolvable after the startup backfill"""
+    firebase.db.collection("cvs").document("legacy").set({"candidateId": "C-9"})
+
+    assert firebase.index.ensure_built() is True
+    assert firebase.resolve_cv_id(candidate_id="C-9") == "legacy"
+    assert firebase.index.ensure_built() is False
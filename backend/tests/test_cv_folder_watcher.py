@@ -0,0 +1,67 @@
+"""
+Tests for the CV drop-folder watcher
+"""
+import time
+
+from app.services.cv_folder_watcher import CVFolderWatcher
+from app.services.extraction_cache import ExtractionCache
+from cv_file_processor import CVFileProcessor
+
+CV_TEXT = "{name}\nSoftware Engineer\nPython, Docker and SQL, 5 years of experience"
+
+
+def _watcher(folder, **kwargs) -> CVFolderWatcher:
+    processor = CVFileProcessor(str(folder), cache=ExtractionCache(":memory:", "test"))
+    return CVFolderWatcher(processor, debounce_seconds=0.05, poll_interval=0.05, **kwargs)
+
+
+def _wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_full_backlog_defers_files_instead_of_dropping_them(firebase, tmp_path):
+    """With a backlog of one, every dropped file is still ingested"""
+    folder = tmp_path / "drop"
+    folder.mkdir()
+    for name in ("Ada_Lovelace", "Grace_Hopper", "Alan_Turing"):
+        (folder / f"{name}.txt").write_text(CV_TEXT.format(name=name.replace("_", " ")))
+    watcher = _watcher(folder, workers=1, max_backlog=1)
+
+    watcher.start()
+    try:
+        assert _wait_for(lambda: watcher.stats()["processed"] == 3)
+    finally:
+        watcher.stop()
+
+    names = sorted(cv["name"] for cv in firebase.get_cvs())
+    assert names == ["Ada Lovelace", "Alan Turing", "Grace Hopper"]
+    assert watcher.stats()["failed"] == 0
+
+
+def test_path_in_flight_is_not_dispatched_again(tmp_path):
+    """Events for a file that is still being processed wait until it finishes"""
+    folder = tmp_path / "drop"
+    folder.mkdir()
+    path = folder / "Ada_Lovelace.txt"
+    path.write_text(CV_TEXT.format(name="Ada Lovelace"))
+    watcher = _watcher(folder)
+    submitted = []
+    watcher._pool = type("Pool", (), {"submit": lambda self, *args: submitted.append(args)})()
+
+    watcher._inflight.add(str(path))
+    watcher.notify(str(path))
+    time.sleep(0.1)
+    watcher._dispatch_ready()
+    assert submitted == []
+    assert watcher.stats()["pending_debounce"] == 1
+
+    watcher._inflight.discard(str(path))
+    watcher._dispatch_ready()  # Records the size; dispatched once it is unchanged
+    time.sleep(0.1)
+    watcher._dispatch_ready()
+    assert [args[1] for args in submitted] == [str(path)]
@@ -0,0 +1,59 @@
+"""
+Tests for the CV extraction cache
+"""
+from app.services.extraction_cache import ExtractionCache
+from cv_file_processor import CVFileProcessor
+
+
+def test_new_version_misses_and_prunes_older_versions(tmp_path):
+    """A new extractor version ignores and drops the rows of older versions"""
+    path = str(tmp_path / "cache.sqlite3")
+    old = ExtractionCache(path, "1-old")
+    old.put_texts({"abc": "old text"})
+    assert old.get("abc")["text_content"] == "old text"
+
+    new = ExtractionCache(path, "1-new")
+    assert new.get("abc") is None
+    new.put_texts({"abc": "new text"})
+    assert old.get("abc") is None
+
+
+def test_older_version_does_not_prune_newer_rows(tmp_path):
+    """An old process starting during a rolling deploy keeps the new version's rows"""
+    path = str(tmp_path / "cache.sqlite3")
+    ExtractionCache(path, "1-old").close()
+    new = ExtractionCache(path, "1-new")
+    new.put_texts({"abc": "new text"})
+
+    restarted_old = ExtractionCache(path, "1-old")
+    restarted_old.put_texts({"def": "old text"})
+    assert new.get("abc")["text_content"] == "new text"
+    assert restarted_old.get("def")["text_content"] == "old text"
+
+
+def test_parsed_fields_follow_their_text(tmp_path):
+    """Parsed fields are stored against cached text and reset when the text is replaced"""
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite3"), "1")
+    cache.put_texts({"abc": "text"})
+    cache.put_parsed({"abc": {"name": "Ada"}})
+    assert cache.get("abc")["parsed"] == {"name": "Ada"}
+
+    cache.put_texts({"abc": "text"})
+    assert cache.get("abc")["parsed"] is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_failed_extractions_are_not_cached(tmp_path):
+    """A file that fails to extract is retried on the next scan instead of cached"""
+    folder = tmp_path / "cvs"
+    folder.mkdir()
+    (folder / "Ada_Engineer.txt").write_text("Ada Lovelace\nSoftware Engineer")
+    (folder / "Broken_Developer.docx").write_bytes(b"not a docx file")
+    cache = ExtractionCache(":memory:", "1")
+    processor = CVFileProcessor(str(folder), cache=cache)
+
+    files = {cv["filename"]: cv for cv in processor.scan_cv_folder()}
+
+    assert files["Broken_Developer.docx"]["text_content"] == "[DOCX extraction failed]"
+    assert cache.get(files["Broken_Developer.docx"]["sha256"]) is None
+    assert cache.get(files["Ada_Engineer.txt"]["sha256"])["text_content"].startswith("Ada Lovelace")
@@ -0,0 +1,77 @@
+"""
+Tests for the extraction worker processes
+"""
+import asyncio
+import os
+import threading
+
+import pytest
+
+from app.services.extraction_executor import ExtractionExecutor, ExtractionTimeout
+
+
+def _hanging_file(tmp_path, name):
+    """A FIFO: reading it blocks until something writes to it"""
+    path = tmp_path / name
+    os.mkfifo(path)
+    return str(path)
+
+
+def _release(path, text):
+    """Unblock a reader of a FIFO (blocks until the reader has opened it)"""
+    def write():
+        with open(path, "w") as f:
+            f.write(text)
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    return thread
+
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs FIFOs")
+
+
+def test_queued_file_is_not_timed_while_waiting(tmp_path):
+    """A fast file queued behind a slow one gets its own full timeout"""
+    executor = ExtractionExecutor(max_workers=1, timeout=3, memory_limit_mb=0)
+    slow = _hanging_file(tmp_path, "slow.txt")
+
+    async def run():
+        return await asyncio.gather(
+            executor.extract(slow, "slow.txt"),
+            executor.extract(b"fast text", "fast.txt"),
+            return_exceptions=True
+        )
+
+    try:
+        slow_result, fast_result = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert isinstance(slow_result, ExtractionTimeout)
+    assert fast_result == "fast text"
+    assert executor.stats()["timeouts"] == 1
+
+
+def test_timeout_only_restarts_the_worker_that_overran(tmp_path):
+    """A document running on another worker survives the slow one's timeout"""
+    executor = ExtractionExecutor(max_workers=2, timeout=3, memory_limit_mb=0)
+    slow = _hanging_file(tmp_path, "slow.txt")
+    other = _hanging_file(tmp_path, "other.txt")
+
+    async def run():
+        slow_task = asyncio.create_task(executor.extract(slow, "slow.txt"))
+        # Started later so its own timeout is well clear of the slow one's
+        await asyncio.sleep(1)
+        other_task = asyncio.create_task(executor.extract(other, "other.txt"))
+        with pytest.raises(ExtractionTimeout):
+            await slow_task
+        # Still blocked on its own worker; finishes once its input arrives
+        assert not other_task.done()
+        _release(other, "other text")
+        return await other_task
+
+    try:
+        assert asyncio.run(run()) == "other text"
+    finally:
+        executor.shutdown()
+    assert executor.stats()["restarts"] == 1
@@ -0,0 +1,34 @@
+"""
+Tests for the FirebaseService CV writes on the in-memory backend
+"""
+from app.services.text_store import TextStore
+
+
+def test_update_batch_does_not_resurrect_deleted_cvs(firebase):
+    """A CV deleted after it was read stays deleted; the others are updated"""
+    firebase.set_cv("kept", {"name": "Ada", "status": "pending"})
+    firebase.set_cv("gone", {"name": "Bo", "status": "pending"})
+    current = {doc_id: firebase.get_cv(doc_id) for doc_id in ("kept", "gone")}
+    firebase.delete_cv("gone")
+
+    missing = firebase.update_cvs_batch(
+        {doc_id: {"analyzed": True, "atsScore": 70} for doc_id in current}, current
+    )
+
+    assert missing == ["gone"]
+    assert not firebase.db.collection("cvs").document("gone").get().exists
+    assert firebase.get_cv("kept")["atsScore"] == 70
+    assert firebase.metrics.read_counters()["total"] == 1
+
+
+def test_update_batch_keeps_other_offloaded_fields(firebase):
+    """Offloading one field in an update leaves the refs of the others in place"""
+    firebase.set_cv("a", {"name": "Ada", "extractedText": "cv text " * 200})
+    current = {"a": firebase.get_cv("a")}
+
+    assert firebase.update_cvs_batch({"a": {"content": "more text " * 200}}, current) == []
+
+    cv = firebase.get_cv("a")
+    assert set(cv[TextStore.REFS_FIELD]) == {"extractedText", "content"}
+    firebase.texts.hydrate([cv])
+    assert cv["extractedText"].startswith("cv text")
@@ -0,0 +1,75 @@
+"""
+Tests for the compiled job profile cache
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.services import job_profile
+from app.services.job_profile import JobProfileCache
+
+
+class FakeEncoder:
+    """Stands in for the sentence transformer; counts encodes"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=False, show_progress_bar=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [np.array([0.6, 0.8], dtype=np.float32) for _ in texts]
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    encoder = FakeEncoder()
+    monkeypatch.setattr(job_profile.models, "get", lambda name: encoder)
+    return encoder
+
+
+def test_descriptions_are_compiled_once(encoder):
+    """Whitespace variants of a description share one compiled profile"""
+    cache = JobProfileCache(max_size=4)
+
+    profile = cache.get("Python  developer\nFastAPI")
+    assert cache.get(" Python developer FastAPI ") is profile
+    assert encoder.calls == 1
+    assert cache.stats() == {"size": 1, "max_size": 4, "hits": 1, "misses": 1}
+    assert profile.ats_score("Senior python developer") == 66.67
+    assert profile.semantic_score(np.array([0.6, 0.8])) == 1.0
+
+
+def test_least_recently_used_profile_is_evicted(encoder):
+    """Past max_size the profile used longest ago is dropped"""
+    cache = JobProfileCache(max_size=2)
+    first = cache.get("first role")
+    cache.get("second role")
+    cache.get("first role")
+    cache.get("third role")
+
+    assert cache.get("first role") is first
+    assert encoder.calls == 3
+    cache.get("second role")
+    assert encoder.calls == 4
+
+
+def test_concurrent_callers_share_one_build(monkeypatch):
+    """Threads asking for the same new description wait for a single encode"""
+    encoder = FakeEncoder(delay=0.1)
+    monkeypatch.setattr(job_profile.models, "get", lambda name: encoder)
+    cache = JobProfileCache()
+    profiles = []
+
+    threads = [threading.Thread(target=lambda: profiles.append(cache.get("data engineer")))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert encoder.calls == 1
+    assert len({id(profile) for profile in profiles}) == 1
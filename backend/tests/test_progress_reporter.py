@@ -0,0 +1,76 @@
+"""
+Tests for the rate-limited analysis progress notifications
+"""
+import asyncio
+
+import pytest
+
+from app.services import websocket_service
+from app.services.websocket_service import ProgressReporter
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Messages the reporter broadcasts, as (kind, payload) pairs"""
+    messages = []
+    service = websocket_service.notification_service
+
+    async def progress(current, total, rescued_count):
+        messages.append(("progress", (current, total, rescued_count)))
+
+    async def rescued(candidates):
+        messages.append(("rescued", candidates))
+
+    async def biases(items):
+        messages.append(("biases", items))
+
+    monkeypatch.setattr(service, "notify_analysis_progress", progress)
+    monkeypatch.setattr(service, "notify_candidates_rescued", rescued)
+    monkeypatch.setattr(service, "notify_biases_detected", biases)
+    return messages
+
+
+def test_updates_within_an_interval_are_coalesced(sent):
+    """Many updates produce a few progress messages, ending with the final count"""
+    async def run():
+        async with ProgressReporter(100, interval=0.5, max_digest_items=10) as progress:
+            for current in range(1, 101):
+                progress.update(current)
+                await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    counts = [payload[0] for kind, payload in sent if kind == "progress"]
+    assert len(counts) <= 2
+    assert counts[-1] == 100
+
+
+def test_rescues_and_biases_are_sent_as_digests(sent):
+    """Recorded candidates and biases go out in chunks of max_digest_items"""
+    async def run():
+        async with ProgressReporter(25, interval=0.5, max_digest_items=10) as progress:
+            for n in range(25):
+                progress.rescued({"candidateId": f"CV-{n}"})
+                progress.update(n + 1)
+            progress.bias({"type": "age"})
+
+    asyncio.run(run())
+
+    digests = [payload for kind, payload in sent if kind == "rescued"]
+    assert [len(digest) for digest in digests] == [10, 10, 5]
+    assert [payload for kind, payload in sent if kind == "biases"] == [[{"type": "age"}]]
+    assert ("progress", (25, 25, 25)) in sent
+
+
+def test_unchanged_progress_is_not_resent(sent):
+    """An idle reporter does not repeat the last count on later rounds"""
+    async def run():
+        async with ProgressReporter(10, interval=0.01) as progress:
+            progress.update(3)
+            await asyncio.sleep(0.05)
+            progress.bias({"type": "gender"})
+            await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+
+    assert sent == [("progress", (3, 10, 0)), ("biases", [{"type": "gender"}])]
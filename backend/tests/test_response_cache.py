@@ -0,0 +1,77 @@
+"""
+Tests for the single-flight response cache
+"""
+import asyncio
+
+import pytest
+
+from app.core.response_cache import SingleFlightCache
+
+
+def test_concurrent_callers_share_one_load():
+    """Callers of the same key share one load and its cached result"""
+    cache = SingleFlightCache(ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"total": 3}
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_load("home", loader) for _ in range(5)))
+        results.append(await cache.get_or_load("home", loader))
+        return results
+
+    assert asyncio.run(run()) == [{"total": 3}] * 6
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    """The caller that started the load can go away without failing the others"""
+    cache = SingleFlightCache(ttl=60)
+    release = None
+
+    async def loader():
+        await release.wait()
+        return "value"
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.create_task(cache.get_or_load("home", loader))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_load("home", loader))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        return await follower
+
+    assert asyncio.run(run()) == "value"
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    """A failed load fails all current waiters and is retried on the next call"""
+    cache = SingleFlightCache(ttl=60)
+    attempts = []
+
+    async def loader():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("store unavailable")
+        return "value"
+
+    async def run():
+        results = await asyncio.gather(
+            cache.get_or_load("home", loader), cache.get_or_load("home", loader),
+            return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        return await cache.get_or_load("home", loader)
+
+    assert asyncio.run(run()) == "value"
+    assert len(attempts) == 2
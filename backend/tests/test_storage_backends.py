@@ -0,0 +1,88 @@
+"""
+Tests for the local (in-memory and SQLite) storage backends
+"""
+import pytest
+
+from app.storage.base import FieldFilter
+from app.storage.local import NotFoundError
+from app.storage.memory_backend import MemoryBackend
+from app.storage.sqlite_backend import SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    """Each test runs against both local backends"""
+    bucket_dir = str(tmp_path / "bucket")
+    if request.param == "memory":
+        yield MemoryBackend(bucket_dir=bucket_dir)
+    else:
+        db = SQLiteBackend(str(tmp_path / "store.db"), bucket_dir=bucket_dir)
+        yield db
+        db.close()
+
+
+def test_set_get_and_merge(backend):
+    """set() replaces a document, merge=True merges nested fields"""
+    ref = backend.collection("cvs").document("C1")
+    ref.set({"name": "Ada", "scores": {"ats": 40}})
+    ref.set({"scores": {"semantic": 0.8}}, merge=True)
+
+    assert ref.get().to_dict() == {"name": "Ada", "scores": {"ats": 40, "semantic": 0.8}}
+    ref.set({"name": "Grace"})
+    assert ref.get().to_dict() == {"name": "Grace"}
+
+
+def test_update_requires_existing_document(backend):
+    """update() fails on a missing document instead of creating it"""
+    with pytest.raises(NotFoundError):
+        backend.collection("cvs").document("missing").update({"status": "new"})
+    assert not backend.collection("cvs").document("missing").get().exists
+
+
+def test_query_filters_order_and_limit(backend):
+    """where/order_by/limit select and sort like Firestore"""
+    cvs = backend.collection("cvs")
+    for i, status in enumerate(["new", "rescued", "new", "new"]):
+        cvs.document(f"C{i}").set({"status": status, "score": 10 - i})
+
+    query = cvs.where(filter=FieldFilter("status", "==", "new")).order_by("score").limit(2)
+    assert [snapshot.id for snapshot in query.stream()] == ["C3", "C2"]
+
+
+def test_batch_is_atomic(backend):
+    """A batch with a failing write applies none of its writes"""
+    cvs = backend.collection("cvs")
+    batch = backend.batch()
+    batch.set(cvs.document("C1"), {"name": "Ada"})
+    batch.update(cvs.document("missing"), {"status": "new"})
+
+    with pytest.raises(NotFoundError):
+        batch.commit()
+    assert not cvs.document("C1").get().exists
+
+
+def test_transaction_and_increment(backend):
+    """Increment transforms add to the stored value inside transactions"""
+    ref = backend.collection("metrics").document("counters")
+    ref.set({"total": 1})
+
+    def bump(transaction):
+        assert ref.get(transaction=transaction).get("total") == 1
+        transaction.update(ref, {"total": backend.increment(2), "rescued": backend.increment(1)})
+
+    backend.run_transaction(bump)
+    assert ref.get().to_dict() == {"total": 3, "rescued": 1}
+
+
+def test_get_all_and_bucket(backend):
+    """get_all reports missing documents; the bucket stores blobs on disk"""
+    cvs = backend.collection("cvs")
+    cvs.document("C1").set({"name": "Ada"})
+    snapshots = backend.get_all([cvs.document("C1"), cvs.document("C2")])
+    assert [snapshot.exists for snapshot in snapshots] == [True, False]
+
+    blob = backend.bucket().blob("cvs/C1.txt")
+    blob.upload_from_string("hello")
+    assert blob.download_as_bytes() == b"hello"
+    with pytest.raises(ValueError):
+        backend.bucket().blob("../outside.txt").upload_from_string("x")
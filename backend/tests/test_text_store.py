@@ -0,0 +1,59 @@
+"""
+Tests for the offloaded CV text store
+"""
+from app.services.text_store import TextStore
+
+LONG_TEXT = "python fastapi " * 100
+LONG_ANALYSIS = {"overall_match_score": 81, "details": ["matched skill"] * 100}
+
+
+def _save(store, texts, doc_id, data, merge=False):
+    ref = store.collection("cvs").document(doc_id)
+    ref.set(texts.offload(data), merge=merge)
+    return ref.get().to_dict()
+
+
+def test_offload_and_hydrate_round_trip(store):
+    """Large fields leave the document and come back on hydrate"""
+    texts = TextStore(store)
+    doc = _save(store, texts, "a", {"extractedText": LONG_TEXT, "semantic_analysis": LONG_ANALYSIS})
+
+    assert "extractedText" not in doc
+    assert doc["semantic_analysis"] == {"overall_match_score": 81}
+    texts.hydrate([doc])
+    assert doc["extractedText"] == LONG_TEXT
+    assert doc["semantic_analysis"] == LONG_ANALYSIS
+
+
+def test_inline_rewrite_wins_over_stale_reference(store):
+    """A field rewritten inline by a merge write is not replaced by the old payload"""
+    texts = TextStore(store)
+    _save(store, texts, "a", {"extractedText": LONG_TEXT, "semantic_analysis": LONG_ANALYSIS})
+    small = {"overall_match_score": 40, "details": []}
+    doc = _save(store, texts, "a", {"extractedText": "short", "semantic_analysis": small}, merge=True)
+
+    assert doc["textRefs"] == {"extractedText": None, "semantic_analysis": None}
+    texts.hydrate([doc])
+    assert doc["extractedText"] == "short"
+    assert doc["semantic_analysis"] == small
+
+
+def test_hydrate_keeps_inline_json_on_legacy_documents(store):
+    """A full JSON value stored inline next to an old reference is kept as is"""
+    texts = TextStore(store)
+    stale = {"hash": texts.put(b'{"overall_match_score": 1}'), "length": 26, "kind": "json"}
+    doc = {"semantic_analysis": {"overall_match_score": 70, "details": []},
+           "textRefs": {"semantic_analysis": stale}}
+
+    texts.hydrate([doc])
+    assert doc["semantic_analysis"]["overall_match_score"] == 70
+
+
+def test_resaving_a_document_as_read_keeps_its_references(store):
+    """Writing back an unhydrated document does not drop the offloaded JSON"""
+    texts = TextStore(store)
+    doc = _save(store, texts, "a", {"semantic_analysis": LONG_ANALYSIS})
+    doc = _save(store, texts, "a", {**doc, "status": "rescued"})
+
+    texts.hydrate([doc])
+    assert doc["semantic_analysis"] == LONG_ANALYSIS
@@ -0,0 +1,165 @@
+"""
+Tests for the staged upload pipeline
+"""
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+
+from app.core.exceptions import ServiceUnavailableException
+from app.services.upload_pipeline import UploadPipeline
+from app.utils.uploads import SpooledUpload
+
+
+def _pipeline(tmp_path, owner="pod-a", queue_size=10, max_backlog=100) -> UploadPipeline:
+    concurrency = {"extract": 1, "parse": 1, "embed": 1, "persist": 1, "notify": 1}
+    return UploadPipeline(str(tmp_path / owner), queue_size, concurrency,
+                          max_backlog=max_backlog, owner=owner)
+
+
+def _upload(text: str, filename: str = "cv.txt") -> SpooledUpload:
+    upload = SpooledUpload(filename, "text/plain", spool_max_bytes=1024 * 1024)
+    upload.write(text.encode())
+    upload.finish()
+    return upload
+
+
+def _job_record(firebase, job_id, owner, path):
+    record = {
+        "jobId": job_id, "owner": owner, "state": "accepted", "stage": "receive", "done": False,
+        "fileName": "cv.txt", "contentType": "text/plain", "size": 0, "sha256": job_id,
+        "path": path, "form": {"name": "Ada Lovelace", "email": "ada@example.com"},
+        "notify": False, "candidateId": f"CV-{job_id}", "error": None, "timings": {},
+        "createdAt": datetime.now()
+    }
+    firebase.db.collection(UploadPipeline.COLLECTION).document(job_id).set(record)
+    return record
+
+
+async def _stopped(firebase, pipeline: UploadPipeline):
+    await pipeline.stop()
+    await firebase.blobs.stop()
+
+
+def test_resume_only_picks_up_own_jobs(firebase, tmp_path):
+    """Unfinished jobs of other instances are left alone; own jobs are resumed or failed"""
+    pipeline = _pipeline(tmp_path, owner="pod-a")
+    os.makedirs(pipeline.directory)
+    stored = os.path.join(pipeline.directory, "UPJ-1.txt")
+    with open(stored, "w") as f:
+        f.write("Python developer with Docker and SQL experience")
+    _job_record(firebase, "UPJ-1", "pod-a", stored)
+    _job_record(firebase, "UPJ-2", "pod-a", "/nonexistent/UPJ-2.txt")
+    _job_record(firebase, "UPJ-3", "pod-b", "/other-pod/UPJ-3.txt")
+
+    async def run():
+        await pipeline.start()
+        try:
+            for _ in range(100):
+                job = await pipeline.wait("UPJ-1", timeout=30)
+                if job is not None:
+                    return job
+                await asyncio.sleep(0.01)
+        finally:
+            await _stopped(firebase, pipeline)
+
+    job = asyncio.run(run())
+    jobs = firebase.db.collection(UploadPipeline.COLLECTION)
+    assert job["state"] == "completed"
+    assert "docker" in job["record"]["skills"]
+    assert firebase.get_cv("CV-UPJ-1")["name"] == "Ada Lovelace"
+    assert jobs.document("UPJ-2").get().get("error") == "Stored upload is missing"
+    assert jobs.document("UPJ-3").get().get("done") is False
+
+
+def test_submit_does_not_wait_for_a_saturated_extract_stage(firebase, tmp_path):
+    """Uploads are accepted into the backlog while extraction is busy, then refused with 503"""
+    pipeline = _pipeline(tmp_path, queue_size=1, max_backlog=1)
+    release = asyncio.Event()
+
+    async def slow_extract(job):
+        await release.wait()
+        job.update(text="Python", fileUrl="file:///cv.txt", skills=["python"])
+
+    pipeline._extract = slow_extract
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        accepted = []
+        try:
+            # One in the extract worker, one in its queue, one in the backlog
+            for i in range(3):
+                job = await asyncio.wait_for(pipeline.submit(_upload(f"CV {i}"), {"name": f"C{i}"}), 5)
+                accepted.append(job["jobId"])
+                await asyncio.sleep(0.05)
+            assert pipeline.stats()["backlog"] == 1
+            with pytest.raises(ServiceUnavailableException):
+                await pipeline.submit(_upload("CV 3"), {"name": "C3"})
+
+            release.set()
+            return [await pipeline.wait(job_id, timeout=10) for job_id in accepted]
+        finally:
+            await _stopped(firebase, pipeline)
+
+    jobs = asyncio.run(run())
+    assert [job["state"] for job in jobs] == ["completed"] * 3
+
+
+def test_stage_worker_survives_a_failing_job_record(firebase, tmp_path, monkeypatch):
+    """A job whose failure cannot be recorded does not take its stage worker down"""
+    pipeline = _pipeline(tmp_path)
+    calls = []
+
+    async def failing_extract(job):
+        calls.append(job["jobId"])
+        raise ValueError("unreadable")
+
+    async def broken_finish(job, error=None):
+        raise RuntimeError("store unavailable")
+
+    pipeline._extract = failing_extract
+
+    async def run():
+        try:
+            await pipeline.start()
+            monkeypatch.setattr(pipeline, "_finish", broken_finish)
+            for i in range(2):
+                await pipeline.submit(_upload(f"CV {i}"), {"name": f"C{i}"})
+            for _ in range(100):
+                if len(calls) == 2:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await _stopped(firebase, pipeline)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+CV_FORM = {
+    "name": "Ada Lovelace", "email": "ada@example.com", "phone": "+442079460000",
+    "age": "36", "gender": "Female", "experience": "10", "education": "BSc Mathematics",
+    "location": "London", "current_role": "Engineer", "expected_salary": "80000"
+}
+
+
+def test_upload_endpoint_returns_503_when_the_backlog_is_full(client, tmp_path, monkeypatch):
+    """A full backlog reaches the client as 503 from POST /upload/cv, not 500"""
+    pipeline = _pipeline(tmp_path, max_backlog=0)
+
+    async def no_workers():
+        pass
+
+    monkeypatch.setattr(pipeline, "start", no_workers)
+    monkeypatch.setattr("app.api.v1.endpoints.upload.upload_pipeline", pipeline)
+
+    response = client.post(
+        "/api/v1/upload/cv", data=CV_FORM,
+        files={"file": ("cv.txt", b"Python developer", "text/plain")}
+    )
+
+    assert response.status_code == 503
+    assert "at capacity" in response.json()["detail"]
+    assert pipeline.stats()["backlog"] == 0
@@ -0,0 +1,99 @@
+"""
+Tests for upload size limits and spooling
+"""
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import FastAPI, Request, UploadFile
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.exceptions import PayloadTooLargeException
+from app.core.middleware import BodySizeLimitMiddleware
+from app.utils.uploads import spool_upload
+
+
+@pytest.fixture
+def limited_client():
+    """App echoing the body size behind a 1 KiB multipart limit"""
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=1024)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_middleware_rejects_oversized_multipart_bodies(limited_client):
+    """Too-large multipart bodies get 413, by Content-Length or while streaming"""
+    small = limited_client.post("/echo", files={"file": ("cv.pdf", b"x" * 100)})
+    assert small.status_code == 200
+
+    declared = limited_client.post("/echo", files={"file": ("cv.pdf", b"x" * 4096)})
+    assert declared.status_code == 413
+
+    def chunks():
+        for _ in range(8):
+            yield b"x" * 512
+
+    streamed = limited_client.post(
+        "/echo", content=chunks(), headers={"Content-Type": "multipart/form-data; boundary=b"}
+    )
+    assert streamed.status_code == 413
+
+
+def test_middleware_leaves_other_bodies_alone(limited_client):
+    """Non-multipart bodies (e.g. NDJSON bulk imports) are not limited here"""
+    response = limited_client.post(
+        "/echo", content=b"{}\n" * 1000, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"size": 3000}
+
+
+def _file(data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="cv.pdf")
+
+
+def test_spool_upload_refuses_files_over_the_limit():
+    """Reading stops with PayloadTooLargeException once max_bytes is passed"""
+    with pytest.raises(PayloadTooLargeException):
+        asyncio.run(spool_upload(_file(b"x" * 3000), max_bytes=2048))
+
+
+def test_large_uploads_spill_to_disk():
+    """Uploads above spool_max_bytes move to a temp file that close() removes"""
+    data = os.urandom(3000)
+
+    async def run():
+        small = await spool_upload(_file(b"small"), spool_max_bytes=1024)
+        large = await spool_upload(_file(data), spool_max_bytes=1024)
+        return small, large
+
+    small, large = asyncio.run(run())
+    try:
+        assert small.in_memory and small.read_bytes() == b"small"
+        assert not large.in_memory and os.path.exists(large.path)
+        assert large.path.endswith(".pdf")
+        assert large.read_bytes() == data
+        assert large.size == 3000 and large.sha256 == hashlib.sha256(data).hexdigest()
+    finally:
+        small.close()
+        large.close()
+    assert not os.path.exists(large.path)
+
+
+def test_api_returns_413_for_oversized_bodies(client, monkeypatch):
+    """PayloadTooLargeException reaches the client as 413, not 500"""
+    monkeypatch.setattr(settings, "ZIP_MAX_ARCHIVE_MB", 0)
+
+    response = client.post("/api/v1/cvs/bulk/zip", content=b"PK\x03\x04 not small enough",
+                           headers={"Content-Type": "application/zip"})
+
+    assert response.status_code == 413
+    assert "upload limit" in response.json()["detail"]
@@ -0,0 +1,85 @@
+"""
+Tests for the ZIP archive bulk import
+"""
+import asyncio
+import zipfile
+
+import pytest
+
+from app.core.exceptions import BadRequestException
+from app.services.zip_ingest_service import ZipIngestService
+
+CV_TEXT = "Jane Roe\njane{n}@example.com\nPython developer with {n} years experience\n"
+
+
+def _archive(tmp_path, members):
+    path = tmp_path / "cvs.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return str(path)
+
+
+def test_ingest_creates_cvs_and_reports_skipped_members(firebase, tmp_path):
+    """Supported members become CVs; others are skipped or reported, not fatal"""
+    path = _archive(tmp_path, {
+        "a/one.txt": CV_TEXT.format(n=1),
+        "a/two.txt": CV_TEXT.format(n=2),
+        "copy/one.txt": CV_TEXT.format(n=1),
+        "big.txt": "x" * 4096,
+        "setup.exe": b"MZ",
+        "__MACOSX/a/._one.txt": b"resource fork",
+        "empty/": b"",
+    })
+    service = ZipIngestService(workers=1, max_member_bytes=1024)
+    service.BATCH_SIZE = 2
+
+    report = asyncio.run(service.ingest(path))
+
+    statuses = {r["member"]: r["status"] for r in report["results"]}
+    assert statuses == {
+        "a/one.txt": "created", "a/two.txt": "created", "copy/one.txt": "created",
+        "big.txt": "error", "setup.exe": "skipped",
+    }
+    stats = report["stats"]
+    assert (stats["members"], stats["created"], stats["failed"], stats["skipped"]) == (5, 3, 1, 1)
+    # The duplicate member reuses the first one's extraction
+    assert stats["cached"] == 1
+    assert stats["batches"] == 2
+    cvs = firebase.get_cvs()
+    assert len(cvs) == 3
+    assert {cv["archivePath"] for cv in cvs} == {"a/one.txt", "a/two.txt", "copy/one.txt"}
+    assert firebase.metrics.read_counters()["total"] == 3
+
+
+def test_members_past_the_limit_are_skipped(firebase, tmp_path):
+    """Only the first max_members CV members are imported"""
+    path = _archive(tmp_path, {f"cv{n}.txt": CV_TEXT.format(n=n) for n in range(5)})
+
+    report = asyncio.run(ZipIngestService(workers=1, max_members=2, include_ok=False).ingest(path))
+
+    assert report["stats"]["created"] == 2
+    # A single summary entry, not one per member past the limit
+    assert [(r["member"], r["status"]) for r in report["results"]] == [("cv2.txt", "skipped")]
+
+
+def test_not_a_zip_is_rejected(firebase, tmp_path):
+    """A file that is not a ZIP archive is a bad request"""
+    path = tmp_path / "cvs.zip"
+    path.write_bytes(b"not a zip")
+
+    with pytest.raises(BadRequestException):
+        asyncio.run(ZipIngestService(workers=1).ingest(str(path)))
+
+
+def test_api_rejects_bad_archives_with_400(client):
+    """An empty body or a non-ZIP body is a 400 from POST /cvs/bulk/zip"""
+    headers = {"Content-Type": "application/zip"}
+
+    empty = client.post("/api/v1/cvs/bulk/zip", content=b"", headers=headers)
+    assert empty.status_code == 400
+    assert empty.json()["detail"] == "Request body is empty"
+
+    invalid = client.post("/api/v1/cvs/bulk/zip", content=b"not a zip", headers=headers)
+    assert invalid.status_code == 400
+    assert invalid.json()["detail"].startswith("Not a valid ZIP archive")
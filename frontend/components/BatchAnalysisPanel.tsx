@@ -80,6 +80,12 @@ export default function BatchAnalysisPanel() {
           return;
         }
         
+        if (data.status === 'failed' || data.status === 'cancelled') {
+          setStatus('error');
+          setIsRunning(false);
+          return;
+        }
+        
         polls++;
         if (polls < maxPolls) {
           setTimeout(poll, 1000);